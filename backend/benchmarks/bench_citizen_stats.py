@@ -0,0 +1,135 @@
+"""
+Benchmark citizen dashboard statistics: the legacy three counts plus
+$lookup aggregation against the single $facet pipeline.
+
+Seeds a throwaway database with citizens that own thousands of complaints,
+then reports per-request latency percentiles for both implementations.
+
+    python -m benchmarks.bench_citizen_stats --complaints 1000 5000 --runs 30
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from routers.analytics import citizen_stats_pipeline
+
+STATUSES = ["pending", "in_progress", "resolved", "escalated"]
+
+
+def legacy_recent_pipeline(citizen_id: str) -> list:
+    """The pre-$facet recent-complaints pipeline, joining before sorting"""
+    return [
+        {"$match": {"citizen_id": citizen_id}},
+        {"$lookup": {"from": "ai_analyses", "localField": "_id", "foreignField": "complaint_id", "as": "ai_analysis"}},
+        {"$addFields": {"ai_analysis": {"$cond": {
+            "if": {"$eq": [{"$size": "$ai_analysis"}, 0]},
+            "then": None,
+            "else": {"$let": {
+                "vars": {"analysis": {"$arrayElemAt": ["$ai_analysis", 0]}},
+                "in": {
+                    "department_id": "$$analysis.department_id",
+                    "priority_score": "$$analysis.priority_score",
+                    "analysis_text": "$$analysis.analysis_text",
+                    "officer_recommendation": "$$analysis.officer_recommendation"
+                }
+            }}
+        }}}},
+        {"$sort": {"created_at": -1}},
+        {"$limit": 5}
+    ]
+
+
+async def legacy_stats(db, citizen_id: str):
+    await db.complaints.count_documents({"citizen_id": citizen_id})
+    await db.complaints.count_documents({"citizen_id": citizen_id, "status": {"$in": ["pending", "in_progress"]}})
+    await db.complaints.count_documents({"citizen_id": citizen_id, "status": "resolved"})
+    await db.complaints.aggregate(legacy_recent_pipeline(citizen_id)).to_list(5)
+
+
+async def facet_stats(db, citizen_id: str):
+    await db.complaints.aggregate(citizen_stats_pipeline(citizen_id)).to_list(1)
+
+
+async def seed(db, citizen_id: str, count: int):
+    start = datetime.utcnow() - timedelta(days=count)
+    complaints, analyses = [], []
+    for i in range(count):
+        complaint_id = str(ObjectId())
+        analysis = {
+            "_id": str(ObjectId()),
+            "complaint_id": complaint_id,
+            "department_id": "PHE_001",
+            "priority_score": 0.5,
+            "analysis_text": "Department: Public Health Engineering Department\nPriority: 5\n" + "x" * 300,
+            "officer_recommendation": "Sunita Pradhan – Rural Water Supply Engineer",
+            "version": "benchmark",
+            "created_at": start + timedelta(days=i)
+        }
+        analyses.append(analysis)
+        complaints.append({
+            "_id": complaint_id,
+            "title": f"Complaint {i}",
+            "description": "No water supply in the ward. " * 10,
+            "district": "Gangtok",
+            "location": "MG Marg",
+            "citizen_id": citizen_id,
+            "status": STATUSES[i % len(STATUSES)],
+            "created_at": start + timedelta(days=i),
+            "ai_analysis": analysis
+        })
+    await db.complaints.insert_many(complaints)
+    await db.ai_analyses.insert_many(analyses)
+
+
+async def measure(fn, db, citizen_id: str, runs: int) -> dict:
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn(db, citizen_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "max_ms": round(latencies[-1], 2)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--complaints", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--database", default="complaint_system_benchmark")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[args.database]
+    try:
+        await client.drop_database(args.database)
+        # Match the production indexes the two implementations rely on
+        await db.complaints.create_index([("citizen_id", 1), ("created_at", -1)])
+        await db.ai_analyses.create_index("complaint_id")
+
+        print(f"{'complaints':>10}  {'implementation':<8}  {'p50 ms':>8}  {'p95 ms':>8}  {'max ms':>8}")
+        for count in args.complaints:
+            citizen_id = f"citizen{count}@example.com"
+            await seed(db, citizen_id, count)
+            for name, fn in (("legacy", legacy_stats), ("facet", facet_stats)):
+                await fn(db, citizen_id)  # warm up
+                result = await measure(fn, db, citizen_id, args.runs)
+                print(f"{count:>10}  {name:<8}  {result['p50_ms']:>8}  {result['p95_ms']:>8}  {result['max_ms']:>8}")
+    finally:
+        await client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""
+Benchmark password verification during a login burst: bcrypt inline on the
+event loop (the previous login handler) against the bounded PasswordHasher
+thread pool.
+
+For each mode a burst of concurrent verifications runs next to a heartbeat
+task that should tick every 10ms; the heartbeat's worst delay is the time
+every other endpoint would have been frozen.
+
+    python -m benchmarks.bench_login --logins 50 --rounds 12 --workers 4
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import utils.auth
+from utils.auth import PasswordHasher
+
+HEARTBEAT_INTERVAL = 0.01  # seconds
+
+
+async def heartbeat(delays: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        delays.append(time.perf_counter() - started - HEARTBEAT_INTERVAL)
+
+
+async def inline_login(hashed: str):
+    # Yield once like the awaited user lookup before verification does
+    await asyncio.sleep(0)
+    return utils.auth.verify_password("secret", hashed)
+
+
+async def run_burst(verify, hashed: str, logins: int) -> dict:
+    delays = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(delays, stop))
+    await asyncio.sleep(HEARTBEAT_INTERVAL * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[verify(hashed) for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    return {
+        "logins_per_second": logins / elapsed,
+        "loop_lag_max_ms": max(delays) * 1000,
+        "loop_lag_p50_ms": statistics.median(delays) * 1000
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare inline and pooled bcrypt during a login burst")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=4, help="hashing threads")
+    args = parser.parse_args()
+
+    utils.auth.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=args.rounds)
+    hashed = utils.auth.pwd_context.hash("secret")
+    hasher = PasswordHasher(workers=args.workers, max_pending=args.logins)
+
+    async def pooled_login(hashed: str):
+        return await hasher.verify("secret", hashed)
+
+    print(f"{args.logins} concurrent logins, bcrypt cost {args.rounds}, {args.workers} worker threads")
+    for name, verify in (("inline", inline_login), ("pool", pooled_login)):
+        result = await run_burst(verify, hashed, args.logins)
+        print(
+            f"{name:>6}: {result['logins_per_second']:7.1f} logins/s  "
+            f"loop lag p50={result['loop_lag_p50_ms']:7.1f}ms max={result['loop_lag_max_ms']:7.1f}ms"
+        )
+    hasher.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+Benchmark response serialization for list endpoints: response_model
+validation plus jsonable_encoder and json.dumps (the previous path) against
+MongoJSONResponse sending the documents as read from Mongo.
+
+Documents are generated in memory, so no database is needed.
+
+    python -m benchmarks.bench_responses --documents 200 1000 --runs 50
+"""
+import time
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from models.models import ComplaintPage, User
+from utils.responses import MongoJSONResponse
+
+
+def complaint_documents(count: int) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": str(ObjectId()),
+            "title": f"Water supply disrupted in ward {i % 40}",
+            "description": "No water for three days in the lower market area, tankers have not arrived",
+            "district": "Gangtok",
+            "location": "Lal Bazaar",
+            "citizen_id": f"citizen{i % 100}@example.com",
+            "status": "pending",
+            "department_id": "PHE_001",
+            "assigned_to": str(ObjectId()),
+            "created_at": now - timedelta(minutes=i),
+            "last_updated": now,
+            "analysis_status": "completed",
+            "ai_analysis": {"department_id": "PHE_001", "priority_score": 0.8}
+        }
+        for i in range(count)
+    ]
+
+
+def user_documents(count: int) -> list:
+    return [
+        {
+            "_id": str(ObjectId()),
+            "email": f"user{i}@example.com",
+            "name": f"User {i}",
+            "role": "officer" if i % 10 == 0 else "citizen",
+            "department_id": "PHE_001" if i % 10 == 0 else None,
+            "active_complaints": [],
+            "created_at": datetime.utcnow(),
+            "last_updated": datetime.utcnow()
+        }
+        for i in range(count)
+    ]
+
+
+def validated_body(adapter: TypeAdapter, content) -> bytes:
+    """What FastAPI does with a response_model: validate, encode, json.dumps"""
+    value = adapter.validate_python(content)
+    return JSONResponse(jsonable_encoder(adapter.dump_python(value, by_alias=True, exclude_unset=True))).body
+
+
+def timed(func, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"  {name:<10} p50={statistics.median(samples):8.2f}ms  p95={p95:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare validated and fast JSON responses")
+    parser.add_argument("--documents", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    page_adapter = TypeAdapter(ComplaintPage)
+    users_adapter = TypeAdapter(List[User])
+    for count in args.documents:
+        page = {"items": complaint_documents(count), "next": None}
+        users = user_documents(count)
+        print(f"{count} documents")
+        print(" complaints page")
+        report("validated", timed(lambda: validated_body(page_adapter, page), args.runs))
+        report("fast", timed(lambda: MongoJSONResponse(page).body, args.runs))
+        print(" users")
+        report("validated", timed(lambda: validated_body(users_adapter, users), args.runs))
+        report("fast", timed(lambda: MongoJSONResponse(users).body, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Load test for the complaint API: login, create_complaint, get_complaints and
+citizen stats driven at fixed concurrency levels.
+
+The app runs in-process behind httpx's ASGI transport, against a local
+MongoDB (--mongodb) or the async in-memory fake from tests/fake_db.py. LLM
+calls made by the analysis workers go to tests/fake_llm_server.py with a
+configurable latency and error rate. Latency percentiles and requests per
+second are written to a JSON file; pass an earlier file as --baseline to
+flag regressions. The exit status is 1 when there are regressions or when
+analysis jobs dead-letter or fail to drain.
+
+    python -m benchmarks.load_test --concurrency 1 10 50 --requests 200 --output load.json
+    python -m benchmarks.load_test --mongodb mongodb://localhost:27017 --llm-latency 0.8 --llm-error-rate 0.05
+    python -m benchmarks.load_test --baseline load.json --output load-new.json
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from tests.fake_db import fake_database
+from tests.fake_llm_server import FakeLLMServer, DEFAULT_RESPONSE
+
+SCENARIOS = ["login", "create_complaint", "get_complaints", "citizen_stats"]
+PASSWORD = "load-test-password"
+DISTRICTS = ["Gangtok", "Namchi", "Mangan", "Gyalshing", "Pakyong", "Soreng"]
+WORDS = (
+    "water supply pipeline road pothole streetlight garbage drain sewage school hospital "
+    "electricity transformer bridge landslide market bus stop tap leakage broken blocked "
+    "overflowing missing dark flooded damaged ward lane junction near behind opposite since "
+    "weeks days residents children shops traffic accident smell mosquitoes"
+).split()
+
+
+def random_text(words: int) -> str:
+    # Random wording keeps new complaints from being linked as near-duplicates
+    return " ".join(random.choice(WORDS) for _ in range(words))
+
+
+FAKE_ANALYSIS = {
+    "department": "Public Health Engineering Department",
+    "priority": 7,
+    "analysis": "Households in the area have had no water supply for several days.",
+    "officer": "Sunita Pradhan – Rural Water Supply Engineer should handle this case because it concerns water supply."
+}
+
+
+def fake_analysis(body: Dict) -> str:
+    """
+    Fake LLM content shaped like the prompt asks: a results array for
+    batched prompts, one JSON object for single JSON-mode prompts and the
+    line format otherwise
+    """
+    if body.get("response_format", {}).get("type") != "json_object":
+        return DEFAULT_RESPONSE
+    match = re.search(r"following (\d+) complaints", body["messages"][-1]["content"])
+    if not match:
+        return json.dumps(FAKE_ANALYSIS)
+    return json.dumps({"results": [{"id": i, **FAKE_ANALYSIS} for i in range(1, int(match.group(1)) + 1)]})
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, math.ceil(pct / 100 * len(samples)) - 1))]
+
+
+def summarize(scenario: str, concurrency: int, latencies: List[float], errors: int, elapsed: float) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0
+    }
+
+
+async def seed(db, users: int, complaints: int) -> List[str]:
+    """Insert citizens sharing one password hash and their complaint history"""
+    from utils.auth import password_hasher
+
+    hashed = await password_hasher.hash(PASSWORD)
+    emails = [f"citizen{i}@loadtest.example.com" for i in range(users)]
+    await db["users"].insert_many([
+        {
+            "_id": str(ObjectId()),
+            "email": email,
+            "name": f"Citizen {i}",
+            "role": "citizen",
+            "hashed_password": hashed,
+            "created_at": datetime.utcnow()
+        }
+        for i, email in enumerate(emails)
+    ])
+
+    start = datetime.utcnow() - timedelta(days=30)
+    if complaints:
+        await db["complaints"].insert_many([
+            {
+                "_id": str(ObjectId()),
+                "title": random_text(5),
+                "description": random_text(30),
+                "district": DISTRICTS[i % len(DISTRICTS)],
+                "location": random_text(2),
+                "citizen_id": emails[i % users],
+                "status": ["pending", "in_progress", "resolved"][i % 3],
+                "department_id": "PHE_001",
+                "analysis_status": "completed",
+                "ai_analysis": {"department_id": "PHE_001", "priority_score": 0.6},
+                "created_at": start + timedelta(minutes=i),
+                "last_updated": start + timedelta(minutes=i)
+            }
+            for i in range(complaints)
+        ])
+    return emails
+
+
+def build_scenarios(emails: List[str]) -> Dict[str, Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]]:
+    """Request factories per scenario; the index spreads load across citizens"""
+    from utils.auth import create_access_token
+
+    tokens = {
+        email: {"Authorization": f"Bearer {create_access_token({'sub': email, 'role': 'citizen'})}"}
+        for email in emails
+    }
+
+    async def login(client, i):
+        return await client.post(
+            "/api/auth/token", data={"username": emails[i % len(emails)], "password": PASSWORD}
+        )
+
+    async def create_complaint(client, i):
+        return await client.post("/api/complaints/", json={
+            "title": random_text(5),
+            "description": random_text(30),
+            "district": random.choice(DISTRICTS),
+            "location": random_text(2),
+            "citizen_id": emails[i % len(emails)]
+        })
+
+    async def get_complaints(client, i):
+        return await client.get("/api/complaints/", headers=tokens[emails[i % len(emails)]])
+
+    async def citizen_stats(client, i):
+        return await client.get("/api/analytics/citizen-stats", headers=tokens[emails[i % len(emails)]])
+
+    return {
+        "login": login,
+        "create_complaint": create_complaint,
+        "get_complaints": get_complaints,
+        "citizen_stats": citizen_stats
+    }
+
+
+async def run_level(client: httpx.AsyncClient, request, requests: int, concurrency: int):
+    """Send requests from concurrency workers; return latencies (ms), errors and elapsed seconds"""
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await request(client, i)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, time.perf_counter() - started
+
+
+async def wait_for_analyses(db, timeout: float) -> Dict:
+    """Wait for the analysis queue to drain and return its job counts"""
+    from utils.analysis_queue import get_queue_stats, JOB_QUEUED, JOB_LEASED
+
+    deadline = time.monotonic() + timeout
+    while True:
+        stats = await get_queue_stats(db)
+        pending = stats["counts"][JOB_QUEUED] + stats["counts"][JOB_LEASED]
+        if not pending or time.monotonic() >= deadline:
+            return {"counts": stats["counts"], "retries": stats["retries"], "deferrals": stats["deferrals"]}
+        await asyncio.sleep(0.2)
+
+
+async def run_load_test(
+    scenarios: List[str] = SCENARIOS,
+    concurrency: List[int] = [1, 10, 50],
+    requests: int = 200,
+    warmup: int = 10,
+    users: int = 20,
+    complaints: int = 500,
+    mongodb: Optional[str] = None,
+    database: str = "complaint_system_loadtest",
+    db_latency: float = 0.0,
+    analysis_workers: int = 4,
+    llm_latency: float = 0.5,
+    llm_error_rate: float = 0.0,
+    drain_timeout: float = 60.0
+) -> Dict:
+    llm_server = FakeLLMServer(latency=llm_latency, error_rate=llm_error_rate, content=fake_analysis).start()
+    # Settings are read at import time, so point the app at the fake server first
+    os.environ["GROQ_BASE_URL"] = llm_server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from main import app
+    from routers import complaints as complaints_router
+    from utils.analysis_queue import AnalysisWorkerPool
+    from utils.dedup import duplicate_index
+    from utils.llm_client import close_llm_client
+
+    mongo_client = None
+    if mongodb:
+        mongo_client = AsyncIOMotorClient(mongodb)
+        await mongo_client.drop_database(database)
+        db = mongo_client[database]
+    else:
+        db = fake_database(database, latency=db_latency)
+
+    previous = {name: getattr(app, name) for name in ("mongodb", "analysis_workers") if hasattr(app, name)}
+    app.mongodb = db
+    app.analysis_workers = None
+    duplicate_index.clear()
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {
+            "database": "mongodb" if mongodb else "fake",
+            "db_latency": db_latency,
+            "users": users,
+            "seed_complaints": complaints,
+            "requests": requests,
+            "warmup": warmup,
+            "concurrency": concurrency,
+            "analysis_workers": analysis_workers,
+            "llm_latency": llm_latency,
+            "llm_error_rate": llm_error_rate,
+            "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", "12"))
+        },
+        "results": []
+    }
+    try:
+        emails = await seed(db, users, complaints)
+        requests_by_scenario = build_scenarios(emails)
+        if analysis_workers > 0:
+            app.analysis_workers = AnalysisWorkerPool(
+                db,
+                complaints_router.process_complaint_analysis,
+                on_dead_letter=complaints_router.mark_analysis_failed,
+                on_deferred=complaints_router.mark_analysis_deferred,
+                concurrency=analysis_workers,
+                poll_interval=0.2
+            )
+            app.analysis_workers.start()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            for scenario in scenarios:
+                request = requests_by_scenario[scenario]
+                for level in concurrency:
+                    await run_level(client, request, warmup, min(level, warmup) or 1)
+                    latencies, errors, elapsed = await run_level(client, request, requests, level)
+                    result = summarize(scenario, level, latencies, errors, elapsed)
+                    report["results"].append(result)
+                    print(format_result(result), flush=True)
+
+        if app.analysis_workers:
+            started = time.perf_counter()
+            report["analysis"] = await wait_for_analyses(db, drain_timeout)
+            report["analysis"].update({
+                "drain_seconds": round(time.perf_counter() - started, 2),
+                "llm_requests": len(llm_server.requests),
+                "llm_max_in_flight": llm_server.max_in_flight
+            })
+        report["failures"] = analysis_failures(report)
+        return report
+    finally:
+        if app.analysis_workers:
+            await app.analysis_workers.stop()
+        await close_llm_client()
+        llm_server.stop()
+        duplicate_index.clear()
+        del app.mongodb, app.analysis_workers
+        for name, value in previous.items():
+            setattr(app, name, value)
+        if mongo_client:
+            await mongo_client.drop_database(database)
+            mongo_client.close()
+
+
+def format_result(result: Dict) -> str:
+    return (
+        f"{result['scenario']:<17} c={result['concurrency']:<4} {result['rps']:>9.1f} req/s  "
+        f"p50={result['p50_ms']:>8.1f}ms  p95={result['p95_ms']:>8.1f}ms  p99={result['p99_ms']:>8.1f}ms  "
+        f"errors={result['errors']}"
+    )
+
+
+def analysis_failures(report: Dict) -> List[str]:
+    """
+    Problems with the analysis pipeline during the run. Latency numbers
+    measured while jobs dead-letter or never drain describe a broken
+    pipeline, so the run fails on them.
+    """
+    from utils.analysis_queue import JOB_DEAD, JOB_QUEUED, JOB_LEASED
+
+    analysis = report.get("analysis")
+    if not analysis:
+        return []
+    counts = analysis["counts"]
+    failures = []
+    if counts[JOB_DEAD]:
+        failures.append(f"{counts[JOB_DEAD]} analysis job(s) dead-lettered")
+    if counts[JOB_QUEUED] + counts[JOB_LEASED]:
+        failures.append(f"{counts[JOB_QUEUED] + counts[JOB_LEASED]} analysis job(s) still pending after the drain timeout")
+    return failures
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.2) -> List[str]:
+    """
+    Regressions of current against baseline per scenario and concurrency:
+    p95 latency up or throughput down by more than tolerance.
+    """
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        base = previous.get((result["scenario"], result["concurrency"]))
+        if not base:
+            continue
+        label = f"{result['scenario']} c={result['concurrency']}"
+        if base["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+        if base["rps"] and result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: {base['rps']} req/s -> {result['rps']} req/s")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{label}: errors {base['errors']} -> {result['errors']}")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20, help="seeded citizens")
+    parser.add_argument("--complaints", type=int, default=500, help="seeded complaints")
+    parser.add_argument("--mongodb", help="MongoDB URL; the in-memory fake is used when omitted")
+    parser.add_argument("--database", default="complaint_system_loadtest", help="dropped before and after the run")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds added to each fake database call")
+    parser.add_argument("--analysis-workers", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake LLM response")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--drain-timeout", type=float, default=60.0, help="seconds to wait for queued analyses")
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    report = await run_load_test(
+        scenarios=args.scenarios,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        warmup=args.warmup,
+        users=args.users,
+        complaints=args.complaints,
+        mongodb=args.mongodb,
+        database=args.database,
+        db_latency=args.db_latency,
+        analysis_workers=args.analysis_workers,
+        llm_latency=args.llm_latency,
+        llm_error_rate=args.llm_error_rate,
+        drain_timeout=args.drain_timeout
+    )
+    if "analysis" in report:
+        print(f"analysis jobs: {report['analysis']['counts']} in {report['analysis']['drain_seconds']}s after the load")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    for line in report["failures"]:
+        print(f"FAILURE {line}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if not regressions:
+            print(f"No regressions against {args.baseline}")
+    if report["failures"] or regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
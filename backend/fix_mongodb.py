@@ -1,33 +1,27 @@
-from motor.motor_asyncio import AsyncIOMotorClient
 import asyncio
 from dotenv import load_dotenv
-import os
 
 load_dotenv()
 
+from utils.db_setup import ensure_indexes
+from utils.database import create_client, get_database
+
 async def fix_mongodb():
     # Connect to MongoDB
-    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
-    db = client.complaint_system
+    client = create_client()
+    db = get_database(client)
     
     try:
         # List all indexes
-        indexes = await db.users.list_indexes().to_list(length=None)
-        print("Current indexes:", [idx["name"] for idx in indexes])
-        
-        # Drop the problematic index
-        try:
-            await db.users.drop_index("username_1")
-            print("Successfully dropped username_1 index")
-        except Exception as e:
-            print(f"Error dropping index: {str(e)}")
+        indexes = await db.users.index_information()
+        print("Current indexes:", list(indexes))
         
-        # Drop the entire collection and recreate it (if needed)
-        try:
-            await db.users.drop()
-            print("Successfully dropped users collection")
-        except Exception as e:
-            print(f"Error dropping collection: {str(e)}")
+        # Drop the stale username_1 index and apply the index registry;
+        # existing users are kept
+        report = await ensure_indexes(db)
+        for action in ("created", "rebuilt", "dropped"):
+            for index in report[action]:
+                print(f"{action}: {index}")
             
     except Exception as e:
         print(f"Error: {str(e)}")
@@ -35,4 +29,4 @@ async def fix_mongodb():
         client.close()
 
 if __name__ == "__main__":
-    asyncio.run(fix_mongodb()) 
\ No newline at end of file
+    asyncio.run(fix_mongodb()) 
@@ -1,6 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 import os
 import logging
@@ -8,14 +8,9 @@ import logging
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# Configure logging: structured records through a background listener thread
+from utils.logging_config import configure_logging, stop_logging, CorrelationIdMiddleware
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -30,13 +25,77 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Tag every log record of a request with its X-Request-ID
+app.add_middleware(CorrelationIdMiddleware)
+
+# Cap image upload bodies while they are received, before multipart parsing spools them
+from utils.storage import UploadLimitMiddleware
+app.add_middleware(UploadLimitMiddleware)
+
+# Per-route latency histograms for /metrics
+from utils.metrics import REGISTRY, METRICS_ENABLED, PROMETHEUS_CONTENT_TYPE, MetricsMiddleware
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # MongoDB connection
 @app.on_event("startup")
 async def startup_db_client():
+    # Misconfigured event delivery fails the worker rather than silently dropping events
+    check_events_source()
     try:
-        app.mongodb_client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
-        app.mongodb = app.mongodb_client.complaint_system
-        logger.info("Connected to MongoDB")
+        app.mongodb_client = create_client()
+        app.mongodb = get_database(app.mongodb_client)
+        # Reporting reads prefer secondaries so they don't compete with intake
+        app.mongodb_analytics = get_analytics_database(app.mongodb)
+        readiness = await check_readiness(app.mongodb_client)
+        if readiness["ready"]:
+            logger.info(f"Connected to MongoDB (replica set: {readiness['replica_set']}, secondaries: {readiness['secondaries']})")
+        else:
+            logger.warning(f"MongoDB is not ready yet: {readiness.get('error')}")
+        # Change streams need a replica set; on a standalone server the stream would fail forever
+        if EVENTS_SOURCE == "change_stream" and readiness["ready"] and not readiness["replica_set"]:
+            raise RuntimeError(
+                "EVENTS_SOURCE=change_stream needs a MongoDB replica set; run one worker (WEB_CONCURRENCY=1) instead"
+            )
+
+        # Create missing indexes from routers/indexes.py and backfill officer
+        # workload counters. Every worker runs this, so changed indexes are left
+        # to a one-off python -m utils.db_setup migration. Failures are logged, not fatal
+        if DB_ENSURE_INDEXES:
+            try:
+                await ensure_indexes(app.mongodb, rebuild=False)
+                await backfill_workloads(app.mongodb)
+                if DB_EXPLAIN_ON_STARTUP:
+                    await explain_hot_queries(app.mongodb)
+            except Exception as e:
+                logger.error(f"Failed to reconcile MongoDB indexes: {str(e)}")
+        
+        # Load recent complaints into the near-duplicate index
+        if DEDUP_ENABLED:
+            try:
+                await duplicate_index.rebuild(app.mongodb)
+            except Exception as e:
+                logger.error(f"Failed to rebuild duplicate index: {str(e)}")
+        
+        # Start AI analysis workers (ANALYSIS_WORKERS=0 leaves the queue to external workers)
+        app.analysis_workers = None
+        if ANALYSIS_WORKERS > 0:
+            app.analysis_workers = AnalysisWorkerPool(
+                app.mongodb,
+                complaints.process_complaint_analysis,
+                on_dead_letter=complaints.mark_analysis_failed,
+                on_deferred=complaints.mark_analysis_deferred
+            )
+            app.analysis_workers.start()
+        
+        # Push events from MongoDB so clients see changes made by every worker
+        app.change_stream = None
+        if EVENTS_SOURCE == "change_stream":
+            app.change_stream = ComplaintChangeStream(app.mongodb)
+            app.change_stream.start()
+        
+        # Queue depth is read when /metrics is scraped
+        REGISTRY.add_collector(lambda: collect_queue_metrics(app.mongodb))
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {str(e)}")
         raise e
@@ -44,8 +103,16 @@ async def startup_db_client():
 @app.on_event("shutdown")
 async def shutdown_db_client():
     try:
+        if getattr(app, "analysis_workers", None):
+            await app.analysis_workers.stop()
+        if getattr(app, "change_stream", None):
+            await app.change_stream.stop()
+        await close_llm_client()
+        password_hasher.close()
+        image_processor.close()
         app.mongodb_client.close()
         logger.info("Closed MongoDB connection")
+        stop_logging()
     except Exception as e:
         logger.error(f"Error closing MongoDB connection: {str(e)}")
 
@@ -54,10 +121,49 @@ async def shutdown_db_client():
 async def root():
     return {"message": "Welcome to the Complaint Management System API"}
 
+# Liveness: the process is serving requests
+@app.get("/health/live", include_in_schema=False)
+async def live():
+    return {"status": "ok"}
+
+# Readiness: MongoDB has a writable primary within READINESS_TIMEOUT
+@app.get("/health/ready", include_in_schema=False)
+async def ready(response: Response):
+    readiness = await check_readiness(app.mongodb_client)
+    if not readiness["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness
+
+# Prometheus metrics for this worker process
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(await REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Import and include routers
-from routers import auth, complaints, users, analytics
+from routers import auth, complaints, users, analytics, events
+from utils.analysis_queue import AnalysisWorkerPool, ANALYSIS_WORKERS, collect_queue_metrics
+from utils.llm_client import close_llm_client
+from utils.auth import password_hasher
+from utils.image_processing import image_processor
+from utils.dedup import duplicate_index, DEDUP_ENABLED
+from utils.storage import STORAGE_BACKEND, LOCAL_STORAGE_DIR, LOCAL_STORAGE_URL
+from utils.db_setup import ensure_indexes, explain_hot_queries
+from utils.assignment import backfill_workloads
+from utils.database import create_client, get_database, get_analytics_database, check_readiness
+from utils.events import ComplaintChangeStream, EVENTS_SOURCE, check_events_source
+
+DB_ENSURE_INDEXES = os.getenv("DB_ENSURE_INDEXES", "true").lower() == "true"
+DB_EXPLAIN_ON_STARTUP = os.getenv("DB_EXPLAIN_ON_STARTUP", "false").lower() == "true"
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(complaints.router, prefix="/api/complaints", tags=["Complaints"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
-app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"]) 
\ No newline at end of file
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
+
+# Serve uploads when they are stored on the local filesystem
+if STORAGE_BACKEND == "local":
+    os.makedirs(LOCAL_STORAGE_DIR, exist_ok=True)
+    app.mount(LOCAL_STORAGE_URL, StaticFiles(directory=LOCAL_STORAGE_DIR), name="uploads") 
\ No newline at end of file
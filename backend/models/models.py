@@ -15,6 +15,12 @@ class ComplaintStatus(str, Enum):
     RESOLVED = "resolved"
     ESCALATED = "escalated"
 
+class AnalysisStatus(str, Enum):
+    PENDING_ANALYSIS = "pending_analysis"
+    COMPLETED = "completed"
+    DEFERRED = "deferred"
+    FAILED = "failed"
+
 class UserBase(BaseModel):
     email: EmailStr
     name: str
@@ -23,6 +29,8 @@ class UserBase(BaseModel):
     location: Optional[str] = None
     department_id: Optional[str] = None
     active_complaints: Optional[List[str]] = Field(default_factory=list)
+    active_count: int = 0
+    skills: Optional[List[str]] = Field(default_factory=list)
 
 class UserCreate(UserBase):
     password: str
@@ -50,6 +58,24 @@ class User(UserBase):
             }
         }
 
+class UserListItem(BaseModel):
+    """User as listed to admins; plain types, no e-mail re-validation"""
+    id: Optional[str] = Field(default=None, alias="_id")
+    email: str
+    name: str
+    role: UserRole
+    contact: Optional[str] = None
+    location: Optional[str] = None
+    department_id: Optional[str] = None
+    active_complaints: Optional[List[str]] = None
+    active_count: Optional[int] = None
+    skills: Optional[List[str]] = None
+    created_at: Optional[datetime] = None
+    last_updated: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+
 class UserInDB(User):
     hashed_password: str
 
@@ -96,7 +122,10 @@ class Complaint(ComplaintBase):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_updated: datetime = Field(default_factory=datetime.utcnow)
     resolution_eta: Optional[datetime] = None
+    analysis_status: Optional[AnalysisStatus] = None
     ai_analysis: Optional[Dict] = None
+    image_analysis: Optional[Dict] = None
+    incident_id: Optional[str] = None
 
     class Config:
         populate_by_name = True
@@ -105,6 +134,36 @@ class Complaint(ComplaintBase):
             ObjectId: lambda v: str(v)
         }
 
+class ComplaintListItem(BaseModel):
+    """
+    List view of a complaint as stored. Every field is optional because
+    lists may be projected with fields=; extra fields pass through.
+    """
+    id: Optional[str] = Field(default=None, alias="_id")
+    title: Optional[str] = None
+    description: Optional[str] = None
+    district: Optional[str] = None
+    location: Optional[str] = None
+    image_url: Optional[str] = None
+    citizen_id: Optional[str] = None
+    status: Optional[ComplaintStatus] = None
+    department_id: Optional[str] = None
+    assigned_to: Optional[str] = None
+    created_at: Optional[datetime] = None
+    last_updated: Optional[datetime] = None
+    resolution_eta: Optional[datetime] = None
+    analysis_status: Optional[AnalysisStatus] = None
+    incident_id: Optional[str] = None
+    ai_analysis: Optional[Dict] = None
+
+    class Config:
+        populate_by_name = True
+        extra = "allow"
+
+class ComplaintPage(BaseModel):
+    items: List[ComplaintListItem]
+    next: Optional[str] = None
+
 class DepartmentBase(BaseModel):
     name: str
     description: str
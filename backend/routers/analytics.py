@@ -1,15 +1,66 @@
 from fastapi import APIRouter, Depends, Request, HTTPException, status
 from models.models import UserRole
 from utils.auth import get_current_user, check_permissions
+from utils.analysis_queue import get_queue_stats, requeue_dead_jobs
+from utils.analysis_cache import analysis_cache
+from utils.circuit_breaker import llm_breaker, llm_retry_budget
+from utils.rollups import get_rollups
+from utils.logging_config import log_payload
+from utils.responses import fast_response
+from utils.database import analytics_db
+from typing import Optional
 from datetime import datetime, timedelta
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def citizen_stats_pipeline(citizen_id: str) -> list:
+    """
+    Counts and the five most recent complaints of a citizen in a single
+    round trip. The recent branch sorts and limits before shaping
+    ai_analysis, and reads the analysis embedded in the complaint instead
+    of joining ai_analyses.
+    """
+    return [
+        {"$match": {"citizen_id": citizen_id}},
+        {
+            "$facet": {
+                "counts": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "total": {"$sum": 1},
+                            "active": {"$sum": {"$cond": [{"$in": ["$status", ["pending", "in_progress"]]}, 1, 0]}},
+                            "resolved": {"$sum": {"$cond": [{"$eq": ["$status", "resolved"]}, 1, 0]}}
+                        }
+                    }
+                ],
+                "recent": [
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": 5},
+                    {
+                        "$addFields": {
+                            "ai_analysis": {
+                                "$cond": {
+                                    "if": {"$ifNull": ["$ai_analysis", False]},
+                                    "then": {
+                                        "department_id": "$ai_analysis.department_id",
+                                        "priority_score": "$ai_analysis.priority_score",
+                                        "analysis_text": "$ai_analysis.analysis_text",
+                                        "officer_recommendation": "$ai_analysis.officer_recommendation"
+                                    },
+                                    "else": None
+                                }
+                            }
+                        }
+                    }
+                ]
+            }
+        }
+    ]
+
 @router.get("/citizen-stats")
 async def get_citizen_stats(
     request: Request,
@@ -17,73 +68,18 @@ async def get_citizen_stats(
 ):
     """Get statistics for citizen dashboard"""
     try:
-        logger.info(f"Fetching stats for user: {current_user}")
+        logger.info(f"Fetching stats for user: {current_user.email}")
         
-        # Get all complaints by the citizen
-        total_complaints = await request.app.mongodb["complaints"].count_documents({
-            "citizen_id": current_user.email  # Using email as identifier
-        })
-        logger.info(f"Total complaints: {total_complaints}")
-        
-        # Get active (pending + in_progress) complaints
-        active_complaints = await request.app.mongodb["complaints"].count_documents({
-            "citizen_id": current_user.email,
-            "status": {"$in": ["pending", "in_progress"]}
-        })
-        logger.info(f"Active complaints: {active_complaints}")
-        
-        # Get resolved complaints
-        resolved_complaints = await request.app.mongodb["complaints"].count_documents({
-            "citizen_id": current_user.email,
-            "status": "resolved"
-        })
-        logger.info(f"Resolved complaints: {resolved_complaints}")
+        result = await analytics_db(request)["complaints"].aggregate(
+            citizen_stats_pipeline(current_user.email)  # Using email as identifier
+        ).to_list(1)
         
-        # Get recent complaints
-        recent_complaints = await request.app.mongodb["complaints"].aggregate([
-            {
-                "$match": {
-                    "citizen_id": current_user.email
-                }
-            },
-            {
-                "$lookup": {
-                    "from": "ai_analyses",
-                    "localField": "_id",
-                    "foreignField": "complaint_id",
-                    "as": "ai_analysis"
-                }
-            },
-            {
-                "$addFields": {
-                    "ai_analysis": {
-                        "$cond": {
-                            "if": { "$eq": [{ "$size": "$ai_analysis" }, 0] },
-                            "then": None,
-                            "else": {
-                                "$let": {
-                                    "vars": {
-                                        "analysis": { "$arrayElemAt": ["$ai_analysis", 0] }
-                                    },
-                                    "in": {
-                                        "department_id": "$$analysis.department_id",
-                                        "priority_score": "$$analysis.priority_score",
-                                        "analysis_text": "$$analysis.analysis_text",
-                                        "officer_recommendation": "$$analysis.officer_recommendation"
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            },
-            {
-                "$sort": { "created_at": -1 }
-            },
-            {
-                "$limit": 5
-            }
-        ]).to_list(5)
+        counts = result[0]["counts"][0] if result and result[0]["counts"] else {}
+        total_complaints = counts.get("total", 0)
+        active_complaints = counts.get("active", 0)
+        resolved_complaints = counts.get("resolved", 0)
+        recent_complaints = result[0]["recent"] if result else []
+        logger.info(f"Complaint counts: total={total_complaints}, active={active_complaints}, resolved={resolved_complaints}")
 
         for c in recent_complaints:
             if 'district' not in c or not c['district']:
@@ -96,14 +92,15 @@ async def get_citizen_stats(
                 c['created_at'] = c['created_at'].isoformat() if isinstance(c['created_at'], datetime) else c['created_at']
                 
         logger.info(f"Recent complaints count: {len(recent_complaints)}")
-        logger.info(f"Sample complaint data: {recent_complaints[0] if recent_complaints else 'No complaints'}")
+        if recent_complaints:
+            log_payload(logger, "Sample complaint data", recent_complaints[0])
         
-        return {
+        return fast_response({
             "total_complaints": total_complaints,
             "active_complaints": active_complaints,
             "resolved_complaints": resolved_complaints,
             "recent_complaints": recent_complaints
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error getting citizen stats: {str(e)}")
@@ -111,4 +108,57 @@ async def get_citizen_stats(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting statistics: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/analysis-queue")
+async def get_analysis_queue_stats(
+    request: Request,
+    current_user: dict = Depends(check_permissions(UserRole.ADMIN))
+):
+    """Get analysis job counts, retry totals, recent dead letters and LLM breaker state"""
+    try:
+        stats = await get_queue_stats(request.app.mongodb)
+        stats["circuit_breaker"] = llm_breaker.stats()
+        stats["retry_budget"] = llm_retry_budget.stats()
+        return stats
+    except Exception as e:
+        logger.error(f"Error getting analysis queue stats: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting analysis queue stats: {str(e)}"
+        )
+
+@router.post("/analysis-queue/requeue")
+async def requeue_dead_analysis_jobs(
+    request: Request,
+    current_user: dict = Depends(check_permissions(UserRole.ADMIN))
+):
+    """Move dead-lettered analysis jobs back onto the queue"""
+    requeued = await requeue_dead_jobs(request.app.mongodb)
+    workers = getattr(request.app, "analysis_workers", None)
+    if workers:
+        workers.notify()
+    return {"requeued": requeued}
+
+@router.get("/analysis-cache")
+async def get_analysis_cache_stats(
+    current_user: dict = Depends(check_permissions(UserRole.ADMIN))
+):
+    """Get hit/miss counters for the analysis cache of this worker"""
+    return analysis_cache.stats()
+
+@router.get("/rollups")
+async def get_complaint_rollups(
+    request: Request,
+    department_id: Optional[str] = None,
+    district: Optional[str] = None,
+    status: Optional[str] = None,
+    current_user: dict = Depends(check_permissions(UserRole.OFFICER, UserRole.ADMIN))
+):
+    """Get complaint counts per department, district and status (officers see their department)"""
+    if current_user.role == UserRole.OFFICER:
+        officer = await request.app.mongodb["users"].find_one({"email": current_user.email})
+        department_id = officer.get("department_id") if officer else None
+        if not department_id:
+            raise HTTPException(status_code=403, detail="Officer has no department")
+    return fast_response(await get_rollups(analytics_db(request), department_id, district, status))
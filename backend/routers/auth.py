@@ -2,13 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta, datetime
 from models.models import UserCreate, User, Token, UserInDB
-from utils.auth import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from utils.auth import password_hasher, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from bson import ObjectId
 from typing import Optional
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -24,7 +22,7 @@ async def register(request: Request, user: UserCreate):
     
     # Create new user
     user_dict = user.dict()
-    user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
+    user_dict["hashed_password"] = await password_hasher.hash(user_dict.pop("password"))
     user_dict["_id"] = str(ObjectId())
     user_dict["created_at"] = datetime.utcnow()
     
@@ -58,7 +56,8 @@ async def login(
         
         # Verify password
         logger.info("Verifying password")
-        if not verify_password(form_data.password, user["hashed_password"]):
+        valid, new_hash = await password_hasher.verify(form_data.password, user["hashed_password"])
+        if not valid:
             logger.warning("Invalid password attempt")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,6 +65,14 @@ async def login(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Upgrade hashes made with an outdated cost factor
+        if new_hash:
+            await request.app.mongodb["users"].update_one(
+                {"_id": user["_id"]},
+                {"$set": {"hashed_password": new_hash}}
+            )
+            logger.info("Rehashed password with the current cost factor")
+        
         # Create access token
         logger.info("Creating access token")
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,67 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File
-from models.models import ComplaintCreate, Complaint, UserRole, ComplaintStatus, AIAnalysis
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from models.models import ComplaintCreate, Complaint, ComplaintPage, UserRole, ComplaintStatus, AIAnalysis, AnalysisStatus
 from utils.auth import get_current_user, check_permissions
-from utils.ai_analysis import analyze_complaint_text, analyze_complaint_image
+from utils.ai_analysis import analyze_complaint_result
+from utils.analysis_parser import AnalysisResult
+from utils.analysis_cache import analysis_cache
+from utils.department_classifier import classify_complaint, LOCAL_CLASSIFIER_VERSION
+from utils.analysis_queue import enqueue_analysis, enqueue_analyses
+from utils.pagination import encode_cursor, keyset_query, InvalidCursorError, KEYSET_SORT
+from utils.rollups import apply_rollup_change, add_to_rollups
+from utils.assignment import claim_officer, release_officer
+from utils.storage import get_storage, is_image_upload, read_chunks, UploadTooLargeError, IMAGE_EXTENSIONS, UPLOAD_MAX_BYTES
+from utils.image_processing import process_complaint_image
+from utils.dedup import duplicate_index, DEDUP_ENABLED
+from utils.logging_config import log_payload
+from utils.responses import fast_response
+from utils.database import analytics_db
+from utils.events import publish_complaint_event
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from pydantic import ValidationError
 from typing import List, Optional
 from datetime import datetime
-import cloudinary
-import cloudinary.uploader
 import os
+import io
+import csv
+import codecs
+import json
 import logging
-import asyncio
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
-
 router = APIRouter()
 
-async def analyze_complaint(request: Request, complaint: dict) -> dict:
+async def analyze_complaint(db, complaint: dict) -> dict:
     """Analyze complaint using AI and return predictions"""
     logger.info(f"Starting analyze_complaint for complaint ID: {complaint['_id']}")
     
     try:
-        # Perform text analysis
-        logger.info("Calling analyze_complaint_text...")
-        department_id, priority_score, analysis_text = await analyze_complaint_text(complaint)
-        logger.info(f"Text analysis results: department={department_id}, priority={priority_score}")
-        
-        # Extract officer recommendation from analysis text
-        lines = analysis_text.strip().split('\n')
-        officer_line = next((line for line in lines if line.startswith("Officer:")), "")
-        officer_recommendation = officer_line.split("Officer:")[1].strip() if officer_line else "No specific officer recommendation provided."
-        
-        # Extract analysis from analysis text
-        analysis_line = next((line for line in lines if line.startswith("Analysis:")), "")
-        analysis = analysis_line.split("Analysis:")[1].strip() if analysis_line else analysis_text
-        
-        logger.info("Successfully extracted analysis and recommendation")
+        # Reuse the analysis of an identical complaint if one is cached
+        version = "llama-3.3-70b-versatile"
+        cached = await analysis_cache.get(db, complaint)
+        if cached:
+            logger.info("Using cached analysis")
+            result = AnalysisResult(**cached)
+            version = "cache"
+        elif (local := classify_complaint(complaint)):
+            # Confident local classification, no LLM call needed
+            logger.info("Using local classifier analysis")
+            result = local
+            version = LOCAL_CLASSIFIER_VERSION
+        else:
+            # Perform text analysis; errors propagate so the queue retries the job
+            logger.info("Calling analyze_complaint_result...")
+            result = await analyze_complaint_result(complaint)
+            await analysis_cache.set(db, complaint, result.dict())
+        logger.info(f"Text analysis results: department={result.department_id}, priority={result.priority_score}")
         
         # Create analysis record
         analysis_record = {
             "_id": str(ObjectId()),
             "complaint_id": complaint["_id"],
-            "department_id": department_id,
-            "priority_score": priority_score,
-            "analysis_text": analysis_text,
-            "officer_recommendation": officer_recommendation,
-            "version": "llama-3.3-70b-versatile",
+            "department_id": result.department_id,
+            "priority_score": result.priority_score,
+            "analysis_text": result.analysis_text,
+            "officer_recommendation": result.officer_recommendation,
+            "version": version,
             "created_at": datetime.utcnow()
         }
         
-        logger.info(f"Created analysis record: {analysis_record}")
+        log_payload(logger, "Created analysis record", analysis_record)
         
         # Store analysis in database
         try:
-            await request.app.mongodb["ai_analyses"].insert_one(analysis_record)
+            await db["ai_analyses"].insert_one(analysis_record)
             logger.info("Successfully stored analysis in database")
         except Exception as db_error:
             logger.error(f"Error storing analysis in database: {str(db_error)}")
@@ -73,6 +86,197 @@ async def analyze_complaint(request: Request, complaint: dict) -> dict:
         logger.error(f"Error in analyze_complaint: {str(e)}")
         raise
 
+async def process_complaint_analysis(db, complaint_id: str) -> None:
+    """
+    Queue job handler: analyze a stored complaint, assign an officer and
+    write the results back. Raises so the queue can retry the job.
+    """
+    complaint = await db["complaints"].find_one({"_id": complaint_id})
+    if not complaint:
+        logger.warning(f"Skipping analysis for missing complaint {complaint_id}")
+        return
+    
+    # A near-duplicate takes over its incident's analysis. The job runs after
+    # the complaint was inserted, so an incident still pending will find it
+    # in share_incident_analysis; a failed or deferred one falls through.
+    if complaint.get("incident_id") and complaint.get("analysis_status") == AnalysisStatus.PENDING_ANALYSIS:
+        incident = await db["complaints"].find_one({"_id": complaint["incident_id"]})
+        incident_status = (incident or {}).get("analysis_status")
+        if incident_status == AnalysisStatus.COMPLETED:
+            await share_incident_analysis(db, incident["_id"], incident)
+            return
+        if incident_status == AnalysisStatus.PENDING_ANALYSIS:
+            logger.info(f"Complaint {complaint_id} waits for the analysis of incident {complaint['incident_id']}")
+            return
+    
+    analysis = await analyze_complaint(db, complaint)
+    
+    # Get department ID from analysis
+    department_id = analysis.get("department_id")
+    
+    update_data = {
+        "department_id": department_id,
+        "last_updated": datetime.utcnow(),
+        "analysis_status": AnalysisStatus.COMPLETED,
+        "ai_analysis": analysis
+    }
+    
+    # Claim an officer with spare capacity, unless a previous attempt already did
+    officer = None
+    if not complaint.get("assigned_to"):
+        officer = await claim_officer(db, department_id, complaint)
+        if officer:
+            update_data["assigned_to"] = officer["_id"]
+    
+    # Update complaint with department, officer assignment, and AI analysis
+    try:
+        before = await db["complaints"].find_one_and_update(
+            {"_id": complaint_id},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+    except Exception:
+        if officer:
+            await release_officer(db, officer["_id"], complaint_id)
+        raise
+    if before:
+        await apply_rollup_change(db, before, {**before, **update_data})
+        publish_complaint_event("analysis_completed", {**before, **update_data})
+    
+    # Near-duplicates waiting on this incident share its analysis
+    await share_incident_analysis(db, complaint_id, {**complaint, **update_data})
+    logger.info(f"AI analysis completed for complaint {complaint_id}")
+
+def incident_fields(incident: dict) -> dict:
+    """
+    Analysis a near-duplicate complaint takes over from its incident. The
+    officer is not copied: only the incident holds a claim on their
+    capacity, and workload reconciliation counts every assigned complaint.
+    Officers still see duplicates through their department.
+    """
+    return {
+        "department_id": incident.get("department_id"),
+        "ai_analysis": incident.get("ai_analysis"),
+        "analysis_status": AnalysisStatus.COMPLETED,
+        "last_updated": datetime.utcnow()
+    }
+
+async def share_incident_analysis(db, incident_id: str, incident: dict) -> None:
+    """Complete the analysis of complaints that were waiting on their incident"""
+    members = await db["complaints"].find({
+        "incident_id": incident_id,
+        "analysis_status": AnalysisStatus.PENDING_ANALYSIS
+    }).to_list(None)
+    for member in members:
+        shared = incident_fields(incident)
+        result = await db["complaints"].update_one(
+            {"_id": member["_id"], "analysis_status": AnalysisStatus.PENDING_ANALYSIS},
+            {"$set": shared}
+        )
+        if result.modified_count:
+            await apply_rollup_change(db, member, {**member, **shared})
+            publish_complaint_event("analysis_completed", {**member, **shared})
+    if members:
+        logger.info(f"Shared analysis of incident {incident_id} with {len(members)} complaint(s)")
+
+async def store_error_analysis(db, complaint_id: str, analysis_text: str, analysis_status: AnalysisStatus) -> None:
+    """Put the complaint into the ERROR analysis state"""
+    error_analysis = {
+        "_id": str(ObjectId()),
+        "complaint_id": complaint_id,
+        "department_id": "ERROR",
+        "category_prediction": "error",
+        "priority_score": 0,
+        "analysis_text": analysis_text,
+        "officer_recommendation": "Unable to generate recommendation due to error.",
+        "version": "error",
+        "created_at": datetime.utcnow()
+    }
+    
+    complaint = await db["complaints"].find_one_and_update(
+        {"_id": complaint_id},
+        {"$set": {
+            "ai_analysis": error_analysis,
+            "analysis_status": analysis_status,
+            "last_updated": datetime.utcnow()
+        }},
+        projection={field: 1 for field in ("citizen_id", "department_id", "status", "analysis_status", "last_updated")},
+        return_document=ReturnDocument.AFTER
+    )
+    if complaint:
+        publish_complaint_event("analysis_updated", complaint)
+
+async def mark_analysis_failed(db, complaint_id: str, error: str, attempts: int) -> None:
+    """Dead-letter handler: store the error analysis state on the complaint"""
+    await store_error_analysis(
+        db,
+        complaint_id,
+        f"Error during AI analysis after {attempts} attempts. Please try again later.",
+        AnalysisStatus.FAILED
+    )
+    logger.error(f"All AI analysis attempts failed for complaint {complaint_id}: {error}")
+    
+    # Complaints waiting on this incident are analyzed on their own instead
+    async for member in db["complaints"].find(
+        {"incident_id": complaint_id, "analysis_status": AnalysisStatus.PENDING_ANALYSIS},
+        {"_id": 1}
+    ):
+        await enqueue_analysis(db, member["_id"])
+
+async def mark_analysis_deferred(db, complaint_id: str, error: str) -> None:
+    """Deferral handler: fail fast into the error state until the job is re-analyzed"""
+    await store_error_analysis(
+        db,
+        complaint_id,
+        "AI analysis is temporarily unavailable. It will be retried automatically.",
+        AnalysisStatus.DEFERRED
+    )
+
+def new_complaint_document(complaint: ComplaintCreate) -> dict:
+    """A validated complaint with the fields every new complaint starts with"""
+    complaint_dict = complaint.dict()
+    complaint_dict["_id"] = str(ObjectId())
+    complaint_dict["created_at"] = datetime.utcnow()
+    complaint_dict["last_updated"] = complaint_dict["created_at"]
+    complaint_dict["status"] = ComplaintStatus.PENDING
+    complaint_dict["analysis_status"] = AnalysisStatus.PENDING_ANALYSIS
+    return complaint_dict
+
+async def link_incident(db, complaint_dict: dict, unsaved: Optional[dict] = None) -> bool:
+    """
+    Link a new complaint to the incident it near-duplicates and add it to
+    the duplicate index. It takes over a completed incident analysis;
+    otherwise it gets a job of its own, which waits for a pending incident
+    (see process_complaint_analysis). unsaved maps ids to complaints of the
+    same batch that are not inserted yet.
+
+    Returns:
+        Whether the complaint needs an analysis job
+    """
+    # Lookup and insertion into the index happen without an await in between,
+    # so a burst of identical reports cannot open several incidents in this process.
+    match = duplicate_index.find(complaint_dict) if DEDUP_ENABLED else None
+    if match:
+        complaint_dict["incident_id"] = match[0]
+    if DEDUP_ENABLED:
+        duplicate_index.add(complaint_dict, complaint_dict.get("incident_id"))
+        if not match:
+            # Complaints created by the other worker processes
+            match = await duplicate_index.find_stored(db, complaint_dict)
+            if match:
+                complaint_dict["incident_id"] = match[0]
+                duplicate_index.remove(complaint_dict["_id"])
+                duplicate_index.add(complaint_dict, match[0])
+    if not match:
+        return True
+    logger.info(f"Complaint {complaint_dict['_id']} joins incident {match[0]} (similarity {match[1]:.2f})")
+    
+    incident = (unsaved or {}).get(match[0]) or await db["complaints"].find_one({"_id": match[0]})
+    if (incident or {}).get("analysis_status") == AnalysisStatus.COMPLETED:
+        complaint_dict.update(incident_fields(incident))
+        return False
+    return True
+
 @router.post("/", response_model=Complaint)
 async def create_complaint(
     request: Request,
@@ -80,111 +284,33 @@ async def create_complaint(
 ):
     try:
         # Convert complaint to dict and add required fields
-        complaint_dict = complaint.dict()
-        complaint_dict["_id"] = str(ObjectId())
-        complaint_dict["created_at"] = datetime.utcnow()
-        complaint_dict["last_updated"] = complaint_dict["created_at"]
-        complaint_dict["status"] = ComplaintStatus.PENDING
-        # Log the complaint data for debugging
-        logger.info(f"Creating complaint with data: {complaint_dict}")
-        # Insert complaint first
-        await request.app.mongodb["complaints"].insert_one(complaint_dict)
+        complaint_dict = new_complaint_document(complaint)
+        # Log the complaint data for debugging (sampled, DEBUG only)
+        logger.info(f"Creating complaint {complaint_dict['_id']}")
+        log_payload(logger, "Complaint payload", complaint_dict)
         
-        # Trigger AI analysis with retries
-        max_retries = 3
-        retry_delay = 2  # seconds
-        analysis = None
-        last_error = None
+        # Link near-duplicates to the incident they report, reusing its analysis
+        needs_analysis = await link_incident(request.app.mongodb, complaint_dict)
         
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"Starting AI analysis attempt {attempt + 1} for complaint: {complaint_dict['_id']}")
-                analysis = await analyze_complaint(request, complaint_dict)
-                if analysis:
-                    logger.info(f"AI Analysis completed on attempt {attempt + 1}: {analysis}")
-                    break
-            except Exception as e:
-                last_error = e
-                logger.error(f"Error in AI analysis attempt {attempt + 1}: {str(e)}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
-                continue
-        
-        if analysis:
-            # Get department ID from analysis
-            department_id = analysis.get("department_id")
-            
-            # Find available officer from the department
-            officer = await request.app.mongodb["users"].find_one({
-                "role": "officer",
-                "department_id": department_id,
-                "$expr": {
-                    "$lt": [
-                        {"$size": {"$ifNull": ["$active_complaints", []]}},
-                        5  # Maximum of 5 active complaints per officer
-                    ]
-                }
-            }, sort=[("active_complaints", 1)])
-            
-            update_data = {
-                "department_id": department_id,
-                "last_updated": datetime.utcnow(),
-                "ai_analysis": analysis
-            }
-            
-            if officer:
-                update_data["assigned_to"] = officer["_id"]
-                # Update officer's active complaints
-                await request.app.mongodb["users"].update_one(
-                    {"_id": officer["_id"]},
-                    {
-                        "$push": {"active_complaints": complaint_dict["_id"]},
-                        "$set": {"last_updated": datetime.utcnow()}
-                    }
-                )
-            
-            # Update complaint with department, officer assignment, and AI analysis
-            await request.app.mongodb["complaints"].update_one(
-                {"_id": complaint_dict["_id"]},
-                {"$set": update_data}
-            )
-        else:
-            # If all retries failed, update with error state
-            error_analysis = {
-                "_id": str(ObjectId()),
-                "complaint_id": complaint_dict["_id"],
-                "department_id": "ERROR",
-                "category_prediction": "error",
-                "priority_score": 0,
-                "analysis_text": f"Error during AI analysis after {max_retries} attempts. Please try again later.",
-                "officer_recommendation": "Unable to generate recommendation due to error.",
-                "version": "error",
-                "created_at": datetime.utcnow()
-            }
-            
-            await request.app.mongodb["complaints"].update_one(
-                {"_id": complaint_dict["_id"]},
-                {"$set": {
-                    "ai_analysis": error_analysis,
-                    "last_updated": datetime.utcnow()
-                }}
-            )
+        # Insert complaint, then queue AI analysis for the worker pool
+        try:
+            await request.app.mongodb["complaints"].insert_one(complaint_dict)
+        except Exception:
+            duplicate_index.remove(complaint_dict["_id"])
+            raise
+        if needs_analysis:
+            await enqueue_analysis(request.app.mongodb, complaint_dict["_id"])
             
-            if last_error:
-                logger.error(f"All AI analysis attempts failed for complaint {complaint_dict['_id']}: {str(last_error)}")
-        
-        # Get updated complaint to return
-        updated_complaint = await request.app.mongodb["complaints"].find_one(
-            {"_id": complaint_dict["_id"]}
-        )
-        if not updated_complaint:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Complaint not found after creation"
-            )
+            workers = getattr(request.app, "analysis_workers", None)
+            if workers:
+                workers.notify()
+        # Best-effort from here: the complaint and its job are saved
+        if DEDUP_ENABLED:
+            await duplicate_index.store(request.app.mongodb, [complaint_dict["_id"]])
+        await apply_rollup_change(request.app.mongodb, None, complaint_dict)
+        publish_complaint_event("complaint_created", complaint_dict)
         
-        logger.info(f"Returning updated complaint with analysis: {updated_complaint}")
-        return updated_complaint
+        return complaint_dict
             
     except Exception as e:
         logger.error(f"Error creating complaint: {str(e)}")
@@ -193,46 +319,372 @@ async def create_complaint(
             detail=f"Error creating complaint: {str(e)}"
         )
 
-@router.get("/", response_model=List[Complaint])
+# Lean projection for complaint lists; raw LLM output is only sent with fields=full
+COMPLAINT_SUMMARY_FIELDS = [
+    "title", "description", "district", "location", "image_url", "citizen_id",
+    "status", "department_id", "assigned_to", "created_at", "last_updated",
+    "resolution_eta", "analysis_status", "ai_analysis.department_id", "ai_analysis.priority_score"
+]
+
+# Paths fields= may select; nested documents can be selected whole or by subfield
+PROJECTABLE_FIELDS = (
+    {field.alias or name for name, field in Complaint.model_fields.items()}
+    | {f"ai_analysis.{field.alias or name}" for name, field in AIAnalysis.model_fields.items()}
+    | {f"image_analysis.{name}" for name in (
+        "phash", "width", "height", "taken_at", "gps", "thumbnail_url", "duplicate_of", "processed_at"
+    )}
+)
+
+class InvalidFieldsError(ValueError):
+    """Raised when fields= names a path complaints cannot be projected on"""
+
+def complaint_projection(fields: Optional[str]) -> Optional[dict]:
+    """
+    Projection for the fields= option: summary by default, "full", or a
+    comma-separated list of PROJECTABLE_FIELDS. A subfield is dropped when
+    its parent is listed too, since MongoDB rejects colliding paths.
+    """
+    if fields == "full":
+        return None
+    names = {f.strip() for f in fields.split(",") if f.strip()} if fields else set(COMPLAINT_SUMMARY_FIELDS)
+    unknown = names - PROJECTABLE_FIELDS
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    # Keyset pagination needs the sort keys
+    names.add("created_at")
+    return {name: 1 for name in sorted(names) if name.split(".")[0] == name or name.split(".")[0] not in names}
+
+async def scoped_complaint_query(
+    request: Request,
+    current_user,
+    status: Optional[ComplaintStatus] = None,
+    department_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+) -> dict:
+    """Build a complaints query from the filters, restricted to what the user may see"""
+    query = {}
+    
+    # Filter by status if provided
+    if status:
+        query["status"] = status
+        
+    # Filter by department if provided
+    if department_id:
+        query["department_id"] = department_id
+    
+    # Filter by creation date range if provided
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lt"] = created_to
+        
+    # If user is citizen, only show their complaints
+    if current_user.role == UserRole.CITIZEN:
+        query["citizen_id"] = current_user.email
+    
+    # If user is officer, only show complaints from their department
+    elif current_user.role == UserRole.OFFICER:
+        officer = await request.app.mongodb["users"].find_one({"email": current_user.email})
+        if officer and officer.get("department_id"):
+            query["department_id"] = officer["department_id"]
+    
+    return query
+
+@router.get("/", response_model=ComplaintPage, response_model_exclude_unset=True)
 async def get_complaints(
     request: Request,
     status: Optional[ComplaintStatus] = None,
     department_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
+    """
+    List complaints newest first, one page at a time.
+
+    Pass the returned next cursor back as cursor= to get the following page.
+    """
     try:
-        query = {}
+        query = await scoped_complaint_query(request, current_user, status, department_id)
         
-        # Filter by status if provided
-        if status:
-            query["status"] = status
-            
-        # Filter by department if provided
-        if department_id:
-            query["department_id"] = department_id
-            
-        # If user is citizen, only show their complaints
-        if current_user.role == UserRole.CITIZEN:
-            query["citizen_id"] = current_user.email
+        try:
+            query = keyset_query(query, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        try:
+            projection = complaint_projection(fields)
+        except InvalidFieldsError as e:
+            raise HTTPException(status_code=422, detail=str(e))
         
-        # If user is officer, only show complaints from their department
-        elif current_user.role == UserRole.OFFICER:
-            officer = await request.app.mongodb["users"].find_one({"email": current_user.email})
-            if officer and officer.get("department_id"):
-                query["department_id"] = officer["department_id"]
+        # Fetch one extra document to learn whether another page exists
+        complaints = await request.app.mongodb["complaints"].find(
+            query, projection
+        ).sort(KEYSET_SORT).limit(limit + 1).to_list(limit + 1)
+        
+        next_cursor = None
+        if len(complaints) > limit:
+            complaints = complaints[:limit]
+            next_cursor = encode_cursor(complaints[-1])
         
-        complaints = await request.app.mongodb["complaints"].find(query).to_list(1000)
         for c in complaints:
-            if 'district' not in c or not c['district']:
-                c['district'] = c.get('location', 'Unknown')
-        return complaints
+            if 'location' in c and not c.get('district'):
+                c['district'] = c['location']
+        return fast_response({"items": complaints, "next": next_cursor})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching complaints: {str(e)}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=500,
             detail=f"Error fetching complaints: {str(e)}"
         )
 
+# Columns of the CSV export; nested ai_analysis fields use dotted names
+EXPORT_CSV_FIELDS = [
+    "_id", "title", "description", "district", "location", "citizen_id", "status",
+    "department_id", "assigned_to", "created_at", "last_updated", "resolution_eta",
+    "analysis_status", "ai_analysis.priority_score", "ai_analysis.officer_recommendation"
+]
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+async def _export_ndjson(cursor):
+    async for doc in cursor:
+        yield json.dumps(doc, default=_export_value) + "\n"
+
+async def _export_csv(cursor):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_FIELDS)
+    async for doc in cursor:
+        row = []
+        for field in EXPORT_CSV_FIELDS:
+            value = doc
+            for part in field.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            row.append("" if value is None else _export_value(value))
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+@router.get("/export")
+async def export_complaints(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[ComplaintStatus] = None,
+    department_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream every matching complaint as NDJSON or CSV.
+
+    Documents are read in batches of EXPORT_BATCH_SIZE and written as they
+    arrive, so memory use does not grow with the number of matches.
+    """
+    query = await scoped_complaint_query(
+        request, current_user, status, department_id, created_from, created_to
+    )
+    projection = None
+    if format == "csv":
+        projection = {field: 1 for field in EXPORT_CSV_FIELDS if field != "_id"}
+    # Exports can be large; read them from a secondary when one is available
+    cursor = analytics_db(request)["complaints"].find(query, projection).sort("created_at", 1).batch_size(EXPORT_BATCH_SIZE)
+    
+    filename = f"complaints_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{format}"
+    if format == "csv":
+        body, media_type = _export_csv(cursor), "text/csv"
+    else:
+        body, media_type = _export_ndjson(cursor), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Bulk ingestion settings
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(20 * 1024 * 1024)))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "10000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))  # complaints per insert_many
+
+async def _body_lines(request: Request):
+    """Decode the request body into lines as it arrives"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, received = "", 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > BULK_MAX_BYTES:
+            raise UploadTooLargeError(f"Body exceeds {BULK_MAX_BYTES} bytes")
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def _ndjson_records(lines):
+    """(record, error) per non-empty NDJSON line"""
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield None, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(record, dict):
+            yield None, "Expected a JSON object"
+            continue
+        yield record, None
+
+async def _csv_records(lines):
+    """(record, error) per CSV row after the header; empty cells are left out"""
+    header, pending = None, ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+        row, pending = pending, ""
+        if not row.strip():
+            continue
+        values = next(csv.reader([row]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield {name: value for name, value in zip(header, values) if value != ""}, None
+    if pending:
+        yield None, "Unterminated quoted field"
+
+def _validation_errors(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+async def _insert_chunk(request: Request, chunk: List[tuple]) -> List[dict]:
+    """
+    Insert (row, complaint, needs_analysis) entries in order with
+    insert_many, then count them in the rollups and queue their analyses.
+    A failed write is reported for its row and the rest of the chunk is
+    retried after it.
+    """
+    db = request.app.mongodb
+    results, inserted, pending = [], [], chunk
+    while pending:
+        try:
+            await db["complaints"].insert_many([complaint for _, complaint, _ in pending], ordered=True)
+            inserted.extend(pending)
+            pending = []
+        except BulkWriteError as e:
+            write_error = e.details["writeErrors"][0]
+            failed = write_error["index"]
+            inserted.extend(pending[:failed])
+            row, complaint, _ = pending[failed]
+            duplicate_index.remove(complaint["_id"])
+            results.append({"row": row, "status": "error", "errors": [write_error.get("errmsg", "Write failed")]})
+            pending = pending[failed + 1:]
+        except Exception as e:
+            # Unknown outcome: report the rest of the chunk as failed
+            logger.error(f"Error inserting bulk complaints: {str(e)}")
+            for row, complaint, _ in pending:
+                duplicate_index.remove(complaint["_id"])
+                results.append({"row": row, "status": "error", "errors": [str(e)]})
+            pending = []
+
+    await enqueue_analyses(db, [complaint["_id"] for _, complaint, needs in inserted if needs])
+    if DEDUP_ENABLED:
+        await duplicate_index.store(db, [complaint["_id"] for _, complaint, _ in inserted])
+    await add_to_rollups(db, [complaint for _, complaint, _ in inserted])
+    for row, complaint, _ in inserted:
+        publish_complaint_event("complaint_created", complaint)
+        result = {"row": row, "status": "inserted", "complaint_id": complaint["_id"]}
+        if complaint.get("incident_id"):
+            result["incident_id"] = complaint["incident_id"]
+        results.append(result)
+
+    workers = getattr(request.app, "analysis_workers", None)
+    if workers and inserted:
+        workers.notify()
+    return results
+
+@router.post("/bulk")
+async def bulk_create_complaints(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    current_user: dict = Depends(check_permissions(UserRole.ADMIN))
+):
+    """
+    Create complaints from an NDJSON or CSV body (format defaults from the
+    Content-Type). Rows are validated against ComplaintCreate as they are
+    read and inserted in ordered chunks of BULK_CHUNK_SIZE; analyses are
+    queued, not awaited. Returns counts and a result per row, numbered
+    from 1 after the CSV header.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > BULK_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Body exceeds {BULK_MAX_BYTES} bytes")
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    
+    lines = _body_lines(request)
+    records = _csv_records(lines) if format == "csv" else _ndjson_records(lines)
+    results, chunk, unsaved = [], [], {}
+    received, truncated = 0, False
+    try:
+        async for record, error in records:
+            if received >= BULK_MAX_ROWS:
+                truncated = True
+                break
+            received += 1
+            if error:
+                results.append({"row": received, "status": "invalid", "errors": [error]})
+                continue
+            try:
+                complaint = new_complaint_document(ComplaintCreate(**record))
+            except ValidationError as e:
+                results.append({"row": received, "status": "invalid", "errors": _validation_errors(e)})
+                continue
+            
+            needs_analysis = await link_incident(request.app.mongodb, complaint, unsaved)
+            chunk.append((received, complaint, needs_analysis))
+            unsaved[complaint["_id"]] = complaint
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                results.extend(await _insert_chunk(request, chunk))
+                chunk, unsaved = [], {}
+    except UploadTooLargeError as e:
+        # Rows read so far are still inserted and reported
+        logger.warning(f"Bulk upload stopped: {str(e)}")
+        truncated = True
+    if chunk:
+        results.extend(await _insert_chunk(request, chunk))
+    
+    results.sort(key=lambda result: result["row"])
+    counts = {state: sum(1 for r in results if r["status"] == state) for state in ("inserted", "invalid", "error")}
+    logger.info(f"Bulk upload by {current_user.email}: {received} rows, {counts}")
+    return fast_response({
+        "received": received,
+        "inserted": counts["inserted"],
+        "invalid": counts["invalid"],
+        "failed": counts["error"],
+        "truncated": truncated,
+        "rows": results
+    })
+
 @router.get("/{complaint_id}", response_model=Complaint)
 async def get_complaint(
     complaint_id: str,
@@ -276,20 +728,31 @@ async def update_complaint(
     if resolution_eta:
         update_data["resolution_eta"] = resolution_eta
         
-    result = await request.app.mongodb["complaints"].update_one(
+    before = await request.app.mongodb["complaints"].find_one_and_update(
         {"_id": complaint_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
     )
     
-    if result.modified_count == 0:
+    if not before:
         raise HTTPException(status_code=404, detail="Complaint not found")
-        
-    return await request.app.mongodb["complaints"].find_one({"_id": complaint_id})
+    
+    complaint = {**before, **update_data}
+    await apply_rollup_change(request.app.mongodb, before, complaint)
+    publish_complaint_event(
+        "status_changed" if status and status != before.get("status") else "complaint_updated", complaint
+    )
+    
+    # Free the officer's capacity once the complaint is resolved
+    if status == ComplaintStatus.RESOLVED and before.get("assigned_to"):
+        await release_officer(request.app.mongodb, before["assigned_to"], complaint_id)
+    return complaint
 
-@router.post("/{complaint_id}/image")
+@router.post("/{complaint_id}/image", status_code=status.HTTP_202_ACCEPTED)
 async def upload_complaint_image(
     complaint_id: str,
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: dict = Depends(check_permissions(UserRole.CITIZEN))
 ):
@@ -300,23 +763,30 @@ async def upload_complaint_image(
     if complaint["citizen_id"] != current_user.email:
         raise HTTPException(status_code=403, detail="Not authorized to update this complaint")
     
-    # Upload to Cloudinary
-    try:
-        contents = await file.read()
-        upload_result = cloudinary.uploader.upload(
-            contents,
-            folder="complaints",
-            public_id=f"{complaint_id}_{datetime.utcnow().timestamp()}",
-            resource_type="auto"
+    # Only images are stored; anything else (HTML, SVG) could run scripts when served
+    if not is_image_upload(file.filename, file.content_type):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Upload a {', '.join(sorted(e[1:] for e in IMAGE_EXTENSIONS))} image"
         )
+    
+    # Stream the upload to the storage backend in chunks; UploadLimitMiddleware
+    # has already capped the request body while it was received
+    try:
+        extension = os.path.splitext(file.filename)[1].lower()
+        # The stem carries no dot of its own, so only the extension is ever stripped from it
+        key = f"{complaint_id}_{int(datetime.utcnow().timestamp() * 1_000_000)}{extension}"
+        storage = get_storage()
+        # The original keeps its EXIF, GPS location included, so it is stored
+        # privately; image_url is only set to the stripped display rendition
+        await storage.save(key, read_chunks(file.file), file.content_type, private=True)
         
-        # Update complaint with image URL
-        await request.app.mongodb["complaints"].update_one(
-            {"_id": complaint_id},
-            {"$set": {"image_url": upload_result["secure_url"]}}
-        )
+        # Display rendition, thumbnail, EXIF and duplicate detection run after the response is sent
+        background_tasks.add_task(process_complaint_image, request.app.mongodb, storage, complaint_id, key)
         
-        return {"image_url": upload_result["secure_url"]}
+        return {"status": "processing"}
         
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail=f"Image exceeds the {UPLOAD_MAX_BYTES} byte limit")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading image: {str(e)}") 
\ No newline at end of file
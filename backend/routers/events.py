@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, Request, HTTPException, status
+from fastapi.responses import StreamingResponse
+from models.models import UserRole, TokenData
+from utils.auth import get_current_user, get_stream_user, check_permissions, create_stream_ticket, STREAM_TICKET_EXPIRE_SECONDS
+from utils.events import EventBus, event_bus, ADMIN_TOPIC, citizen_topic, department_topic
+from utils.responses import orjson_default, ORJSON_OPTIONS
+from typing import List
+import os
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Stream settings
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))  # keeps proxies from closing idle streams
+EVENTS_CLIENT_RETRY_MS = int(os.getenv("EVENTS_CLIENT_RETRY_MS", "3000"))  # EventSource reconnect delay
+
+async def user_topics(request: Request, current_user: TokenData) -> List[str]:
+    """Citizens follow their own complaints, officers their department, admins everything"""
+    if current_user.role == UserRole.ADMIN:
+        return [ADMIN_TOPIC]
+    if current_user.role == UserRole.OFFICER:
+        officer = await request.app.mongodb["users"].find_one({"email": current_user.email}, {"department_id": 1})
+        if not officer or not officer.get("department_id"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Officer has no department")
+        return [department_topic(officer["department_id"])]
+    return [citizen_topic(current_user.email)]
+
+def format_event(event: dict) -> str:
+    data = orjson.dumps(event, default=orjson_default, option=ORJSON_OPTIONS).decode()
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+async def event_stream(request: Request, topics: List[str], bus: EventBus = event_bus):
+    """
+    The stream body. It subscribes only once the response starts, so a
+    client that disconnects earlier never holds a subscriber slot.
+    """
+    try:
+        subscription = bus.subscribe(topics)
+    except RuntimeError as e:
+        # Filled up since stream_events checked; the client reconnects after the retry delay
+        logger.warning(f"Event stream refused: {str(e)}")
+        yield f"retry: {EVENTS_CLIENT_RETRY_MS}\n\n"
+        return
+    try:
+        yield f"retry: {EVENTS_CLIENT_RETRY_MS}\n\n"
+        while not await request.is_disconnected():
+            event = await subscription.get(EVENTS_HEARTBEAT_SECONDS)
+            yield ": keep-alive\n\n" if event is None else format_event(event)
+    finally:
+        subscription.close()
+
+@router.post("/ticket")
+async def get_stream_ticket(
+    current_user: TokenData = Depends(get_current_user)
+):
+    """A short-lived ticket for opening the stream as /stream?ticket=..."""
+    return {"ticket": create_stream_ticket(current_user), "expires_in": STREAM_TICKET_EXPIRE_SECONDS}
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: TokenData = Depends(get_stream_user)
+):
+    """
+    Server-Sent Events for complaint changes the user can see: creation,
+    analysis results and status changes. Each event carries the complaint
+    id and its status fields; clients fetch the complaint for details.
+    """
+    topics = await user_topics(request, current_user)
+    if event_bus.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many event subscribers", headers={"Retry-After": "30"}
+        )
+    return StreamingResponse(
+        event_stream(request, topics, event_bus),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+async def get_event_stats(
+    current_user: dict = Depends(check_permissions(UserRole.ADMIN))
+):
+    """Subscriber and delivery counters for the event bus of this worker"""
+    return event_bus.stats()
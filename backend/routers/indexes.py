@@ -0,0 +1,95 @@
+"""
+Declarative index registry.
+
+Every index the API relies on is declared here next to the routers that
+issue the queries, together with the hot queries whose plans must use an
+index. utils.db_setup reconciles the database against this registry at
+startup or from the command line.
+
+Indexes that earlier versions created keep their MongoDB-generated names
+(e.g. email_1), so existing deployments find them unchanged instead of
+dropping and rebuilding them.
+"""
+from datetime import datetime
+from utils.analysis_queue import ANALYSIS_JOB_RETENTION_SECONDS
+from utils.dedup import DEDUP_WINDOW_DAYS
+
+# Indexes per collection: name -> (keys, options)
+INDEXES = {
+    "complaints": {
+        # get_complaints for citizens, citizen-stats $match and sort
+        "citizen_created": ([("citizen_id", 1), ("created_at", -1), ("_id", -1)], {}),
+        # get_complaints for officers and department filters
+        "department_created": ([("department_id", 1), ("created_at", -1), ("_id", -1)], {}),
+        # get_complaints for admins (keyset order without filters)
+        "created": ([("created_at", -1), ("_id", -1)], {}),
+        # photo duplicate scans per district
+        "district_created": ([("district", 1), ("created_at", -1)], {}),
+        # near-duplicates waiting on an incident's analysis
+        "incident": ([("incident_id", 1)], {"sparse": True}),
+        # status filters
+        "status_1_created_at_-1": ([("status", 1), ("created_at", -1)], {}),
+        # officer workload views
+        "assigned_to_1_status_1": ([("assigned_to", 1), ("status", 1)], {}),
+        "ai_analysis.priority_score_-1": ([("ai_analysis.priority_score", -1)], {}),
+    },
+    "users": {
+        "email_1": ([("email", 1)], {"unique": True}),
+        # officer assignment claims (utils.assignment)
+        "role_department_load": ([("role", 1), ("department_id", 1), ("active_count", 1)], {}),
+    },
+    "ai_analyses": {
+        # $lookup key and training-data joins
+        "complaint": ([("complaint_id", 1)], {}),
+    },
+    "analysis_jobs": {
+        "claim_queued": ([("status", 1), ("available_at", 1)], {}),
+        "claim_expired": ([("status", 1), ("lease_expires_at", 1)], {}),
+        "complaint": ([("complaint_id", 1)], {}),
+        # done jobs are purged after the retention period; other states have no completed_at
+        "completed_ttl": ([("completed_at", 1)], {"expireAfterSeconds": ANALYSIS_JOB_RETENTION_SECONDS}),
+    },
+    "analysis_cache": {
+        "expires_ttl": ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+    },
+    "dedup_signatures": {
+        # near-duplicate lookups across worker processes (utils.dedup.find_stored)
+        "district_bands": ([("district", 1), ("bands", 1)], {}),
+        "created_ttl": ([("created_at", 1)], {"expireAfterSeconds": DEDUP_WINDOW_DAYS * 24 * 3600}),
+    },
+}
+
+# Indexes created by earlier versions of utils/db_setup.py that must be dropped
+OBSOLETE_INDEXES = {
+    # users have no username field, so the unique index rejected every registration after the first
+    "users": ["username_1"],
+}
+
+# Hot queries whose winning plan must not be a COLLSCAN: name -> (collection, filter, sort)
+HOT_QUERIES = {
+    "complaints by citizen": (
+        "complaints", {"citizen_id": "citizen@example.com"}, [("created_at", -1), ("_id", -1)]
+    ),
+    "complaints by department": (
+        "complaints", {"department_id": "PHE_001"}, [("created_at", -1), ("_id", -1)]
+    ),
+    "complaints newest first": (
+        "complaints", {}, [("created_at", -1), ("_id", -1)]
+    ),
+    "complaints by status": (
+        "complaints", {"status": "pending"}, [("created_at", -1)]
+    ),
+    "user by email": (
+        "users", {"email": "citizen@example.com"}, None
+    ),
+    "officer with capacity": (
+        "users", {"role": "officer", "department_id": "PHE_001", "active_count": {"$not": {"$gte": 5}}},
+        [("active_count", 1), ("last_assigned_at", 1)]
+    ),
+    "analyses by complaint": (
+        "ai_analyses", {"complaint_id": "complaint-id"}, None
+    ),
+    "claim queued job": (
+        "analysis_jobs", {"status": "queued", "available_at": {"$lte": datetime(2030, 1, 1)}}, [("available_at", 1)]
+    ),
+}
@@ -1,11 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from models.models import User, UserRole
+from models.models import User, UserListItem, UserRole
+from utils.responses import fast_response
 from utils.auth import get_current_user, check_permissions
 from typing import List
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -31,15 +30,17 @@ async def get_current_user_info(
             detail="Error retrieving user information"
         )
 
-@router.get("/", response_model=List[User])
+@router.get("/", response_model=List[UserListItem], response_model_exclude_unset=True)
 async def get_users(
     request: Request,
     current_user = Depends(check_permissions(UserRole.ADMIN))
 ):
     """Get all users (admin only)"""
     try:
-        users = await request.app.mongodb["users"].find().to_list(1000)
-        return users
+        users = await request.app.mongodb["users"].find(
+            {}, {"hashed_password": 0}
+        ).to_list(1000)
+        return fast_response(users)
     except Exception as e:
         logger.error(f"Error getting users: {str(e)}")
         raise HTTPException(
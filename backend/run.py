@@ -1,27 +1,106 @@
-import asyncio
+import os
+import argparse
+import importlib.util
 import uvicorn
-from uvicorn.config import Config
-from uvicorn.server import Server
-
-async def main():
-    config = Config(
-        app="main:app",
-        host="127.0.0.1",
-        port=8000,
-        reload=True,
-        reload_dirs=["backend"]
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server settings
+HOST = os.getenv("HOST", "127.0.0.1")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # worker processes; more need a replica set (change stream events)
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "75"))  # seconds; above the load balancer's idle timeout
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))  # seconds to drain requests on SIGTERM
+LIMIT_MAX_REQUESTS = int(os.getenv("LIMIT_MAX_REQUESTS", "0"))  # recycle a worker after this many requests; 0 = never
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+ACCESS_LOG = os.getenv("ACCESS_LOG", "false").lower() == "true"  # per-request latency is in /metrics
+RELOAD = os.getenv("RELOAD", "false").lower() == "true"
+
+# Connection budgets for the whole host, split evenly across worker processes
+MONGODB_TOTAL_POOL_SIZE = int(os.getenv("MONGODB_TOTAL_POOL_SIZE", "100"))
+LLM_TOTAL_CONNECTIONS = int(os.getenv("LLM_TOTAL_CONNECTIONS", "20"))
+LLM_TOTAL_CONCURRENCY = int(os.getenv("LLM_TOTAL_CONCURRENCY", "8"))
+ANALYSIS_TOTAL_WORKERS = int(os.getenv("ANALYSIS_TOTAL_WORKERS", "8"))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def event_loop_settings() -> dict:
+    """uvloop and httptools when installed (uvicorn[standard]), the pure-Python stack otherwise"""
+    return {
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11"
+    }
+
+
+def size_pools_per_worker(workers: int) -> dict:
+    """
+    Split the host-wide connection and analysis worker budgets across worker processes.
+
+    Each worker opens its own MongoDB pool and LLM connection pool, so
+    without this N workers hold N times the connections. Values already set
+    in the environment win; workers inherit the environment on start.
+    """
+    sizes = {
+        "MONGODB_MAX_POOL_SIZE": max(1, MONGODB_TOTAL_POOL_SIZE // workers),
+        "LLM_MAX_CONNECTIONS": max(1, LLM_TOTAL_CONNECTIONS // workers),
+        "LLM_MAX_KEEPALIVE": max(1, LLM_TOTAL_CONNECTIONS // workers // 2),
+        "LLM_MAX_CONCURRENCY": max(1, LLM_TOTAL_CONCURRENCY // workers),
+        "ANALYSIS_WORKERS": max(1, ANALYSIS_TOTAL_WORKERS // workers)
+    }
+    for name, value in sizes.items():
+        os.environ.setdefault(name, str(value))
+    return {name: int(os.environ[name]) for name in sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Complaint Management System API")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY, help="worker processes")
+    parser.add_argument("--reload", action="store_true", default=RELOAD,
+                        help="development mode: one process restarted on code changes")
+    args = parser.parse_args()
+
+    if args.reload:
+        print(f"Development server with reload on http://{args.host}:{args.port}")
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            reload_dirs=[BACKEND_DIR]
+        )
+        return
+
+    workers = max(1, args.workers)
+    # Workers pick their event source from it (change streams when there are several)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    pools = size_pools_per_worker(workers)
+    loop_settings = event_loop_settings()
+    print(
+        f"Serving on http://{args.host}:{args.port} with {workers} workers "
+        f"({loop_settings['loop']}/{loop_settings['http']}), per-worker pools {pools}"
+    )
+    # uvicorn stops accepting on SIGTERM, drains open requests for up to
+    # GRACEFUL_TIMEOUT seconds, then runs the app's shutdown handlers
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        limit_max_requests=LIMIT_MAX_REQUESTS or None,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        access_log=ACCESS_LOG,
+        **loop_settings
     )
-    server = Server(config=config)
-    
-    # Configure the server manually
-    if not config.loaded:
-        config.load()
-    
-    # Start the server using the low-level API
-    await server.serve()
+
 
 if __name__ == "__main__":
-    # Use asyncio.run with explicit policy for Python 3.12 compatibility
-    if hasattr(asyncio, 'WindowsSelectorEventLoopPolicy'):
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main()) 
\ No newline at end of file
+    main()
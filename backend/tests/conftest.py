@@ -4,6 +4,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import mongomock
 import asyncio
 from main import app
+from tests.fake_db import AsyncMockDatabase
 from datetime import datetime, timedelta
 from jose import jwt
 from typing import Generator
@@ -29,6 +30,29 @@ def mock_db():
     db = client.complaint_system
     return db
 
+@pytest.fixture
+def async_db(mock_db):
+    """Async Motor-compatible view of the mock database"""
+    return AsyncMockDatabase(mock_db)
+
+@pytest.fixture
+def api_app(async_db):
+    """The app wired to the async mock database, restored afterwards"""
+    from utils.dedup import duplicate_index
+    previous = getattr(app, "mongodb", None)
+    app.mongodb = async_db
+    duplicate_index.clear()
+    yield app
+    if previous is None:
+        del app.mongodb
+    else:
+        app.mongodb = previous
+
+def auth_headers(email: str, role: str) -> dict:
+    """Bearer header for a token signed with the app's own key"""
+    from utils.auth import create_access_token
+    return {"Authorization": f"Bearer {create_access_token({'sub': email, 'role': role})}"}
+
 @pytest.fixture
 def event_loop():
     """Create an instance of the default event loop for each test case"""
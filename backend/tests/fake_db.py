@@ -0,0 +1,85 @@
+import asyncio
+import mongomock
+
+
+class AsyncMockCursor:
+    """Motor-style cursor over a mongomock cursor or result list"""
+
+    def __init__(self, cursor, latency: float = 0.0):
+        self._cursor = cursor
+        self._latency = latency
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self._cursor = self._cursor.limit(*args, **kwargs)
+        return self
+
+    def batch_size(self, *args, **kwargs):
+        return self
+
+    async def to_list(self, length=None):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncMockCollection:
+    """
+    Motor-style async wrapper around a mongomock collection.
+
+    latency (seconds) is slept before every operation to stand in for the
+    network round trip to a real server, so concurrent requests interleave
+    on the event loop the way they do against MongoDB.
+    """
+
+    def __init__(self, collection, latency: float = 0.0):
+        self._collection = collection
+        self._latency = latency
+
+    def find(self, *args, **kwargs):
+        return AsyncMockCursor(self._collection.find(*args, **kwargs), self._latency)
+
+    def aggregate(self, pipeline, **kwargs):
+        return AsyncMockCursor(self._collection.aggregate(pipeline, **kwargs), self._latency)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def wrapper(*args, **kwargs):
+            if self._latency:
+                await asyncio.sleep(self._latency)
+            return method(*args, **kwargs)
+        return wrapper
+
+
+class AsyncMockDatabase:
+    """Motor-style async wrapper around a mongomock database"""
+
+    def __init__(self, db, latency: float = 0.0):
+        self._db = db
+        self._latency = latency
+
+    def __getitem__(self, name):
+        return AsyncMockCollection(self._db[name], self._latency)
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def fake_database(name: str = "complaint_system", latency: float = 0.0) -> AsyncMockDatabase:
+    """A fresh in-memory database behind the Motor-style wrappers"""
+    return AsyncMockDatabase(mongomock.MongoClient()[name], latency)
@@ -0,0 +1,100 @@
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = """Department: Public Health Engineering Department
+Priority: 7
+Analysis: Households in the area have had no water supply for several days.
+Officer: Sunita Pradhan – Rural Water Supply Engineer should handle this case because it concerns water supply."""
+
+
+class FakeLLMServer:
+    """
+    Local OpenAI-compatible chat-completions server for tests and benchmarks.
+
+    Latency, error rate and the returned content are configurable, and the
+    server records request counts and peak concurrency.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, content: str = DEFAULT_RESPONSE):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.content = content
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests.append(body)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    if random.random() < fake.error_rate:
+                        self._send(503, {"error": {"message": "fake upstream error"}})
+                        return
+                    content = fake.content(body) if callable(fake.content) else fake.content
+                    self._send(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": {"prompt_tokens": 400, "completion_tokens": 60, "total_tokens": 460}
+                    })
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _send(self, code, payload):
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (e.g. a timeout test)
+                    pass
+
+        return Handler
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from utils.analysis_batcher import AnalysisBatcher
+
+def make_batcher(batch_results=None, batch_error=None, max_size=3, window=0.05):
+    calls = {"batch": [], "single": []}
+
+    async def analyze_batch(complaints):
+        calls["batch"].append([c["id"] for c in complaints])
+        if batch_error:
+            raise batch_error
+        return [batch_results(c) if batch_results else ("PHE_001", 0.5, f"batch {c['id']}") for c in complaints]
+
+    async def analyze_single(complaint):
+        calls["single"].append(complaint["id"])
+        return ("PHE_001", 0.5, f"single {complaint['id']}")
+
+    return AnalysisBatcher(analyze_batch, analyze_single, max_size=max_size, window=window), calls
+
+@pytest.mark.asyncio
+async def test_flushes_full_batch_and_fans_out_results():
+    batcher, calls = make_batcher()
+    results = await asyncio.gather(*(batcher.submit({"id": i}) for i in range(3)))
+    assert calls["batch"] == [[0, 1, 2]]
+    assert [r[2] for r in results] == ["batch 0", "batch 1", "batch 2"]
+
+@pytest.mark.asyncio
+async def test_window_flushes_partial_batch():
+    batcher, calls = make_batcher(max_size=10, window=0.01)
+    results = await asyncio.gather(batcher.submit({"id": 1}), batcher.submit({"id": 2}))
+    assert calls["batch"] == [[1, 2]]
+    assert len(results) == 2
+
+@pytest.mark.asyncio
+async def test_single_item_skips_batch_call():
+    batcher, calls = make_batcher(window=0.01)
+    assert (await batcher.submit({"id": 7}))[2] == "single 7"
+    assert calls["batch"] == []
+
+@pytest.mark.asyncio
+async def test_malformed_items_and_failed_batches_fall_back():
+    """Missing items and failed batch calls are re-analyzed individually"""
+    batcher, calls = make_batcher(batch_results=lambda c: None if c["id"] == 1 else ("PHE_001", 0.5, "ok"))
+    results = await asyncio.gather(*(batcher.submit({"id": i}) for i in range(3)))
+    assert calls["single"] == [1]
+    assert [r[2] for r in results] == ["ok", "single 1", "ok"]
+
+    batcher, calls = make_batcher(batch_error=ValueError("not JSON"))
+    results = await asyncio.gather(*(batcher.submit({"id": i}) for i in range(3)))
+    assert calls["single"] == [0, 1, 2]
+
+@pytest.mark.asyncio
+async def test_transport_errors_reach_callers_without_fallback():
+    """A failed batch call is not multiplied into one call per item"""
+    batcher, calls = make_batcher(batch_error=TimeoutError("provider timed out"))
+    results = await asyncio.gather(*(batcher.submit({"id": i}) for i in range(3)), return_exceptions=True)
+    assert calls["single"] == []
+    assert all(isinstance(r, TimeoutError) for r in results)
@@ -0,0 +1,45 @@
+import pytest
+from utils.analysis_cache import AnalysisCache, complaint_cache_key
+
+COMPLAINT = {
+    "title": "No water supply",
+    "description": "There has been no water in our ward for three days.",
+    "location": "MG Marg",
+    "district": "Gangtok"
+}
+ANALYSIS = {"department_id": "PHE_001", "priority_score": 0.7, "analysis_text": "Department: ..."}
+
+def test_cache_key_ignores_case_whitespace_and_punctuation():
+    """Re-filed copies of a complaint hash to the same key"""
+    duplicate = dict(COMPLAINT, title="  NO water supply!! ", description="There has been no water in our ward  for three days")
+    assert complaint_cache_key(duplicate) == complaint_cache_key(COMPLAINT)
+    assert complaint_cache_key(dict(COMPLAINT, district="Namchi")) != complaint_cache_key(COMPLAINT)
+
+@pytest.mark.asyncio
+async def test_memory_and_persistent_tiers(async_db):
+    """A second worker's cache is served from the shared Mongo tier"""
+    first = AnalysisCache()
+    assert await first.get(async_db, COMPLAINT) is None
+    await first.set(async_db, COMPLAINT, ANALYSIS)
+    assert await first.get(async_db, COMPLAINT) == ANALYSIS
+
+    second = AnalysisCache()
+    assert await second.get(async_db, COMPLAINT) == ANALYSIS
+    assert await second.get(async_db, COMPLAINT) == ANALYSIS
+
+    assert first.stats()["memory_hits"] == 1
+    assert first.stats()["misses"] == 1
+    assert second.stats()["persistent_hits"] == 1
+    assert second.stats()["memory_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl(async_db):
+    """The local tier evicts the least recently used entry and expires old ones"""
+    cache = AnalysisCache(max_size=1)
+    cache._set_local("a", ANALYSIS, 60)
+    cache._set_local("b", ANALYSIS, 60)
+    assert cache._get_local("a") is None
+    assert cache._get_local("b") == ANALYSIS
+
+    cache._set_local("c", ANALYSIS, -1)
+    assert cache._get_local("c") is None
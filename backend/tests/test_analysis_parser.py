@@ -0,0 +1,42 @@
+import pytest
+from utils.analysis_parser import AnalysisParseError, parse_analysis, parse_priority, resolve_department
+
+def test_parses_json_output():
+    result = parse_analysis(
+        '{"department": "Energy & Power Department", "priority": 8, '
+        '"analysis": "Outage affects a hospital.", "officer": "Sonam Sherpa should handle this."}'
+    )
+    assert result.department_id == "ENERGY_001"
+    assert result.priority_score == 0.8
+    assert result.analysis_text == (
+        "Department: Energy & Power Department\nPriority: 8\n"
+        "Analysis: Outage affects a hospital.\nOfficer: Sonam Sherpa should handle this."
+    )
+
+def test_repairs_markdown_line_output():
+    """Bullets, bold keys and '8/10' scores no longer fall back to defaults"""
+    result = parse_analysis(
+        "Here is the analysis:\n"
+        "- **Department:** roads and bridges department\n"
+        "- **Priority:** 9/10\n"
+        "- **Analysis:** A landslide blocked the highway.\n"
+        "- **Officer:** Nima Lepcha – Structural Engineer should handle this case."
+    )
+    assert result.department_id == "ROADS_001"
+    assert result.priority_score == 0.9
+    assert result.analysis == "A landslide blocked the highway."
+    assert result.officer_recommendation.startswith("Nima Lepcha")
+
+def test_json_inside_code_fence():
+    result = parse_analysis('```json\n{"Department": "PHE_001", "Priority": "7 (high)"}\n```')
+    assert result.department_name == "Public Health Engineering Department"
+    assert result.priority_score == 0.7
+
+@pytest.mark.parametrize("value,expected", [(8, 0.8), ("8/10", 0.8), ("0.8", 0.8), ("none", 0.5), ("15", 1.0)])
+def test_parse_priority(value, expected):
+    assert parse_priority(value) == expected
+
+def test_unknown_department_raises():
+    assert resolve_department("Department of Magic") is None
+    with pytest.raises(AnalysisParseError):
+        parse_analysis("Department: Department of Magic\nPriority: 5")
@@ -0,0 +1,143 @@
+import pytest
+import asyncio
+from functools import partial
+from datetime import datetime, timedelta
+from utils.analysis_batcher import AnalysisBatcher
+from utils.analysis_queue import (
+    enqueue_analysis, claim_job, complete_job, renew_lease, fail_job, get_queue_stats, count_jobs,
+    AnalysisWorkerPool, JOB_DONE, JOB_DEAD, JOB_LEASED, JOB_QUEUED, QUEUE_COLLECTION
+)
+
+@pytest.mark.asyncio
+async def test_claim_leases_job_once(async_db):
+    """A queued job can only be leased by one worker at a time"""
+    await enqueue_analysis(async_db, "c1")
+
+    job = await claim_job(async_db, "worker-a")
+    assert job["status"] == JOB_LEASED
+    assert job["attempts"] == 1
+    assert await claim_job(async_db, "worker-b") is None
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(async_db):
+    """A job whose lease expired is picked up by another worker"""
+    await enqueue_analysis(async_db, "c1")
+    await claim_job(async_db, "worker-a", lease_seconds=-1)
+
+    job = await claim_job(async_db, "worker-b")
+    assert job["lease_owner"] == "worker-b"
+    assert job["attempts"] == 2
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_dead_lettered(async_db):
+    """Failures back off and the last allowed failure dead-letters the job"""
+    await enqueue_analysis(async_db, "c1", max_attempts=2)
+
+    job = await claim_job(async_db, "w")
+    assert await fail_job(async_db, job, "boom") is False
+    stored = await async_db[QUEUE_COLLECTION].find_one({"_id": job["_id"]})
+    assert stored["status"] == JOB_QUEUED
+    assert stored["available_at"] > datetime.utcnow()
+
+    await async_db[QUEUE_COLLECTION].update_one(
+        {"_id": job["_id"]}, {"$set": {"available_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    job = await claim_job(async_db, "w")
+    assert await fail_job(async_db, job, "boom again") is True
+
+    stats = await get_queue_stats(async_db)
+    assert stats["counts"][JOB_DEAD] == 1
+    assert stats["retries"] == 1
+    assert stats["dead_letters"][0]["last_error"] == "boom again"
+
+@pytest.mark.asyncio
+async def test_worker_runs_handler_and_dead_letter_callback(async_db):
+    """Workers complete successful jobs and report dead letters"""
+    dead = []
+
+    async def handler(db, complaint_id):
+        if complaint_id == "bad":
+            raise RuntimeError("analysis failed")
+
+    async def on_dead_letter(db, complaint_id, error, attempts):
+        dead.append((complaint_id, error, attempts))
+
+    await enqueue_analysis(async_db, "good")
+    await enqueue_analysis(async_db, "bad", max_attempts=1)
+    pool = AnalysisWorkerPool(async_db, handler, on_dead_letter, concurrency=0, claim_size=1)
+
+    assert await pool.run_once("w")
+    assert await pool.run_once("w")
+    assert not await pool.run_once("w")
+
+    good = await async_db[QUEUE_COLLECTION].find_one({"complaint_id": "good"})
+    assert good["status"] == JOB_DONE
+    assert dead == [("bad", "analysis failed", 1)]
+
+@pytest.mark.asyncio
+async def test_heartbeat_extends_lease_of_slow_handler(async_db, monkeypatch):
+    """A handler running past its lease keeps the job leased to its worker"""
+    async def slow_handler(db, complaint_id):
+        await asyncio.sleep(0.05)
+
+    # every claim starts with an already expired lease
+    monkeypatch.setattr("utils.analysis_queue.claim_job", partial(claim_job, lease_seconds=-1))
+    await enqueue_analysis(async_db, "slow")
+    pool = AnalysisWorkerPool(async_db, slow_handler, concurrency=0, claim_size=1, heartbeat_interval=0.01)
+
+    run = asyncio.create_task(pool.run_once("w"))
+    await asyncio.sleep(0.03)
+    assert await claim_job(async_db, "other") is None
+    assert await run
+
+    stored = await async_db[QUEUE_COLLECTION].find_one({"complaint_id": "slow"})
+    assert stored["status"] == JOB_DONE
+    assert stored["completed_at"] is not None
+
+@pytest.mark.asyncio
+async def test_renew_lease_fails_once_lease_is_lost(async_db):
+    await enqueue_analysis(async_db, "c1")
+    job = await claim_job(async_db, "worker-a", lease_seconds=-1)
+    assert await renew_lease(async_db, job, lease_seconds=-1)
+    await claim_job(async_db, "worker-b", lease_seconds=-1)
+    assert not await renew_lease(async_db, job)
+
+@pytest.mark.asyncio
+async def test_count_jobs_per_state(async_db):
+    await enqueue_analysis(async_db, "c1")
+    await enqueue_analysis(async_db, "c2")
+    job = await claim_job(async_db, "w")
+    await complete_job(async_db, job)
+
+    assert await count_jobs(async_db) == {JOB_QUEUED: 1, JOB_LEASED: 0, JOB_DONE: 1, JOB_DEAD: 0}
+
+@pytest.mark.asyncio
+async def test_claimed_jobs_share_an_llm_batch(async_db):
+    """One worker's claimed jobs reach the batcher together, not one at a time"""
+    batches = []
+
+    async def analyze_batch(complaints):
+        batches.append(len(complaints))
+        return [complaint["_id"] for complaint in complaints]
+
+    async def analyze_single(complaint):
+        batches.append(1)
+        return complaint["_id"]
+
+    batcher = AnalysisBatcher(analyze_batch, analyze_single, max_size=8, window=0.05)
+
+    async def handler(db, complaint_id):
+        await batcher.submit({"_id": complaint_id})
+
+    for i in range(6):
+        await enqueue_analysis(async_db, f"c{i}")
+    pool = AnalysisWorkerPool(async_db, handler, concurrency=1, claim_size=8, poll_interval=0.01)
+    pool.start()
+    try:
+        for _ in range(100):
+            if (await count_jobs(async_db))[JOB_DONE] == 6:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await pool.stop()
+    assert batches == [6]
@@ -0,0 +1,36 @@
+from datetime import datetime
+from fastapi import status
+from tests.conftest import auth_headers
+
+def test_citizen_stats_single_facet(test_client, api_app, mock_db):
+    """Counts and recent complaints come from the embedded analysis"""
+    for i, complaint_status in enumerate(["pending", "in_progress", "resolved", "resolved", "escalated", "pending"]):
+        mock_db.complaints.insert_one({
+            "_id": f"c{i}",
+            "title": f"Complaint {i}",
+            "description": "d",
+            "district": "",
+            "location": "MG Marg",
+            "citizen_id": "a@example.com",
+            "status": complaint_status,
+            "created_at": datetime(2024, 1, i + 1),
+            "ai_analysis": {"_id": "x", "department_id": "PHE_001", "priority_score": 0.6,
+                            "analysis_text": "text", "officer_recommendation": "officer", "version": "v"}
+        })
+    mock_db.complaints.insert_one({"_id": "other", "citizen_id": "b@example.com", "status": "pending",
+                                   "created_at": datetime(2024, 2, 1)})
+
+    response = test_client.get("/api/analytics/citizen-stats", headers=auth_headers("a@example.com", "citizen"))
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["total_complaints"], data["active_complaints"], data["resolved_complaints"]) == (6, 3, 2)
+    recent = data["recent_complaints"]
+    assert [c["_id"] for c in recent] == ["c5", "c4", "c3", "c2", "c1"]
+    assert recent[0]["district"] == "MG Marg"
+    assert recent[0]["ai_analysis"] == {"department_id": "PHE_001", "priority_score": 0.6,
+                                        "analysis_text": "text", "officer_recommendation": "officer"}
+
+def test_citizen_stats_without_complaints(test_client, api_app):
+    response = test_client.get("/api/analytics/citizen-stats", headers=auth_headers("new@example.com", "citizen"))
+    assert response.json()["total_complaints"] == 0
+    assert response.json()["recent_complaints"] == []
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from utils.assignment import (
+    claim_officer, release_officer, reconcile_workloads, backfill_workloads, get_strategy,
+    AssignmentStrategy, OFFICER_MAX_ACTIVE
+)
+
+def add_officers(mock_db, *officers):
+    mock_db.users.insert_many([
+        {"_id": officer_id, "role": "officer", "department_id": "PHE_001", **fields}
+        for officer_id, fields in officers
+    ])
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_never_exceed_capacity(async_db, mock_db):
+    add_officers(mock_db, ("a", {}), ("b", {"active_count": 3, "active_complaints": ["x", "y", "z"]}))
+
+    results = await asyncio.gather(*[
+        claim_officer(async_db, "PHE_001", {"_id": f"c{i}"}) for i in range(12)
+    ])
+    claimed = [officer for officer in results if officer]
+    assert len(claimed) == 2 * OFFICER_MAX_ACTIVE - 3
+    for officer_id in ("a", "b"):
+        officer = mock_db.users.find_one({"_id": officer_id})
+        assert officer["active_count"] == OFFICER_MAX_ACTIVE
+        assert len(officer["active_complaints"]) == OFFICER_MAX_ACTIVE
+
+@pytest.mark.asyncio
+async def test_least_loaded_and_round_robin(async_db, mock_db):
+    add_officers(mock_db, ("busy", {"active_count": 2}), ("idle", {"active_count": 0}))
+    officer = await claim_officer(async_db, "PHE_001", {"_id": "c1"}, strategy=get_strategy("least_loaded"))
+    assert officer["_id"] == "idle"
+
+    picks = []
+    for i in range(4):
+        await asyncio.sleep(0.005)  # last_assigned_at is stored with millisecond precision
+        officer = await claim_officer(async_db, "PHE_001", {"_id": f"r{i}"}, strategy=get_strategy("round_robin"))
+        picks.append(officer["_id"])
+    assert picks == ["busy", "idle", "busy", "idle"]
+
+@pytest.mark.asyncio
+async def test_skill_match_prefers_skilled_officer(async_db, mock_db):
+    add_officers(mock_db, ("general", {"active_count": 0}), ("plumber", {"active_count": 1, "skills": ["pipeline"]}))
+    complaint = {"_id": "c1", "title": "Burst pipeline", "description": "Water everywhere"}
+    officer = await claim_officer(async_db, "PHE_001", complaint, strategy=get_strategy("skill_match"))
+    assert officer["_id"] == "plumber"
+
+    officer = await claim_officer(async_db, "PHE_001", {"_id": "c2", "title": "Streetlight"}, strategy=get_strategy("skill_match"))
+    assert officer["_id"] == "general"
+
+@pytest.mark.asyncio
+async def test_release_is_idempotent_and_reconcile_fixes_drift(async_db, mock_db):
+    add_officers(mock_db, ("a", {}))
+    await claim_officer(async_db, "PHE_001", {"_id": "c1"})
+    assert await release_officer(async_db, "a", "c1")
+    assert not await release_officer(async_db, "a", "c1")
+    assert mock_db.users.find_one({"_id": "a"})["active_count"] == 0
+
+    mock_db.complaints.insert_many([
+        {"_id": "c2", "assigned_to": "a", "status": "pending"},
+        {"_id": "c3", "assigned_to": "a", "status": "resolved"},
+    ])
+    drift = await reconcile_workloads(async_db)
+    assert drift == [{"officer": "a", "stored": 0, "actual": 1}]
+    assert mock_db.users.find_one({"_id": "a"})["active_complaints"] == ["c2"]
+    assert await reconcile_workloads(async_db) == []
+
+@pytest.mark.asyncio
+async def test_backfill_counts_legacy_officers_once(async_db, mock_db):
+    """Officers without active_count get their real workload, others are left alone"""
+    add_officers(mock_db, ("legacy", {}), ("busy", {"active_count": 1, "active_complaints": ["c9"]}))
+    mock_db.complaints.insert_many([
+        {"_id": "c1", "assigned_to": "legacy", "status": "pending"},
+        {"_id": "c2", "assigned_to": "legacy", "status": "in_progress"},
+        {"_id": "c3", "assigned_to": "legacy", "status": "resolved"},
+    ])
+
+    assert await backfill_workloads(async_db) == 1
+    legacy = mock_db.users.find_one({"_id": "legacy"})
+    assert legacy["active_count"] == 2
+    assert legacy["active_complaints"] == ["c1", "c2"]
+    assert mock_db.users.find_one({"_id": "busy"})["active_count"] == 1
+    assert await backfill_workloads(async_db) == 0
+
+def test_strategy_must_implement_attempts():
+    class Incomplete(AssignmentStrategy):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,90 @@
+import json
+import pytest
+from types import SimpleNamespace
+from tests.conftest import auth_headers
+from routers.complaints import _insert_chunk
+
+ADMIN = auth_headers("admin@example.com", "admin")
+
+def complaint(i, **overrides):
+    row = {
+        "title": f"Pothole {i}",
+        "description": f"Deep pothole number {i} {'road ' * i}on the highway near the school gate",
+        "district": ["Gangtok", "Namchi", "Mangan"][i % 3],
+        "location": f"Km {i}",
+        "citizen_id": f"c{i}@example.com"
+    }
+    row.update(overrides)
+    return row
+
+def test_ndjson_rows_are_validated_inserted_and_queued(test_client, api_app, mock_db):
+    body = "\n".join([
+        json.dumps(complaint(1)),
+        "{not json",
+        json.dumps({"title": "No district", "description": "x", "location": "y", "citizen_id": "z"}),
+        "",
+        json.dumps(complaint(2)),
+    ])
+    response = test_client.post(
+        "/api/complaints/bulk", content=body, headers={**ADMIN, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["received"], summary["inserted"], summary["invalid"], summary["failed"]) == (4, 2, 2, 0)
+    assert [r["status"] for r in summary["rows"]] == ["inserted", "invalid", "invalid", "inserted"]
+    assert summary["rows"][1]["errors"][0].startswith("Invalid JSON")
+    assert summary["rows"][2]["errors"] == ["district: Field required"]
+
+    ids = {r["complaint_id"] for r in summary["rows"] if r["status"] == "inserted"}
+    assert {c["_id"] for c in mock_db.complaints.find()} == ids
+    assert {j["complaint_id"] for j in mock_db.analysis_jobs.find()} == ids
+    assert sum(r["count"] for r in mock_db.complaint_rollups.find()) == 2
+
+def test_csv_in_chunks_links_duplicates_within_the_batch(test_client, api_app, mock_db, monkeypatch):
+    monkeypatch.setattr("routers.complaints.BULK_CHUNK_SIZE", 2)
+    rows = [complaint(1), complaint(2), complaint(3), dict(complaint(1), citizen_id="other@example.com")]
+    header = ["title", "description", "district", "location", "citizen_id", "image_url"]
+    lines = [",".join(header)] + [
+        ",".join(json.dumps(row[name]) if name in row else "" for name in header) for row in rows
+    ]
+    lines[2] = lines[2].replace("Pothole 2", 'Pothole\r\n2 ""deep""')
+    body = "﻿" + "\r\n".join(lines) + "\r\n"
+
+    response = test_client.post(
+        "/api/complaints/bulk?format=csv", content=body.encode(), headers=ADMIN
+    )
+    summary = response.json()
+    assert summary["inserted"] == 4 and summary["invalid"] == 0
+    first, second, _, duplicate = summary["rows"]
+    assert duplicate["incident_id"] == first["complaint_id"]
+    assert mock_db.complaints.find_one({"_id": second["complaint_id"]})["title"] == 'Pothole\n2 "deep"'
+    # The duplicate's job waits on its incident instead of analyzing it again
+    assert mock_db.analysis_jobs.count_documents({}) == 4
+    assert mock_db.dedup_signatures.count_documents({}) == 4
+
+def test_bulk_limits_and_permissions(test_client, api_app, monkeypatch):
+    body = "\n".join(json.dumps(complaint(i)) for i in range(3))
+    citizen = auth_headers("c1@example.com", "citizen")
+    assert test_client.post("/api/complaints/bulk", content=body, headers=citizen).status_code == 403
+
+    monkeypatch.setattr("routers.complaints.BULK_MAX_ROWS", 2)
+    summary = test_client.post("/api/complaints/bulk", content=body, headers=ADMIN).json()
+    assert summary["received"] == 2 and summary["truncated"] is True
+
+    monkeypatch.setattr("routers.complaints.BULK_MAX_BYTES", 10)
+    assert test_client.post("/api/complaints/bulk", content=body, headers=ADMIN).status_code == 413
+
+@pytest.mark.asyncio
+async def test_failed_write_is_reported_and_the_chunk_continues(api_app, async_db, mock_db):
+    mock_db.complaints.insert_one({"_id": "taken"})
+    chunk = [
+        (1, dict(complaint(1), _id="a", status="pending"), True),
+        (2, dict(complaint(2), _id="taken", status="pending"), True),
+        (3, dict(complaint(3), _id="b", status="pending"), False)
+    ]
+    results = await _insert_chunk(SimpleNamespace(app=api_app), chunk)
+    assert [(r["row"], r["status"]) for r in sorted(results, key=lambda r: r["row"])] == [
+        (1, "inserted"), (2, "error"), (3, "inserted")
+    ]
+    assert mock_db.complaints.count_documents({"_id": {"$in": ["a", "b"]}}) == 2
+    assert [j["complaint_id"] for j in mock_db.analysis_jobs.find()] == ["a"]
@@ -0,0 +1,59 @@
+import time
+import pytest
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, RetryBudget, CLOSED, OPEN, HALF_OPEN
+from utils.analysis_queue import AnalysisWorkerPool, enqueue_analysis, QUEUE_COLLECTION, JOB_QUEUED
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, half_open_calls=1)
+    breaker.record_failure()
+    breaker.opened_at = time.monotonic() - 61
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    breaker.opened_at = time.monotonic() - 61
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+def test_retry_budget_limits_retries_to_ratio():
+    budget = RetryBudget(ratio=0.5, min_per_second=0, window=10)
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+    assert budget.stats()["exhausted"] == 1
+
+@pytest.mark.asyncio
+async def test_open_breaker_defers_job_without_spending_attempts(async_db):
+    """Jobs rejected by an open breaker are parked and the complaint marked at once"""
+    deferred = []
+
+    async def handler(db, complaint_id):
+        raise CircuitOpenError(30)
+
+    async def on_deferred(db, complaint_id, error):
+        deferred.append(complaint_id)
+
+    await enqueue_analysis(async_db, "c1")
+    pool = AnalysisWorkerPool(async_db, handler, on_deferred=on_deferred, concurrency=0)
+    assert await pool.run_once("w")
+
+    job = await async_db[QUEUE_COLLECTION].find_one({"complaint_id": "c1"})
+    assert job["status"] == JOB_QUEUED
+    assert job["attempts"] == 0
+    assert job["deferrals"] == 1
+    assert deferred == ["c1"]
+    assert not await pool.run_once("w")  # parked until the breaker can probe again
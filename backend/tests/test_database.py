@@ -0,0 +1,86 @@
+"""
+The replica-set tests run when MONGODB_TEST_URL points at a replica set,
+e.g. a local single-node one:
+
+    mongod --replSet rs0 --dbpath /tmp/rs0 --port 27018
+    mongosh --port 27018 --eval "rs.initiate()"
+    MONGODB_TEST_URL="mongodb://localhost:27018/?replicaSet=rs0" pytest tests/test_database.py
+"""
+import os
+import asyncio
+import pytest
+from types import SimpleNamespace
+from pymongo.read_preferences import SecondaryPreferred
+from utils.database import (
+    analytics_db, analytics_read_preference, check_readiness, client_options,
+    create_client, get_analytics_database, get_database
+)
+
+MONGODB_TEST_URL = os.getenv("MONGODB_TEST_URL")
+requires_replica_set = pytest.mark.skipif(not MONGODB_TEST_URL, reason="MONGODB_TEST_URL is not set")
+
+class FakeAdmin:
+    def __init__(self, reply=None, delay=0.0, error=None):
+        self.reply, self.delay, self.error = reply, delay, error
+
+    async def command(self, name):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.reply
+
+def test_client_options_carry_pool_and_timeouts():
+    options = client_options()
+    assert options["maxPoolSize"] >= 1
+    assert options["serverSelectionTimeoutMS"] > 0
+    assert options["waitQueueTimeoutMS"] > 0
+
+def test_analytics_reads_prefer_secondaries():
+    assert isinstance(analytics_read_preference(), SecondaryPreferred)
+    client = create_client("mongodb://localhost:27017", connect=False)
+    try:
+        db = get_database(client)
+        reporting = get_analytics_database(db)
+        assert reporting.name == db.name
+        assert reporting.read_preference.mongos_mode == "secondaryPreferred"
+        assert db.read_preference.mongos_mode == "primary"
+    finally:
+        client.close()
+
+def test_reporting_routes_fall_back_to_the_primary_handle():
+    app = SimpleNamespace(mongodb="primary")
+    assert analytics_db(SimpleNamespace(app=app)) == "primary"
+    app.mongodb_analytics = "secondary"
+    assert analytics_db(SimpleNamespace(app=app)) == "secondary"
+
+@pytest.mark.asyncio
+async def test_readiness_reports_topology():
+    reply = {"isWritablePrimary": True, "setName": "rs0", "primary": "db1:27017",
+             "hosts": ["db1:27017", "db2:27017", "db3:27017"]}
+    result = await check_readiness(SimpleNamespace(admin=FakeAdmin(reply)))
+    assert result["ready"] and result["replica_set"] == "rs0"
+    assert result["secondaries"] == 2
+
+@pytest.mark.asyncio
+async def test_readiness_fails_on_timeout_or_error():
+    slow = await check_readiness(SimpleNamespace(admin=FakeAdmin({"isWritablePrimary": True}, delay=1)), timeout=0.05)
+    assert slow == {"ready": False, "error": "TimeoutError"}
+    down = await check_readiness(SimpleNamespace(admin=FakeAdmin(error=ConnectionError("refused"))))
+    assert down == {"ready": False, "error": "refused"}
+
+@requires_replica_set
+@pytest.mark.asyncio
+async def test_replica_set_readiness_and_secondary_preferred_reads():
+    client = create_client(MONGODB_TEST_URL)
+    db = get_database(client, "complaint_system_test_database")
+    try:
+        readiness = await check_readiness(client)
+        assert readiness["ready"] and readiness["replica_set"]
+
+        await db.complaints.insert_one({"_id": "c1", "status": "pending"})
+        # A single-node set has no secondaries, so secondaryPreferred reads the primary
+        reporting = get_analytics_database(db)
+        assert await reporting.complaints.count_documents({"status": "pending"}) == 1
+    finally:
+        await client.drop_database("complaint_system_test_database")
+        client.close()
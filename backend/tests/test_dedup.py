@@ -0,0 +1,108 @@
+import pytest
+from datetime import datetime, timedelta
+from routers.complaints import share_incident_analysis, process_complaint_analysis
+from utils.assignment import active_complaints_by_officer
+from utils.dedup import DuplicateIndex, SIGNATURE_COLLECTION
+
+BRIDGE = {
+    "title": "Bridge collapsed",
+    "description": "The bridge over the river near the market has collapsed and traffic is blocked",
+    "district": "Gangtok",
+    "location": "Lal Bazaar",
+    "citizen_id": "a@example.com"
+}
+REPORT = dict(BRIDGE, description="The bridge over the river near the market collapsed, traffic is blocked!")
+
+def test_index_matches_within_district_and_window():
+    index = DuplicateIndex()
+    index.add(dict(BRIDGE, _id="c1"))
+    incident_id, score = index.find(REPORT)
+    assert incident_id == "c1" and score >= index.threshold
+
+    assert index.find(dict(REPORT, district="Namchi")) is None
+    assert index.find(dict(BRIDGE, title="Streetlight broken", description="The lamp post on MG Marg is dark")) is None
+
+    index.add(dict(REPORT, _id="c2"), "c1")
+    assert index.find(REPORT)[0] == "c1"
+    assert index.stats() == {"complaints": 2, "districts": 1, "incidents": 1}
+
+    index.add(dict(BRIDGE, _id="old", district="Namchi", created_at=datetime.utcnow() - timedelta(days=30)))
+    assert index.find(dict(BRIDGE, district="Namchi")) is None
+    assert index.prune() == 1
+    index.remove("c1")
+    assert index.find(BRIDGE)[0] == "c1"  # c2 still points at its incident
+
+def test_duplicate_reuses_completed_incident(test_client, api_app, mock_db):
+    primary = test_client.post("/api/complaints/", json=BRIDGE).json()
+    analysis = {"department_id": "PWD_001", "priority_score": 0.9, "analysis_text": "Department: PWD"}
+    mock_db.complaints.update_one({"_id": primary["_id"]}, {"$set": {
+        "analysis_status": "completed", "department_id": "PWD_001", "assigned_to": "officer-1", "ai_analysis": analysis
+    }})
+
+    duplicate = test_client.post("/api/complaints/", json=REPORT).json()
+    assert duplicate["incident_id"] == primary["_id"]
+    # only the incident holds a claim on the officer's capacity
+    assert duplicate.get("assigned_to") is None
+    assert duplicate["department_id"] == "PWD_001"
+    assert duplicate["ai_analysis"] == analysis
+    assert mock_db.analysis_jobs.count_documents({}) == 1
+
+@pytest.mark.asyncio
+async def test_duplicate_waits_for_pending_incident(test_client, api_app, mock_db, async_db):
+    primary = test_client.post("/api/complaints/", json=BRIDGE).json()
+    duplicate = test_client.post("/api/complaints/", json=REPORT).json()
+    assert duplicate["incident_id"] == primary["_id"]
+    assert duplicate["analysis_status"] == "pending_analysis"
+    # the duplicate's job waits for the incident instead of calling the LLM
+    assert mock_db.analysis_jobs.count_documents({}) == 2
+    await process_complaint_analysis(async_db, duplicate["_id"])
+    assert mock_db.complaints.find_one({"_id": duplicate["_id"]})["analysis_status"] == "pending_analysis"
+
+    incident = dict(primary, department_id="PWD_001", assigned_to="officer-1", ai_analysis={"priority_score": 0.9})
+    await share_incident_analysis(async_db, primary["_id"], incident)
+    stored = mock_db.complaints.find_one({"_id": duplicate["_id"]})
+    assert stored["analysis_status"] == "completed"
+    assert stored["department_id"] == "PWD_001"
+    assert stored.get("assigned_to") is None
+    assert await active_complaints_by_officer(async_db) == {}
+
+@pytest.mark.asyncio
+async def test_duplicate_job_picks_up_analysis_completed_before_insert(test_client, api_app, mock_db, async_db):
+    """An incident completed between the link and the insert is still shared"""
+    primary = test_client.post("/api/complaints/", json=BRIDGE).json()
+    duplicate = test_client.post("/api/complaints/", json=REPORT).json()
+    # share_incident_analysis already ran before the duplicate was stored
+    mock_db.complaints.update_one({"_id": primary["_id"]}, {"$set": {
+        "analysis_status": "completed", "department_id": "PWD_001", "assigned_to": "officer-1",
+        "ai_analysis": {"priority_score": 0.9}
+    }})
+
+    await process_complaint_analysis(async_db, duplicate["_id"])
+    stored = mock_db.complaints.find_one({"_id": duplicate["_id"]})
+    assert stored["analysis_status"] == "completed"
+    assert stored.get("assigned_to") is None
+
+@pytest.mark.asyncio
+async def test_stored_signatures_link_duplicates_across_workers(async_db, mock_db):
+    """A worker finds incidents another worker indexed through the shared collection"""
+    first_worker, second_worker = DuplicateIndex(), DuplicateIndex()
+    first_worker.add(dict(BRIDGE, _id="c1"))
+    await first_worker.store(async_db, ["c1"])
+    assert mock_db[SIGNATURE_COLLECTION].find_one({"_id": "c1"})["incident_id"] == "c1"
+
+    assert second_worker.find(REPORT) is None
+    incident_id, score = await second_worker.find_stored(async_db, dict(REPORT, _id="c2"))
+    assert incident_id == "c1" and score >= second_worker.threshold
+    assert await second_worker.find_stored(async_db, dict(REPORT, district="Namchi")) is None
+
+def test_failed_signature_write_still_queues_the_analysis(test_client, api_app, mock_db, monkeypatch):
+    """Signatures are best-effort; the complaint and its job are not"""
+    def fail(*args, **kwargs):
+        raise RuntimeError("signature write failed")
+    monkeypatch.setattr(mock_db[SIGNATURE_COLLECTION], "insert_many", fail)
+
+    response = test_client.post("/api/complaints/", json=BRIDGE)
+    assert response.status_code == 200
+    complaint_id = response.json()["_id"]
+    assert mock_db.analysis_jobs.find_one({"complaint_id": complaint_id})
+    assert mock_db[SIGNATURE_COLLECTION].count_documents({}) == 0
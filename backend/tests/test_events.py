@@ -0,0 +1,134 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from tests.conftest import auth_headers
+from routers.complaints import mark_analysis_failed
+from routers.events import event_stream, EVENTS_CLIENT_RETRY_MS
+from utils.auth import get_stream_user, STREAM_TICKET_EXPIRE_SECONDS
+from utils.events import (
+    EventBus, event_bus, event_from_change, check_events_source, citizen_topic, department_topic, ADMIN_TOPIC
+)
+
+ADMIN = auth_headers("admin@example.com", "admin")
+
+COMPLAINT = {
+    "title": "Streetlight out",
+    "description": "The streetlight at the junction has been dark for a week",
+    "district": "Namchi",
+    "location": "Central Park",
+    "citizen_id": "c@example.com"
+}
+
+def test_bus_routes_by_topic_and_drops_oldest_when_full():
+    bus = EventBus(queue_size=2)
+    citizen = bus.subscribe([citizen_topic("c@example.com")])
+    both = bus.subscribe([citizen_topic("c@example.com"), department_topic("PWD_001")])
+    other = bus.subscribe([citizen_topic("x@example.com")])
+
+    # A subscriber on several matching topics gets the event once
+    assert bus.publish({"type": "a"}, [citizen_topic("c@example.com"), department_topic("PWD_001")]) == 2
+    bus.publish({"type": "b"}, [department_topic("PWD_001")])
+    bus.publish({"type": "c"}, [department_topic("PWD_001")])
+    assert both.dropped == 1 and citizen.dropped == 0 and other.dropped == 0
+
+    other.close()
+    assert bus.stats()["subscribers"] == 2
+
+def test_change_stream_documents_map_to_events():
+    doc = {"_id": "c1", "citizen_id": "c@example.com", "status": "pending"}
+    assert event_from_change({"operationType": "insert", "fullDocument": doc})[0] == "complaint_created"
+    completed = {"operationType": "update", "fullDocument": doc,
+                 "updateDescription": {"updatedFields": {"analysis_status": "completed", "ai_analysis": {}}}}
+    assert event_from_change(completed)[0] == "analysis_completed"
+    resolved = {"operationType": "update", "fullDocument": doc,
+                "updateDescription": {"updatedFields": {"status": "resolved"}}}
+    assert event_from_change(resolved)[0] == "status_changed"
+    assert event_from_change({"operationType": "update", "fullDocument": None}) is None
+
+@pytest.mark.asyncio
+async def test_create_and_status_change_reach_citizen_and_admin(test_client, api_app):
+    citizen = event_bus.subscribe([citizen_topic("c@example.com")])
+    admin = event_bus.subscribe([ADMIN_TOPIC])
+    try:
+        created = test_client.post("/api/complaints/", json=COMPLAINT).json()
+        response = test_client.put(
+            f"/api/complaints/{created['_id']}?status=in_progress",
+            headers=auth_headers("admin@example.com", "admin")
+        )
+        assert response.status_code == 200
+
+        events = [await citizen.get(0.1), await citizen.get(0.1)]
+        assert [e["type"] for e in events] == ["complaint_created", "status_changed"]
+        assert events[1]["complaint_id"] == created["_id"] and events[1]["status"] == "in_progress"
+        assert (await admin.get(0.1))["type"] == "complaint_created"
+    finally:
+        citizen.close()
+        admin.close()
+
+@pytest.mark.asyncio
+async def test_failed_analysis_is_published(async_db, mock_db):
+    mock_db.complaints.insert_one(dict(COMPLAINT, _id="c1", department_id="PWD_001", status="pending"))
+    department = event_bus.subscribe([department_topic("PWD_001")])
+    try:
+        await mark_analysis_failed(async_db, "c1", "boom", 3)
+        event = await department.get(0.1)
+        assert event["type"] == "analysis_updated" and event["analysis_status"] == "failed"
+    finally:
+        department.close()
+
+@pytest.mark.asyncio
+async def test_stream_sends_events_and_heartbeats(monkeypatch):
+    monkeypatch.setattr("routers.events.EVENTS_HEARTBEAT_SECONDS", 0.01)
+    bus = EventBus()
+    checks = iter([False, False, True])
+    request = SimpleNamespace(is_disconnected=lambda: _value(next(checks)))
+
+    stream = event_stream(request, ["admin"], bus)
+    assert bus.stats()["subscribers"] == 0  # nothing is held until the response starts
+    assert (await stream.__anext__()).startswith("retry: ")
+    bus.publish({"type": "status_changed", "complaint_id": "c1", "last_updated": datetime(2024, 1, 1)}, ["admin"])
+    chunks = [chunk async for chunk in stream]
+    assert chunks[0] == 'id: 1\nevent: status_changed\ndata: {"id":1,"type":"status_changed","complaint_id":"c1","last_updated":"2024-01-01T00:00:00"}\n\n'
+    assert chunks[1] == ": keep-alive\n\n"
+    assert bus.stats()["subscribers"] == 0
+
+@pytest.mark.asyncio
+async def test_full_bus_refuses_new_streams(test_client, api_app, monkeypatch):
+    bus = EventBus(max_subscribers=1)
+    bus.subscribe(["admin"])
+    monkeypatch.setattr("routers.events.event_bus", bus)
+    assert test_client.get("/api/events/stream", headers=ADMIN).status_code == 503
+
+    request = SimpleNamespace(is_disconnected=lambda: _value(True))
+    assert [chunk async for chunk in event_stream(request, ["admin"], bus)] == [f"retry: {EVENTS_CLIENT_RETRY_MS}\n\n"]
+    assert bus.stats()["subscribers"] == 1
+
+async def _value(value):
+    return value
+
+def test_stream_requires_a_token(test_client, api_app):
+    assert test_client.get("/api/events/stream").status_code == 401
+    assert test_client.get("/api/events/stream?ticket=bad").status_code == 401
+    # Access tokens are not taken from the URL, where access logs would record them
+    token = ADMIN["Authorization"].split()[1]
+    assert test_client.get(f"/api/events/stream?access_token={token}").status_code == 401
+    assert test_client.get(f"/api/events/stream?ticket={token}").status_code == 401
+
+@pytest.mark.asyncio
+async def test_stream_tickets_only_open_the_stream(test_client, api_app):
+    assert test_client.post("/api/events/ticket").status_code == 401
+    response = test_client.post("/api/events/ticket", headers=ADMIN)
+    assert response.status_code == 200 and response.json()["expires_in"] == STREAM_TICKET_EXPIRE_SECONDS
+    ticket = response.json()["ticket"]
+
+    user = await get_stream_user(None, ticket)
+    assert (user.email, user.role) == ("admin@example.com", "admin")
+    assert test_client.get("/api/events/stats", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+
+def test_several_workers_need_the_change_stream():
+    check_events_source("local", 1)
+    check_events_source("change_stream", 4)
+    with pytest.raises(RuntimeError):
+        check_events_source("local", 4)
+    with pytest.raises(RuntimeError):
+        check_events_source("redis", 1)
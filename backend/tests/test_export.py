@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime
+from fastapi import status
+from tests.conftest import auth_headers
+
+@pytest.fixture
+def seeded_app(api_app, mock_db):
+    for i in range(5):
+        mock_db.complaints.insert_one({
+            "_id": f"c{i}",
+            "title": f"Complaint {i}",
+            "description": "No water, again",
+            "district": "Gangtok",
+            "location": "MG Marg",
+            "citizen_id": "a@example.com" if i < 3 else "b@example.com",
+            "status": "pending",
+            "created_at": datetime(2024, 1, i + 1),
+            "ai_analysis": {"priority_score": 0.5, "analysis_text": "raw"}
+        })
+    return api_app
+
+def test_export_ndjson_is_scoped_to_citizen(test_client, seeded_app):
+    response = test_client.get("/api/complaints/export", headers=auth_headers("a@example.com", "citizen"))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["_id"] for row in rows] == ["c0", "c1", "c2"]
+    assert rows[0]["created_at"] == "2024-01-01T00:00:00"
+
+def test_export_csv_with_date_range(test_client, seeded_app):
+    response = test_client.get(
+        "/api/complaints/export",
+        params={"format": "csv", "created_from": "2024-01-02T00:00:00", "created_to": "2024-01-05T00:00:00"},
+        headers=auth_headers("admin@example.com", "admin")
+    )
+    assert response.status_code == status.HTTP_200_OK
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["_id"] for row in rows] == ["c1", "c2", "c3"]
+    assert rows[0]["description"] == "No water, again"
+    assert rows[0]["ai_analysis.priority_score"] == "0.5"
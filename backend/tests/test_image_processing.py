@@ -0,0 +1,83 @@
+import io
+import os
+import pytest
+from PIL import Image
+from utils.image_processing import (
+    ImageProcessor, process_image, process_complaint_image, hamming_distance, EXIF_IFD, GPS_IFD
+)
+from utils.storage import LocalStorage
+
+def photo(size=(2000, 1000), color=(200, 40, 40), gps=True) -> bytes:
+    image = Image.new("RGB", size, color)
+    image.paste((20, 20, 220), (0, 0, size[0] // 2, size[1] // 3))
+    exif = Image.Exif()
+    exif[EXIF_IFD] = {36867: "2024:05:01 09:30:00"}
+    if gps:
+        exif[GPS_IFD] = {1: "N", 2: (27.0, 19.0, 48.0), 3: "E", 4: (88.0, 36.0, 36.0)}
+    output = io.BytesIO()
+    image.save(output, "JPEG", exif=exif)
+    return output.getvalue()
+
+def test_process_image_extracts_exif_and_strips_it():
+    result = process_image(photo(), max_dimension=800, thumbnail_size=100)
+    assert (result["width"], result["height"]) == (800, 400)
+    assert result["taken_at"] == "2024-05-01T09:30:00"
+    assert result["gps"] == {"lat": 27.33, "lon": 88.61}
+    assert len(result["phash"]) == 16
+
+    stored = Image.open(io.BytesIO(result["image"]))
+    assert not stored.getexif()
+    assert max(Image.open(io.BytesIO(result["thumbnail"])).size) == 100
+
+def test_perceptual_hash_tolerates_recompression():
+    first = process_image(photo())["phash"]
+    second = process_image(photo(size=(1000, 500), color=(205, 40, 40), gps=False))["phash"]
+    assert hamming_distance(first, second) <= 6
+
+@pytest.mark.asyncio
+async def test_process_complaint_image_flags_duplicates(tmp_path, async_db, mock_db):
+    storage = LocalStorage(str(tmp_path), "/uploads", str(tmp_path / "private"))
+    processor = ImageProcessor(workers=1)
+    mock_db.complaints.insert_many([
+        {"_id": "c1", "district": "Gangtok"},
+        {"_id": "c2", "district": "Gangtok"},
+    ])
+
+    async def upload(key):
+        async def chunks():
+            yield photo()
+        await storage.save(key, chunks(), private=True)
+
+    try:
+        await upload("c1_1.jpg")
+        first = await process_complaint_image(async_db, storage, "c1", "c1_1.jpg", processor)
+        assert first["duplicate_of"] == []
+        assert first["thumbnail_url"] == "/uploads/c1_1_thumb.jpg"
+        assert not (tmp_path / "private" / "c1_1.jpg").exists()
+
+        await upload("c2_1.jpg")
+        second = await process_complaint_image(async_db, storage, "c2", "c2_1.jpg", processor)
+        assert second["duplicate_of"] == ["c1"]
+        complaint = mock_db.complaints.find_one({"_id": "c2"})
+        assert complaint["image_url"] == "/uploads/c2_1_display.jpg"
+        assert complaint["image_analysis"]["gps"] == {"lat": 27.33, "lon": 88.61}
+    finally:
+        processor.close()
+
+@pytest.mark.asyncio
+async def test_failed_processing_publishes_nothing(tmp_path, async_db, mock_db):
+    """An unreadable original stays private and the complaint gets no image_url"""
+    storage = LocalStorage(str(tmp_path), "/uploads", str(tmp_path / "private"))
+
+    async def chunks():
+        yield b"not an image"
+
+    class Processor:
+        async def process(self, data):
+            return process_image(data)
+
+    mock_db.complaints.insert_one({"_id": "c1", "district": "Gangtok"})
+    await storage.save("c1_1.jpg", chunks(), private=True)
+    assert await process_complaint_image(async_db, storage, "c1", "c1_1.jpg", Processor()) is None
+    assert "image_url" not in mock_db.complaints.find_one({"_id": "c1"})
+    assert os.listdir(tmp_path) == ["private"]
@@ -0,0 +1,55 @@
+import pytest
+from routers.indexes import INDEXES
+from utils.db_setup import ensure_indexes, plan_stages
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_applies_registry(async_db, mock_db):
+    mock_db.users.create_index("username", unique=True)
+    mock_db.users.create_index("email", unique=True)
+    mock_db.complaints.create_index([("title", 1)])
+
+    report = await ensure_indexes(async_db)
+    assert "users.username_1" in report["dropped"]
+    # indexes from earlier versions keep their names and are not rebuilt
+    assert "users.email_1" in report["unchanged"]
+    assert report["unknown"] == ["complaints.title_1"]
+    assert "ai_analyses.complaint" in report["created"]
+
+    users = mock_db.users.index_information()
+    assert "username_1" not in users
+    assert users["role_department_load"]["key"] == [("role", 1), ("department_id", 1), ("active_count", 1)]
+    assert mock_db.analysis_cache.index_information()["expires_ttl"]["expireAfterSeconds"] == 0
+
+    report = await ensure_indexes(async_db)
+    assert not report["created"] and not report["dropped"]
+    assert len(report["unchanged"]) == sum(len(indexes) for indexes in INDEXES.values())
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_rebuilds_changed_and_prunes(async_db, mock_db):
+    mock_db.users.create_index([("email", 1)], name="email_1")
+    mock_db.complaints.create_index([("title", 1)])
+
+    report = await ensure_indexes(async_db, dry_run=True)
+    assert "users.email_1" in report["rebuilt"]
+    assert "unique" not in mock_db.users.index_information()["email_1"]
+
+    # startup leaves changed indexes to the one-off migration
+    report = await ensure_indexes(async_db, rebuild=False)
+    assert report["outdated"] == ["users.email_1"]
+    assert "unique" not in mock_db.users.index_information()["email_1"]
+
+    report = await ensure_indexes(async_db, prune=True)
+    assert "users.email_1" in report["rebuilt"]
+    assert "complaints.title_1" in report["dropped"]
+    assert mock_db.users.index_information()["email_1"]["unique"] is True
+
+def test_plan_stages_finds_collscan():
+    plan = {
+        "stage": "SORT",
+        "inputStage": {"stage": "OR", "inputStages": [
+            {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+            {"stage": "COLLSCAN"}
+        ]}
+    }
+    assert plan_stages(plan) == ["SORT", "OR", "FETCH", "IXSCAN", "COLLSCAN"]
+    assert plan_stages({"queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}) == ["FETCH", "IXSCAN"]
@@ -0,0 +1,45 @@
+import time
+import asyncio
+import pytest
+from utils.llm_client import LLMClient
+from tests.fake_llm_server import FakeLLMServer, DEFAULT_RESPONSE
+
+MESSAGES = [{"role": "user", "content": "No water supply in Gangtok"}]
+
+@pytest.mark.asyncio
+async def test_complete_returns_message_content():
+    """The client returns the assistant message from the fake server"""
+    with FakeLLMServer() as server:
+        client = LLMClient(api_key="test", base_url=server.base_url)
+        try:
+            assert await client.complete(MESSAGES, temperature=0.1) == DEFAULT_RESPONSE
+        finally:
+            await client.close()
+        assert server.requests[0]["temperature"] == 0.1
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_and_loop_stays_responsive():
+    """Concurrent calls respect the semaphore without blocking the event loop"""
+    with FakeLLMServer(latency=0.2) as server:
+        client = LLMClient(api_key="test", base_url=server.base_url, max_concurrency=2)
+        try:
+            start = time.perf_counter()
+            calls = asyncio.gather(*(client.complete(MESSAGES) for _ in range(4)))
+            # The loop keeps running other work while the calls are in flight
+            await asyncio.sleep(0.05)
+            assert time.perf_counter() - start < 0.15
+            await calls
+        finally:
+            await client.close()
+        assert server.max_in_flight == 2
+
+@pytest.mark.asyncio
+async def test_per_call_timeout():
+    """A slow provider call fails after the per-call timeout"""
+    with FakeLLMServer(latency=0.5) as server:
+        client = LLMClient(api_key="test", base_url=server.base_url, max_retries=0)
+        try:
+            with pytest.raises(Exception):
+                await client.complete(MESSAGES, timeout=0.1)
+        finally:
+            await client.close()
@@ -0,0 +1,70 @@
+import pytest
+from benchmarks.load_test import analysis_failures, compare, percentile, run_load_test, summarize
+
+def test_percentiles_use_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+    assert percentile([], 95) == 0.0
+
+    result = summarize("login", 4, [3.0, 1.0, 2.0], 1, 0.5)
+    assert result["requests"] == 3 and result["rps"] == 6.0
+    assert result["p50_ms"] == 2.0 and result["max_ms"] == 3.0
+
+def test_compare_flags_latency_throughput_and_error_regressions():
+    baseline = {"results": [
+        {"scenario": "login", "concurrency": 10, "p95_ms": 100.0, "rps": 50.0, "errors": 0},
+        {"scenario": "get_complaints", "concurrency": 10, "p95_ms": 10.0, "rps": 500.0, "errors": 0}
+    ]}
+    current = {"results": [
+        {"scenario": "login", "concurrency": 10, "p95_ms": 110.0, "rps": 45.0, "errors": 0},
+        {"scenario": "get_complaints", "concurrency": 10, "p95_ms": 20.0, "rps": 300.0, "errors": 2},
+        {"scenario": "citizen_stats", "concurrency": 10, "p95_ms": 5.0, "rps": 900.0, "errors": 0}
+    ]}
+    regressions = compare(baseline, current, tolerance=0.2)
+    assert len(regressions) == 3
+    assert all(line.startswith("get_complaints c=10") for line in regressions)
+
+@pytest.mark.asyncio
+async def test_load_test_runs_against_the_in_memory_fake(monkeypatch):
+    monkeypatch.setenv("GROQ_BASE_URL", "")
+    report = await run_load_test(
+        scenarios=["create_complaint", "get_complaints", "citizen_stats"],
+        concurrency=[2],
+        requests=6,
+        warmup=1,
+        users=2,
+        complaints=10,
+        analysis_workers=0
+    )
+    assert report["config"]["database"] == "fake"
+    assert [(r["scenario"], r["requests"], r["errors"]) for r in report["results"]] == [
+        ("create_complaint", 6, 0), ("get_complaints", 6, 0), ("citizen_stats", 6, 0)
+    ]
+    assert all(r["p99_ms"] >= r["p50_ms"] > 0 for r in report["results"])
+
+@pytest.mark.asyncio
+async def test_analysis_jobs_drain_without_dead_letters(monkeypatch):
+    """Single-complaint JSON prompts get an object back, so nothing dead-letters"""
+    monkeypatch.setenv("GROQ_BASE_URL", "")
+    monkeypatch.setattr("utils.ai_analysis.ANALYSIS_BATCH_SIZE", 1)
+    report = await run_load_test(
+        scenarios=["create_complaint"],
+        concurrency=[2],
+        requests=4,
+        warmup=1,
+        users=2,
+        complaints=4,
+        analysis_workers=2,
+        drain_timeout=20
+    )
+    assert report["failures"] == []
+    assert report["analysis"]["counts"]["dead"] == 0 and report["analysis"]["counts"]["done"] > 0
+
+def test_dead_letters_and_undrained_jobs_fail_the_run():
+    counts = {"queued": 1, "leased": 0, "done": 3, "dead": 2}
+    assert analysis_failures({"analysis": {"counts": counts}}) == [
+        "2 analysis job(s) dead-lettered", "1 analysis job(s) still pending after the drain timeout"
+    ]
+    assert analysis_failures({"results": []}) == []
@@ -0,0 +1,65 @@
+import json
+import logging
+import queue
+from utils.logging_config import (
+    CorrelationIdFilter, DroppingQueueHandler, JsonFormatter, correlation_id, log_payload, truncate
+)
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def make_logger(name, level=logging.DEBUG):
+    logger = logging.getLogger(name)
+    logger.handlers = []
+    logger.propagate = False
+    handler = ListHandler()
+    handler.addFilter(CorrelationIdFilter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger, handler
+
+def test_json_records_carry_correlation_id_and_extras():
+    logger, handler = make_logger("tests.json")
+    token = correlation_id.set("req-1")
+    try:
+        logger.info("Created %s", "complaint", extra={"complaint_id": "c1"})
+    finally:
+        correlation_id.reset(token)
+
+    entry = json.loads(JsonFormatter().format(handler.records[0]))
+    assert entry["message"] == "Created complaint"
+    assert entry["correlation_id"] == "req-1"
+    assert entry["complaint_id"] == "c1"
+    assert entry["level"] == "INFO"
+
+def test_log_payload_is_sampled_truncated_and_lazy():
+    logger, handler = make_logger("tests.payload")
+    log_payload(logger, "Payload", {"text": "x" * 5000}, sample_rate=1)
+    payload = handler.records[0].payload
+    assert len(payload) < 2100 and payload.endswith("more chars)")
+
+    log_payload(logger, "Payload", {"text": "x"}, sample_rate=0)
+    assert len(handler.records) == 1
+
+    quiet, quiet_handler = make_logger("tests.quiet", logging.INFO)
+    log_payload(quiet, "Payload", object(), sample_rate=1)
+    assert quiet_handler.records == []
+    assert truncate("short") == "short"
+
+def test_queue_handler_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("tests", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().msg == "hello world"
+
+def test_request_id_is_echoed(test_client):
+    response = test_client.get("/", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+    assert len(test_client.get("/").headers["x-request-id"]) == 32
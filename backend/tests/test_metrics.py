@@ -0,0 +1,53 @@
+import pytest
+from types import SimpleNamespace
+from tests.conftest import auth_headers
+from tests.fake_llm_server import FakeLLMServer
+from utils.llm_client import LLMClient
+from utils.metrics import (
+    Registry, MongoMetricsListener, http_request_duration, llm_requests, mongo_operation_duration
+)
+
+@pytest.mark.asyncio
+async def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    requests.inc(route='/a"b')
+    requests.inc(2, route='/a"b')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = await registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{route="/a\\"b"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+
+def test_mongo_listener_times_commands_per_collection():
+    listener = MongoMetricsListener()
+    before = mongo_operation_duration.count(collection="complaints", command="find", outcome="success")
+    listener.started(SimpleNamespace(command={"find": "complaints"}, command_name="find", request_id=1, operation_id=1))
+    listener.succeeded(SimpleNamespace(request_id=1, operation_id=1, duration_micros=1500))
+    assert mongo_operation_duration.count(collection="complaints", command="find", outcome="success") == before + 1
+
+@pytest.mark.asyncio
+async def test_llm_calls_are_counted():
+    before = llm_requests.value(outcome="success")
+    with FakeLLMServer() as server:
+        client = LLMClient(api_key="test", base_url=server.base_url)
+        await client.complete([{"role": "user", "content": "hi"}])
+        await client.close()
+    assert llm_requests.value(outcome="success") == before + 1
+
+def test_metrics_endpoint_reports_route_templates(test_client, api_app, mock_db):
+    test_client.get("/api/complaints/c1", headers=auth_headers("admin@example.com", "admin"))
+    assert http_request_duration.count(method="GET", route="/api/complaints/{complaint_id}", status=404) >= 1
+
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'route="/api/complaints/{complaint_id}"' in response.text
+    assert "# TYPE llm_request_duration_seconds histogram" in response.text
@@ -0,0 +1,50 @@
+import pytest
+from datetime import datetime, timedelta
+from tests.conftest import auth_headers
+from utils.pagination import encode_cursor, decode_cursor, keyset_query, InvalidCursorError, KEYSET_SORT
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_document_once(async_db):
+    """Pages never skip or repeat documents, including created_at ties"""
+    base = datetime(2024, 1, 1)
+    for i in range(7):
+        await async_db.complaints.insert_one({
+            "_id": f"c{i}",
+            "citizen_id": "a@example.com",
+            "created_at": base + timedelta(minutes=i // 2)
+        })
+
+    seen, cursor = [], None
+    while True:
+        query = keyset_query({"citizen_id": "a@example.com"}, cursor)
+        page = await async_db.complaints.find(query).sort(KEYSET_SORT).limit(4).to_list(4)
+        seen += [doc["_id"] for doc in page[:3]]
+        if len(page) <= 3:
+            break
+        cursor = encode_cursor(page[2])
+
+    assert seen == ["c6", "c5", "c4", "c3", "c2", "c1", "c0"]
+
+def test_cursor_roundtrip_and_invalid_cursor():
+    doc = {"_id": "abc", "created_at": datetime(2024, 5, 6, 7, 8, 9, 123000)}
+    assert decode_cursor(encode_cursor(doc)) == (doc["created_at"], "abc")
+    with pytest.raises(InvalidCursorError):
+        keyset_query({}, "not-a-cursor")
+
+def test_complaint_projection_selects_listed_fields():
+    from routers.complaints import complaint_projection
+
+    projection = complaint_projection("title,ai_analysis.priority_score")
+    assert projection == {"title": 1, "ai_analysis.priority_score": 1, "created_at": 1}
+    assert complaint_projection("full") is None
+    assert "ai_analysis.analysis_text" not in complaint_projection(None)
+    # MongoDB rejects a path together with its parent; the parent wins
+    assert complaint_projection("ai_analysis,ai_analysis.priority_score") == {"ai_analysis": 1, "created_at": 1}
+
+def test_unknown_fields_are_rejected(test_client, api_app):
+    headers = auth_headers("admin@example.com", "admin")
+    response = test_client.get("/api/complaints/?fields=title,password", headers=headers)
+    assert response.status_code == 422
+    assert "password" in response.json()["detail"]
+    response = test_client.get("/api/complaints/?fields=ai_analysis,ai_analysis.priority_score", headers=headers)
+    assert response.status_code == 200
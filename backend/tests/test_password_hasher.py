@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+import utils.auth
+from utils.auth import PasswordHasher
+
+def bcrypt_context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+@pytest.fixture
+def fast_bcrypt(monkeypatch):
+    monkeypatch.setattr(utils.auth, "pwd_context", bcrypt_context(4))
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_the_event_loop(fast_bcrypt):
+    hasher = PasswordHasher(workers=2, max_pending=8)
+    hashed = await hasher.hash("secret")
+    assert await hasher.verify("secret", hashed) == (True, None)
+    assert await hasher.verify("wrong", hashed) == (False, None)
+    hasher.close()
+
+@pytest.mark.asyncio
+async def test_verify_rehashes_outdated_cost_factor(monkeypatch, fast_bcrypt):
+    hasher = PasswordHasher(workers=1)
+    hashed = await hasher.hash("secret")
+    monkeypatch.setattr(utils.auth, "pwd_context", bcrypt_context(5))
+
+    valid, new_hash = await hasher.verify("secret", hashed)
+    assert valid and new_hash.startswith("$2b$05$")
+    assert await hasher.verify("secret", new_hash) == (True, None)
+    hasher.close()
+
+@pytest.mark.asyncio
+async def test_queue_depth_limit_rejects_with_503(monkeypatch):
+    monkeypatch.setattr(utils.auth, "pwd_context", bcrypt_context(10))
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    running = asyncio.ensure_future(hasher.hash("secret"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc:
+        await hasher.hash("another")
+    assert exc.value.status_code == 503
+    assert hasher.rejected == 1
+
+    await running
+    assert hasher.pending == 0
+    hasher.close()
+
+def test_login_upgrades_stored_hash(monkeypatch, test_client, api_app, mock_db):
+    mock_db.users.insert_one({
+        "_id": "u1", "email": "old@example.com", "role": "citizen",
+        "hashed_password": bcrypt_context(4).hash("secret")
+    })
+    monkeypatch.setattr(utils.auth, "pwd_context", bcrypt_context(5))
+
+    response = test_client.post("/api/auth/token", data={"username": "old@example.com", "password": "secret"})
+    assert response.status_code == 200
+    assert mock_db.users.find_one({"_id": "u1"})["hashed_password"].startswith("$2b$05$")
@@ -0,0 +1,41 @@
+import json
+import pytest
+from datetime import datetime
+from bson import ObjectId
+import utils.responses
+from tests.conftest import auth_headers
+from utils.responses import MongoJSONResponse
+
+def test_mongo_json_response_encodes_documents():
+    body = MongoJSONResponse({
+        "_id": ObjectId("65f000000000000000000001"),
+        "created_at": datetime(2024, 5, 1, 9, 30, 0, 123000),
+        "status": "pending"
+    }).body
+    assert json.loads(body) == {
+        "_id": "65f000000000000000000001",
+        "created_at": "2024-05-01T09:30:00.123000",
+        "status": "pending"
+    }
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_list_endpoints_match_validated_output(monkeypatch, fast, test_client, api_app, mock_db):
+    monkeypatch.setattr(utils.responses, "FAST_JSON_RESPONSES", fast)
+    mock_db.complaints.insert_many([
+        {"_id": f"c{i}", "title": "Pothole", "district": "Gangtok", "citizen_id": "a@example.com",
+         "status": "pending", "created_at": datetime(2024, 5, 1, 9, i), "ai_analysis": {"priority_score": 0.5}}
+        for i in range(3)
+    ])
+    mock_db.users.insert_one({"_id": "u1", "email": "a@example.com", "name": "A", "role": "citizen",
+                              "hashed_password": "secret", "created_at": datetime(2024, 5, 1)})
+    admin = auth_headers("admin@example.com", "admin")
+
+    page = test_client.get("/api/complaints/", headers=admin).json()
+    assert [item["_id"] for item in page["items"]] == ["c2", "c1", "c0"]
+    assert page["items"][0]["created_at"] == "2024-05-01T09:02:00"
+    assert page["items"][0]["ai_analysis"] == {"priority_score": 0.5}
+    assert "resolution_eta" not in page["items"][0]
+
+    users = test_client.get("/api/users/", headers=admin).json()
+    assert users == [{"_id": "u1", "email": "a@example.com", "name": "A", "role": "citizen",
+                      "created_at": "2024-05-01T00:00:00"}]
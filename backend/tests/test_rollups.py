@@ -0,0 +1,60 @@
+import pytest
+from fastapi import status
+from tests.conftest import auth_headers
+from utils.rollups import ROLLUP_COLLECTION, get_rollups, reconcile_rollups
+
+COMPLAINT = {
+    "title": "No water supply",
+    "description": "Dry taps for three days",
+    "district": "Gangtok",
+    "location": "MG Marg",
+    "citizen_id": "a@example.com"
+}
+
+def test_create_and_update_move_rollup_counters(test_client, api_app, mock_db):
+    created = test_client.post("/api/complaints/", json=COMPLAINT).json()
+    test_client.post("/api/complaints/", json=dict(COMPLAINT, district="Namchi"))
+    assert mock_db[ROLLUP_COLLECTION].find_one({"_id": "UNASSIGNED|Gangtok|pending"})["count"] == 1
+
+    response = test_client.put(
+        f"/api/complaints/{created['_id']}",
+        params={"status": "resolved"},
+        headers=auth_headers("officer@example.com", "officer")
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "resolved"
+    assert mock_db[ROLLUP_COLLECTION].find_one({"_id": "UNASSIGNED|Gangtok|pending"})["count"] == 0
+    assert mock_db[ROLLUP_COLLECTION].find_one({"_id": "UNASSIGNED|Gangtok|resolved"})["count"] == 1
+
+    response = test_client.get("/api/analytics/rollups", headers=auth_headers("admin@example.com", "admin"))
+    data = response.json()
+    assert data["total"] == 2
+    assert data["by_status"] == {"pending": 1, "resolved": 1}
+    assert data["by_district"] == {"Gangtok": 1, "Namchi": 1}
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift(async_db, mock_db):
+    mock_db.complaints.insert_many([
+        {"_id": "a", "district": "Gangtok", "status": "pending", "department_id": "PHE_001"},
+        {"_id": "b", "district": "", "status": "pending"},
+    ])
+    mock_db[ROLLUP_COLLECTION].insert_one({"_id": "PHE_001|Gangtok|pending", "department_id": "PHE_001",
+                                           "district": "Gangtok", "status": "pending", "count": 5})
+
+    drift = await reconcile_rollups(async_db, dry_run=True)
+    assert {row["bucket"] for row in drift} == {"PHE_001|Gangtok|pending", "UNASSIGNED|Unknown|pending"}
+    assert mock_db[ROLLUP_COLLECTION].find_one({"_id": "PHE_001|Gangtok|pending"})["count"] == 5
+
+    await reconcile_rollups(async_db)
+    assert await reconcile_rollups(async_db, dry_run=True) == []
+    assert (await get_rollups(async_db))["by_department"] == {"PHE_001": 1, "UNASSIGNED": 1}
+
+@pytest.mark.asyncio
+async def test_reconcile_zeroes_stale_buckets_with_separators_in_their_values(async_db, mock_db):
+    mock_db[ROLLUP_COLLECTION].insert_one({"_id": "PWD_001|East|North|pending", "department_id": "PWD_001",
+                                           "district": "East|North", "status": "pending", "count": 2})
+
+    drift = await reconcile_rollups(async_db)
+    assert drift == [{"bucket": "PWD_001|East|North|pending", "stored": 2, "actual": 0}]
+    stale = mock_db[ROLLUP_COLLECTION].find_one({"_id": "PWD_001|East|North|pending"})
+    assert (stale["district"], stale["count"]) == ("East|North", 0)
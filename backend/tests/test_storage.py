@@ -0,0 +1,133 @@
+import io
+import os
+import pytest
+import routers.complaints
+from tests.conftest import auth_headers
+from utils.storage import (
+    LocalStorage, StorageBackend, UploadLimitMiddleware, UploadTooLargeError, key_stem, read_chunks
+)
+
+@pytest.mark.asyncio
+async def test_local_storage_streams_chunks(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/uploads")
+    url = await storage.save("c1.jpg", read_chunks(io.BytesIO(b"x" * 1000), max_bytes=1000, chunk_size=64))
+    assert url == "/uploads/c1.jpg"
+    assert (tmp_path / "c1.jpg").read_bytes() == b"x" * 1000
+
+    await storage.delete("c1.jpg")
+    assert not (tmp_path / "c1.jpg").exists()
+
+@pytest.mark.asyncio
+async def test_private_files_are_kept_outside_the_served_directory(tmp_path):
+    storage = LocalStorage(str(tmp_path / "public"), "/uploads", str(tmp_path / "private"))
+    assert await storage.save("c1.jpg", read_chunks(io.BytesIO(b"exif")), private=True) is None
+    assert await storage.read("c1.jpg", private=True) == b"exif"
+    assert not (tmp_path / "public").exists()
+
+    await storage.delete("c1.jpg", private=True)
+    assert not (tmp_path / "private" / "c1.jpg").exists()
+    assert LocalStorage(str(tmp_path / "uploads")).private_root == str(tmp_path / "uploads_private")
+
+@pytest.mark.asyncio
+async def test_oversized_upload_leaves_no_file(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    with pytest.raises(UploadTooLargeError):
+        await storage.save("big.jpg", read_chunks(io.BytesIO(b"x" * 1001), max_bytes=1000, chunk_size=64))
+    assert os.listdir(tmp_path) == []
+
+    with pytest.raises(ValueError):
+        storage.path("../escape.jpg")
+
+def test_upload_endpoint_stores_the_original_privately(monkeypatch, tmp_path, test_client, api_app, mock_db):
+    """The original keeps its EXIF, so only the processed rendition is ever linked"""
+    storage = LocalStorage(str(tmp_path / "public"), "/uploads", str(tmp_path / "private"))
+    processed = []
+
+    async def process(db, storage, complaint_id, key):
+        processed.append(key)
+
+    monkeypatch.setattr(routers.complaints, "get_storage", lambda: storage)
+    monkeypatch.setattr(routers.complaints, "process_complaint_image", process)
+    mock_db.complaints.insert_one({"_id": "c1", "citizen_id": "a@example.com"})
+    headers = auth_headers("a@example.com", "citizen")
+
+    response = test_client.post(
+        "/api/complaints/c1/image",
+        files={"file": ("photo.JPG", b"\xff\xd8image", "image/jpeg")},
+        headers=headers
+    )
+    assert response.status_code == 202
+    key, = processed
+    assert key.startswith("c1_") and key.endswith(".jpg") and key.count(".") == 1
+    assert (tmp_path / "private" / key).read_bytes() == b"\xff\xd8image"
+    assert not (tmp_path / "public").exists()
+    assert "image_url" not in mock_db.complaints.find_one({"_id": "c1"})
+
+    monkeypatch.setattr(routers.complaints, "UPLOAD_MAX_BYTES", 4)
+    monkeypatch.setattr(routers.complaints, "read_chunks", lambda file: read_chunks(file, max_bytes=4))
+    response = test_client.post(
+        "/api/complaints/c1/image",
+        files={"file": ("photo.jpg", b"\xff\xd8image", "image/jpeg")},
+        headers=headers
+    )
+    assert response.status_code == 413
+
+def test_upload_endpoint_only_accepts_images(monkeypatch, tmp_path, test_client, api_app, mock_db):
+    """HTML or SVG served from the API origin would be stored XSS"""
+    monkeypatch.setattr(routers.complaints, "get_storage", lambda: LocalStorage(str(tmp_path), "/uploads"))
+    mock_db.complaints.insert_one({"_id": "c1", "citizen_id": "a@example.com"})
+    headers = auth_headers("a@example.com", "citizen")
+
+    for name, content_type in [
+        ("page.html", "text/html"), ("logo.svg", "image/svg+xml"), ("photo.jpg", "text/html"), ("photo", "image/jpeg")
+    ]:
+        response = test_client.post(
+            "/api/complaints/c1/image", files={"file": (name, b"<script>alert(1)</script>", content_type)}, headers=headers
+        )
+        assert response.status_code == 415
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.asyncio
+async def test_upload_limit_applies_while_the_body_is_received():
+    """Chunked bodies without a Content-Length are cut off once over the limit"""
+    from fastapi import HTTPException
+
+    async def app(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+
+    messages = iter([{"type": "http.request", "body": b"x" * 60, "more_body": True}] * 2)
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/api/complaints/c1/image", "headers": []}
+    with pytest.raises(HTTPException) as error:
+        await UploadLimitMiddleware(app, max_bytes=100)(scope, receive, send)
+    assert error.value.status_code == 413
+
+    scope["headers"] = [(b"content-length", b"101")]
+    await UploadLimitMiddleware(app, max_bytes=100)(scope, receive, send)
+    assert sent[0]["status"] == 413
+
+    # Other routes are not limited
+    messages = iter([{"type": "http.request", "body": b"x" * 60, "more_body": True}] * 2 + [{"type": "http.request"}])
+    await UploadLimitMiddleware(app, max_bytes=100)(dict(scope, path="/api/complaints/bulk", headers=[]), receive, send)
+
+def test_key_stem_only_strips_image_extensions():
+    """Uploads without an extension keep their full, unique key"""
+    assert key_stem("c1_1712345678123456.jpg") == "c1_1712345678123456"
+    assert key_stem("c1_1712345678.123456") == "c1_1712345678.123456"
+    assert key_stem("c1_1712345678.654321") != key_stem("c1_1712345678.123456")
+
+def test_storage_backend_is_abstract():
+    class Incomplete(StorageBackend):
+        async def save(self, key, chunks, content_type=None):
+            return key
+
+    with pytest.raises(TypeError):
+        Incomplete()
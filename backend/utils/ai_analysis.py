@@ -1,52 +1,24 @@
 import os
+import json
 import logging
-from groq import Groq
-from typing import Dict, Tuple
+from utils.llm_client import get_llm_client
+from utils.analysis_batcher import AnalysisBatcher
+from utils.logging_config import log_payload
+from utils.analysis_parser import (
+    AnalysisResult, DEPARTMENT_MAPPING, DEPARTMENT_OFFICERS, ANALYSIS_ERROR_PREFIX,
+    parse_analysis, parse_analysis_fields
+)
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Groq client
+# Groq credentials (the pooled async client is created lazily by utils.llm_client)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     logger.error("GROQ_API_KEY is not set in environment variables")
     raise ValueError("GROQ_API_KEY is required")
 
-groq_client = Groq(api_key=GROQ_API_KEY)
-
-# Department name to ID mapping
-DEPARTMENT_MAPPING = {
-    "Land Revenue and Disaster Management Department": "LAND_001",
-    "Health & Family Welfare Department": "HEALTH_001",
-    "Human Resource Development Department": "HRD_001",
-    "Energy & Power Department": "ENERGY_001",
-    "Public Health Engineering Department": "PHE_001",
-    "Transport Department": "TRANS_001",
-    "Roads & Bridges Department": "ROADS_001",
-    "Rural Management & Development Department": "RURAL_001",
-    "Urban Development & Housing Department": "URBAN_001",
-    "Forest, Environment & Wildlife Management Department": "FOREST_001",
-    "Tourism & Civil Aviation Department": "TOURISM_001",
-    "Excise Department": "EXCISE_001"
-}
-# Department name to Officer name mapping
-DEPARTMENT_OFFICERS = {
-    "Land Revenue and Disaster Management Department": ["Tenzing Bhutia – Senior Land Records Officer", "Mina Subba – Disaster Risk Management Coordinator"],
-    "Health & Family Welfare Department": ["Dr. Pema Lepcha – Chief Medical Officer", "Rinchen Gurung – Family Welfare Program Officer"],
-    "Human Resource Development Department": ["Karma Tamang – Education Policy Officer", "Anita Chettri – HRD Program Manager"],
-    "Energy & Power Department": ["Sonam Sherpa – Electrical Grid Supervisor", "Dipen Rai – Renewable Energy Project Lead"],
-    "Public Health Engineering Department": ["Dawa Bhutia – Sanitation Infrastructure Officer", "Sunita Pradhan – Rural Water Supply Engineer"],
-    "Transport Department": ["Raju Moktan – Regional Transport Officer", "Tshering Lhamu – Traffic and Safety Analyst"],
-    "Roads & Bridges Department": ["Nima Lepcha – Structural Engineer", "Bikash Kharel – Highway Maintenance Officer"],
-    "Rural Management & Development Department": ["Puspa Thapa – Rural Project Coordinator", "Dorjee Bhutia – Community Development Officer"],
-    "Urban Development & Housing Department": ["Rinzin Ongmu – Urban Planning Officer", "Sanjay Rai – Housing Welfare Manager"],
-    "Forest, Environment & Wildlife Management Department": ["Tashi Norbu – Wildlife Conservation Officer", "Meena Gurung – Environmental Monitoring Analyst"],
-    "Tourism & Civil Aviation Department": ["Sonam Lhamu – Tourism Operations Director", "Dichen Rai – Civil Aviation Liaison Officer"],
-    "Excise Department": ["Bikram Subba – Excise Control Officer", "Lhamu Tamang – Licensing and Enforcement Officer"]
-}
-
 SYSTEM_PROMPT = """You are an AI assistant that analyzes citizen complaints and provides structured analysis.
 Your responses must be extremely concise and actionable.
 
@@ -58,154 +30,155 @@ For each complaint, provide:
 
 Keep all responses brief and focused."""
 
-async def analyze_complaint_text(complaint: Dict) -> Tuple[str, float, str]:
-    """
-    Analyze complaint text using Groq LLM to determine department and priority.
-    
-    Args:
-        complaint: Dictionary containing complaint details
-        
-    Returns:
-        Tuple of (department_id, priority_score, analysis_text)
-    """
-    try:
-        logger.info(f"Starting analysis for complaint: {complaint.get('_id', 'N/A')}")
-        
-        prompt = f"""
-Complaint Title: {complaint['title']}
+# Department and officer roster included in every analysis prompt
+DEPARTMENT_ROSTER = "\n\n".join(
+    f"- {department}\n" + "\n".join(f"   - {officer}" for officer in officers)
+    for department, officers in DEPARTMENT_OFFICERS.items()
+)
+
+# Micro-batching settings (ANALYSIS_BATCH_SIZE=1 disables batching)
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "8"))
+ANALYSIS_BATCH_WINDOW = float(os.getenv("ANALYSIS_BATCH_WINDOW", "0.05"))  # seconds
+
+def format_complaint(complaint: Dict) -> str:
+    return f"""Complaint Title: {complaint['title']}
 Description: {complaint['description']}
 Location: {complaint['location']}
-District: {complaint.get('district', 'N/A')}
+District: {complaint.get('district', 'N/A')}"""
 
-Analyze this complaint and provide a structured response with these exact sections:
+async def analyze_single_complaint(complaint: Dict) -> AnalysisResult:
+    """
+    Analyze one complaint with its own LLM call in JSON mode.
 
-Department: [Select ONE most appropriate department]
-Priority: [Score 1-10]
-Analysis: [One sentence about the issue and its impact]
-Officer: [Recommend ONE specific officer from the department and explain why they are best suited]
+    Raises on API errors or responses that cannot be repaired.
+    """
+    prompt = f"""
+{format_complaint(complaint)}
 
 Available Departments and Officers:
 
-- Land Revenue and Disaster Management Department
-   - Tenzing Bhutia – Senior Land Records Officer
-   - Mina Subba – Disaster Risk Management Coordinator
-
-- Health & Family Welfare Department
-   - Dr. Pema Lepcha – Chief Medical Officer
-   - Rinchen Gurung – Family Welfare Program Officer
+{DEPARTMENT_ROSTER}
 
-- Human Resource Development Department
-   - Karma Tamang – Education Policy Officer
-   - Anita Chettri – HRD Program Manager
+Respond with ONLY a JSON object in exactly this shape:
+{{"department": "<Full department name>", "priority": <1-10>, "analysis": "<One sentence about the issue and its impact>", "officer": "<Specific officer name and title> should handle this case because <brief reason>"}}"""
 
-- Energy & Power Department
-   - Sonam Sherpa – Electrical Grid Supervisor
-   - Dipen Rai – Renewable Energy Project Lead
-
-- Public Health Engineering Department
-   - Dawa Bhutia – Sanitation Infrastructure Officer
-   - Sunita Pradhan – Rural Water Supply Engineer
+    try:
+        logger.info("Attempting to call Groq API...")
+        # Call Groq API through the shared async client (pooled, bounded, with timeout)
+        raw_response = await get_llm_client().complete(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=1000,
+            response_format={"type": "json_object"}
+        )
+        log_payload(logger, "Raw Groq API response", raw_response)
+        return parse_analysis(raw_response)
+        
+    except Exception as api_error:
+        logger.error(f"Error calling Groq API: {str(api_error)}")
+        raise
 
-- Transport Department
-   - Raju Moktan – Regional Transport Officer
-   - Tshering Lhamu – Traffic and Safety Analyst
+async def analyze_complaint_batch(complaints: List[Dict]) -> List[Optional[AnalysisResult]]:
+    """
+    Analyze several complaints with a single LLM call, sending the roster once.
 
-- Roads & Bridges Department
-   - Nima Lepcha – Structural Engineer
-   - Bikash Kharel – Highway Maintenance Officer
+    Returns:
+        One AnalysisResult per complaint, or None for items missing or
+        malformed in the response
+    """
+    items = "\n\n".join(
+        f"[{i}]\n{format_complaint(complaint)}" for i, complaint in enumerate(complaints, start=1)
+    )
+    prompt = f"""
+Analyze each of the following {len(complaints)} complaints independently.
 
-- Rural Management & Development Department
-   - Puspa Thapa – Rural Project Coordinator
-   - Dorjee Bhutia – Community Development Officer
+{items}
 
-- Urban Development & Housing Department
-   - Rinzin Ongmu – Urban Planning Officer
-   - Sanjay Rai – Housing Welfare Manager
+Available Departments and Officers:
 
-- Forest, Environment & Wildlife Management Department
-    - Tashi Norbu – Wildlife Conservation Officer
-    - Meena Gurung – Environmental Monitoring Analyst
+{DEPARTMENT_ROSTER}
+
+Respond with ONLY a JSON object whose "results" array contains exactly one object per complaint:
+{{"results": [{{"id": <complaint number>, "department": "<Full department name>", "priority": <1-10>, "analysis": "<One sentence analysis>", "officer": "<Specific officer name and title> should handle this case because <brief reason>"}}]}}"""
+
+    logger.info(f"Attempting batched Groq API call for {len(complaints)} complaints...")
+    raw_response = await get_llm_client().complete(
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1,
+        max_tokens=250 * len(complaints),
+        response_format={"type": "json_object"}
+    )
+    log_payload(logger, "Raw batched Groq API response", raw_response)
+
+    start, end = raw_response.find("{"), raw_response.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("Batched response did not contain a JSON object")
+    parsed = json.loads(raw_response[start:end + 1])
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("results"), list):
+        raise ValueError("Batched response did not contain a results array")
+
+    results: List[Optional[AnalysisResult]] = [None] * len(complaints)
+    for item in parsed["results"]:
+        try:
+            index = int(item["id"]) - 1
+            if 0 <= index < len(complaints):
+                results[index] = parse_analysis_fields(
+                    {str(key).lower(): value for key, value in item.items()}
+                )
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Skipping malformed batch item {item}: {str(e)}")
+    return results
+
+_batcher: Optional[AnalysisBatcher] = None
+
+def get_analysis_batcher() -> AnalysisBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = AnalysisBatcher(
+            analyze_batch=analyze_complaint_batch,
+            analyze_single=analyze_single_complaint,
+            max_size=ANALYSIS_BATCH_SIZE,
+            window=ANALYSIS_BATCH_WINDOW
+        )
+    return _batcher
 
-- Tourism & Civil Aviation Department
-    - Sonam Lhamu – Tourism Operations Director
-    - Dichen Rai – Civil Aviation Liaison Officer
+async def analyze_complaint_result(complaint: Dict) -> AnalysisResult:
+    """
+    Analyze a complaint and return the parsed, structured result.
 
-- Excise Department
-    - Bikram Subba – Excise Control Officer
-    - Lhamu Tamang – Licensing and Enforcement Officer
+    Complaints arriving within ANALYSIS_BATCH_WINDOW are grouped into a
+    single LLM call of up to ANALYSIS_BATCH_SIZE items.
 
-Format your response exactly as shown below:
-Department: [Full department name]
-Priority: [1-10]
-Analysis: [One sentence analysis]
-Officer: [Specific officer name and title] should handle this case because [brief reason]"""
+    Raises on API errors or unusable responses so callers can retry.
+    """
+    logger.info(f"Starting analysis for complaint: {complaint.get('_id', 'N/A')}")
+    if ANALYSIS_BATCH_SIZE > 1:
+        return await get_analysis_batcher().submit(complaint)
+    return await analyze_single_complaint(complaint)
 
-        try:
-            logger.info("Attempting to call Groq API...")
-            # Call Groq API with timeout
-            completion = groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000,
-                timeout=60
-            )
-            
-            # Get raw response
-            raw_response = completion.choices[0].message.content
-            logger.info(f"Raw Groq API response: {raw_response}")
-            
-            # Parse response
-            lines = raw_response.strip().split('\n')
-            if len(lines) < 4:  # Updated to check for 4 sections instead of 5
-                logger.error(f"Incomplete response from Groq API: {raw_response}")
-                raise ValueError(f"Incomplete response from Groq API: {raw_response}")
-            
-            # Extract department name and get ID
-            department_line = next((line for line in lines if line.startswith("Department:")), "")
-            department_name = department_line.split(": ")[1].strip() if department_line else "Public Health Engineering Department"
-            department_id = DEPARTMENT_MAPPING.get(department_name, "PHE_001")
-            
-            # Extract priority score
-            priority_line = next((line for line in lines if line.startswith("Priority:")), "")
-            try:
-                priority_score = float(priority_line.split(": ")[1].strip()) / 10.0 if priority_line else 0.5
-            except (ValueError, IndexError) as e:
-                logger.error(f"Error parsing priority score: {str(e)}")
-                priority_score = 0.5
-            
-            # Return the raw response as analysis text
-            return department_id, priority_score, raw_response
-            
-        except Exception as api_error:
-            logger.error(f"Error calling Groq API: {str(api_error)}")
-            raise
+async def analyze_complaint_text(complaint: Dict) -> Tuple[str, float, str]:
+    """
+    Analyze complaint text using Groq LLM to determine department and priority.
+    
+    Args:
+        complaint: Dictionary containing complaint details
+        
+    Returns:
+        Tuple of (department_id, priority_score, analysis_text)
+    """
+    try:
+        return (await analyze_complaint_result(complaint)).as_tuple()
             
     except Exception as e:
         logger.error(f"Error in analyze_complaint_text: {str(e)}")
         return (
             "PHE_001",
             0.5,
-            f"Error during AI analysis: {str(e)}. Please try again or contact support if the issue persists."
+            f"{ANALYSIS_ERROR_PREFIX}: {str(e)}. Please try again or contact support if the issue persists."
         )
-
-async def analyze_complaint_image(image_url: str) -> Dict:
-    """
-    Analyze complaint image using BLIP model (placeholder for future implementation).
-    
-    Args:
-        image_url: URL of the complaint image
-        
-    Returns:
-        Dictionary containing image analysis results
-    """
-    logger.info(f"Image analysis requested for URL: {image_url}")
-    # TODO: Implement image analysis using BLIP model
-    return {
-        "objects_detected": [],
-        "scene_description": "Image analysis not implemented yet",
-        "severity_score": 0.5
-    } 
\ No newline at end of file
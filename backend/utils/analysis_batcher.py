@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from utils.analysis_parser import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+BatchAnalyzer = Callable[[List[Dict]], Awaitable[List[Optional[AnalysisResult]]]]
+SingleAnalyzer = Callable[[Dict], Awaitable[AnalysisResult]]
+
+
+class AnalysisBatcher:
+    """
+    Collects complaints submitted within a short window and analyzes them
+    together, fanning the per-item results back out to the waiting callers.
+
+    A batch is flushed when it reaches max_size or when the window elapses
+    after its first item. Items the batch response does not cover, or every
+    item of a batch whose response is malformed, are re-analyzed
+    individually. Transport errors, timeouts and an open circuit breaker are
+    passed to every waiting caller instead, so an outage costs one call per
+    batch rather than one per item.
+    """
+
+    def __init__(
+        self,
+        analyze_batch: BatchAnalyzer,
+        analyze_single: SingleAnalyzer,
+        max_size: int,
+        window: float
+    ):
+        self.analyze_batch = analyze_batch
+        self.analyze_single = analyze_single
+        self.max_size = max_size
+        self.window = window
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, complaint: Dict) -> AnalysisResult:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((complaint, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        complaints = [complaint for complaint, _ in batch]
+        results: List[Optional[AnalysisResult]] = [None] * len(batch)
+
+        if len(batch) > 1:
+            try:
+                results = await self.analyze_batch(complaints)
+            except ValueError as e:
+                # AnalysisParseError and JSON decoding errors: the provider answered badly
+                logger.error(f"Batched analysis of {len(batch)} complaints was malformed, falling back: {str(e)}")
+            except Exception as e:
+                logger.error(f"Batched analysis of {len(batch)} complaints failed: {str(e)}")
+                self._resolve(batch, [e] * len(batch))
+                return
+
+        fallback = [i for i, result in enumerate(results) if result is None]
+        if fallback and len(batch) > 1:
+            logger.warning(f"Re-analyzing {len(fallback)} of {len(batch)} complaints individually")
+        singles = await asyncio.gather(
+            *(self.analyze_single(complaints[i]) for i in fallback),
+            return_exceptions=True
+        )
+        for i, result in zip(fallback, singles):
+            results[i] = result
+        self._resolve(batch, results)
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[Dict, asyncio.Future]], results: List) -> None:
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,136 @@
+import os
+import re
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache settings
+CACHE_COLLECTION = "analysis_cache"
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "86400"))  # seconds
+
+CACHE_KEY_FIELDS = ("title", "description", "location", "district")
+
+_whitespace = re.compile(r"\s+")
+_punctuation = re.compile(r"[^\w\s]")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    value = _punctuation.sub(" ", (value or "").lower())
+    return _whitespace.sub(" ", value).strip()
+
+
+def complaint_cache_key(complaint: Dict) -> str:
+    """Hash the normalized title, description, location and district of a complaint"""
+    normalized = "\x1f".join(normalize_text(complaint.get(field)) for field in CACHE_KEY_FIELDS)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of LLM analysis results keyed on complaint content.
+
+    The first tier is an in-process LRU with TTL; the second is a Mongo
+    collection shared by every worker. A persistent hit is promoted into
+    the local tier.
+    """
+
+    def __init__(self, max_size: int = ANALYSIS_CACHE_SIZE, ttl: int = ANALYSIS_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _get_local(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Dict, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, db, complaint: Dict) -> Optional[Dict]:
+        """
+        Look up a cached analysis for a complaint.
+
+        Returns:
+            The cached AnalysisResult fields as a dict, or None
+        """
+        key = complaint_cache_key(complaint)
+        value = self._get_local(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        try:
+            doc = await db[CACHE_COLLECTION].find_one({
+                "_id": key,
+                "expires_at": {"$gt": datetime.utcnow()}
+            })
+        except Exception as e:
+            logger.error(f"Error reading analysis cache: {str(e)}")
+            doc = None
+
+        if doc:
+            self.persistent_hits += 1
+            value = doc["analysis"]
+            remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+            self._set_local(key, value, min(remaining, self.ttl))
+            return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, db, complaint: Dict, analysis: Dict) -> None:
+        """Store an analysis result in both tiers"""
+        key = complaint_cache_key(complaint)
+        self._set_local(key, analysis, self.ttl)
+        now = datetime.utcnow()
+        try:
+            await db[CACHE_COLLECTION].update_one(
+                {"_id": key},
+                {"$set": {
+                    "analysis": analysis,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error writing analysis cache: {str(e)}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        hits = self.memory_hits + self.persistent_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl
+        }
+
+
+analysis_cache = AnalysisCache()
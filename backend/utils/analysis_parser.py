@@ -0,0 +1,171 @@
+import re
+import json
+import logging
+from pydantic import BaseModel
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Department name to ID mapping (re-exported by utils.ai_analysis)
+DEPARTMENT_MAPPING = {
+    "Land Revenue and Disaster Management Department": "LAND_001",
+    "Health & Family Welfare Department": "HEALTH_001",
+    "Human Resource Development Department": "HRD_001",
+    "Energy & Power Department": "ENERGY_001",
+    "Public Health Engineering Department": "PHE_001",
+    "Transport Department": "TRANS_001",
+    "Roads & Bridges Department": "ROADS_001",
+    "Rural Management & Development Department": "RURAL_001",
+    "Urban Development & Housing Department": "URBAN_001",
+    "Forest, Environment & Wildlife Management Department": "FOREST_001",
+    "Tourism & Civil Aviation Department": "TOURISM_001",
+    "Excise Department": "EXCISE_001"
+}
+DEPARTMENT_NAMES = {department_id: name for name, department_id in DEPARTMENT_MAPPING.items()}
+
+# Department name to Officer name mapping (re-exported by utils.ai_analysis)
+DEPARTMENT_OFFICERS = {
+    "Land Revenue and Disaster Management Department": ["Tenzing Bhutia – Senior Land Records Officer", "Mina Subba – Disaster Risk Management Coordinator"],
+    "Health & Family Welfare Department": ["Dr. Pema Lepcha – Chief Medical Officer", "Rinchen Gurung – Family Welfare Program Officer"],
+    "Human Resource Development Department": ["Karma Tamang – Education Policy Officer", "Anita Chettri – HRD Program Manager"],
+    "Energy & Power Department": ["Sonam Sherpa – Electrical Grid Supervisor", "Dipen Rai – Renewable Energy Project Lead"],
+    "Public Health Engineering Department": ["Dawa Bhutia – Sanitation Infrastructure Officer", "Sunita Pradhan – Rural Water Supply Engineer"],
+    "Transport Department": ["Raju Moktan – Regional Transport Officer", "Tshering Lhamu – Traffic and Safety Analyst"],
+    "Roads & Bridges Department": ["Nima Lepcha – Structural Engineer", "Bikash Kharel – Highway Maintenance Officer"],
+    "Rural Management & Development Department": ["Puspa Thapa – Rural Project Coordinator", "Dorjee Bhutia – Community Development Officer"],
+    "Urban Development & Housing Department": ["Rinzin Ongmu – Urban Planning Officer", "Sanjay Rai – Housing Welfare Manager"],
+    "Forest, Environment & Wildlife Management Department": ["Tashi Norbu – Wildlife Conservation Officer", "Meena Gurung – Environmental Monitoring Analyst"],
+    "Tourism & Civil Aviation Department": ["Sonam Lhamu – Tourism Operations Director", "Dichen Rai – Civil Aviation Liaison Officer"],
+    "Excise Department": ["Bikram Subba – Excise Control Officer", "Lhamu Tamang – Licensing and Enforcement Officer"]
+}
+
+# Prefix of the analysis text returned when the LLM call fails
+ANALYSIS_ERROR_PREFIX = "Error during AI analysis"
+
+DEFAULT_PRIORITY = 0.5
+NO_OFFICER_RECOMMENDATION = "No specific officer recommendation provided."
+
+
+class AnalysisParseError(ValueError):
+    """Raised when an LLM response cannot be repaired into an analysis"""
+
+
+class AnalysisResult(BaseModel):
+    """Structured analysis of one complaint, parsed once and shared by every layer"""
+    department_id: str
+    department_name: str
+    priority_score: float
+    analysis: str
+    officer_recommendation: str
+
+    @property
+    def analysis_text(self) -> str:
+        """Line format stored in ai_analyses and shown in the UI"""
+        return format_analysis_text(
+            self.department_name,
+            round(self.priority_score * 10, 1),
+            self.analysis,
+            self.officer_recommendation
+        )
+
+    def as_tuple(self) -> Tuple[str, float, str]:
+        return self.department_id, self.priority_score, self.analysis_text
+
+
+def format_analysis_text(department_name: str, priority: float, analysis: str, officer: str) -> str:
+    return f"Department: {department_name}\nPriority: {priority:g}\nAnalysis: {analysis}\nOfficer: {officer}"
+
+
+def _normalize_department(name: str) -> str:
+    name = name.lower().replace("&", " and ")
+    return re.sub(r"[^a-z0-9]", "", name)
+
+
+_normalized_departments = {_normalize_department(name): name for name in DEPARTMENT_MAPPING}
+
+
+def resolve_department(value: str) -> Optional[str]:
+    """Map a department name or ID, tolerating case, punctuation and extra words"""
+    value = (value or "").strip().strip("*[]\"'.")
+    if value in DEPARTMENT_MAPPING:
+        return value
+    if value.upper() in DEPARTMENT_NAMES:
+        return DEPARTMENT_NAMES[value.upper()]
+
+    normalized = _normalize_department(value)
+    if len(normalized) < 5:
+        return None
+    if normalized in _normalized_departments:
+        return _normalized_departments[normalized]
+    for key, name in _normalized_departments.items():
+        if key in normalized or normalized in key.replace("department", ""):
+            return name
+    return None
+
+
+def parse_priority(value) -> float:
+    """Turn '8', 8, '8/10', '8 (high)' or '0.8' into a 0-1 score"""
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        match = re.search(r"\d+(?:\.\d+)?", str(value or ""))
+        if not match:
+            return DEFAULT_PRIORITY
+        number = float(match.group())
+    score = number if number <= 1 and not float(number).is_integer() else number / 10.0
+    return min(max(score, 0.0), 1.0)
+
+
+_field = re.compile(r"^(department|priority|analysis|officer)\s*[:\-–]\s*(.*)$", re.IGNORECASE)
+_line_noise = re.compile(r"^[\s>#*\-•\d.)]*")
+
+
+def _fields_from_json(raw: str) -> Optional[Dict]:
+    start, end = raw.find("{"), raw.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(raw[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return {str(key).lower(): value for key, value in data.items()} if isinstance(data, dict) else None
+
+
+def _fields_from_lines(raw: str) -> Dict:
+    fields = {}
+    for line in raw.splitlines():
+        line = _line_noise.sub("", line).replace("**", "").replace("__", "").strip()
+        match = _field.match(line)
+        if match and match.group(1).lower() not in fields:
+            fields[match.group(1).lower()] = match.group(2).strip()
+    return fields
+
+
+def parse_analysis_fields(fields: Dict) -> AnalysisResult:
+    """Build a result from department/priority/analysis/officer fields"""
+    department_name = resolve_department(str(fields.get("department") or ""))
+    if not department_name:
+        raise AnalysisParseError(f"Unrecognized department: {fields.get('department')!r}")
+    return AnalysisResult(
+        department_id=DEPARTMENT_MAPPING[department_name],
+        department_name=department_name,
+        priority_score=parse_priority(fields.get("priority")),
+        analysis=str(fields.get("analysis") or "").strip(),
+        officer_recommendation=str(fields.get("officer") or "").strip() or NO_OFFICER_RECOMMENDATION
+    )
+
+
+def parse_analysis(raw: str) -> AnalysisResult:
+    """
+    Parse an LLM response into an AnalysisResult.
+
+    JSON output is preferred; otherwise the line format is repaired by
+    dropping markdown bullets and emphasis and matching keys case-insensitively.
+
+    Raises:
+        AnalysisParseError: if no known department can be recovered
+    """
+    fields = _fields_from_json(raw)
+    if fields is None or "department" not in fields:
+        fields = _fields_from_lines(raw)
+    return parse_analysis_fields(fields)
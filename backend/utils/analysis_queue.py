@@ -0,0 +1,388 @@
+import os
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from utils.logging_config import correlation_id
+from utils.metrics import analysis_jobs, analysis_queue_jobs
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, RetryBudget, llm_breaker, llm_retry_budget
+
+logger = logging.getLogger(__name__)
+
+# Queue settings
+QUEUE_COLLECTION = "analysis_jobs"
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))  # per process; run.py divides a host budget
+# Jobs a worker claims per poll and runs together, so their LLM calls can share a micro-batch
+ANALYSIS_CLAIM_SIZE = int(os.getenv("ANALYSIS_CLAIM_SIZE", os.getenv("ANALYSIS_BATCH_SIZE", "8")))
+ANALYSIS_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", "3"))
+ANALYSIS_LEASE_SECONDS = int(os.getenv("ANALYSIS_LEASE_SECONDS", "120"))
+ANALYSIS_HEARTBEAT_SECONDS = float(os.getenv("ANALYSIS_HEARTBEAT_SECONDS", str(ANALYSIS_LEASE_SECONDS / 3)))
+ANALYSIS_JOB_RETENTION_SECONDS = int(os.getenv("ANALYSIS_JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))  # done jobs
+ANALYSIS_POLL_INTERVAL = float(os.getenv("ANALYSIS_POLL_INTERVAL", "1.0"))
+ANALYSIS_RETRY_DELAY = int(os.getenv("ANALYSIS_RETRY_DELAY", "2"))  # seconds
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_LEASED = "leased"
+JOB_DONE = "done"
+JOB_DEAD = "dead"
+
+JobHandler = Callable[[object, str], Awaitable[None]]
+DeadLetterHandler = Callable[[object, str, str, int], Awaitable[None]]
+DeferredHandler = Callable[[object, str, str], Awaitable[None]]
+
+
+def new_job(complaint_id: str, max_attempts: int = ANALYSIS_MAX_ATTEMPTS) -> Dict:
+    """A queued analysis job document for a complaint"""
+    now = datetime.utcnow()
+    return {
+        "_id": str(ObjectId()),
+        "complaint_id": complaint_id,
+        "status": JOB_QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "available_at": now,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+async def enqueue_analysis(db, complaint_id: str, max_attempts: int = ANALYSIS_MAX_ATTEMPTS) -> Dict:
+    """
+    Add an analysis job for a complaint to the queue collection.
+
+    Args:
+        db: Motor database handle
+        complaint_id: ID of the complaint to analyze
+        max_attempts: Attempts allowed before the job is dead-lettered
+
+    Returns:
+        The inserted job document
+    """
+    job = new_job(complaint_id, max_attempts)
+    await db[QUEUE_COLLECTION].insert_one(job)
+    return job
+
+
+async def enqueue_analyses(db, complaint_ids: List[str], max_attempts: int = ANALYSIS_MAX_ATTEMPTS) -> List[Dict]:
+    """Add analysis jobs for several complaints with a single insert"""
+    jobs = [new_job(complaint_id, max_attempts) for complaint_id in complaint_ids]
+    if jobs:
+        await db[QUEUE_COLLECTION].insert_many(jobs, ordered=False)
+    return jobs
+
+
+async def claim_job(db, worker_id: str, lease_seconds: int = ANALYSIS_LEASE_SECONDS) -> Optional[Dict]:
+    """
+    Atomically lease the oldest available job.
+
+    A job is available when it is queued and due, or when a previous
+    worker's lease has expired without the job being completed.
+    """
+    now = datetime.utcnow()
+    return await db[QUEUE_COLLECTION].find_one_and_update(
+        {
+            "$or": [
+                {"status": JOB_QUEUED, "available_at": {"$lte": now}},
+                {"status": JOB_LEASED, "lease_expires_at": {"$lt": now}}
+            ]
+        },
+        {
+            "$set": {
+                "status": JOB_LEASED,
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def renew_lease(db, job: Dict, lease_seconds: int = ANALYSIS_LEASE_SECONDS) -> bool:
+    """
+    Extend the lease of a job that is still being processed.
+
+    Returns:
+        False if the lease was lost to another worker
+    """
+    now = datetime.utcnow()
+    result = await db[QUEUE_COLLECTION].update_one(
+        {"_id": job["_id"], "status": JOB_LEASED, "lease_owner": job["lease_owner"]},
+        {"$set": {
+            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+            "updated_at": now
+        }}
+    )
+    return result.matched_count == 1
+
+
+async def complete_job(db, job: Dict) -> None:
+    """Mark a leased job as done; the TTL index on completed_at purges it later"""
+    now = datetime.utcnow()
+    await db[QUEUE_COLLECTION].update_one(
+        {"_id": job["_id"], "lease_owner": job["lease_owner"]},
+        {"$set": {
+            "status": JOB_DONE,
+            "lease_expires_at": None,
+            "completed_at": now,
+            "updated_at": now
+        }}
+    )
+
+
+async def fail_job(db, job: Dict, error: str, retry_delay: int = ANALYSIS_RETRY_DELAY) -> bool:
+    """
+    Record a failed attempt, either rescheduling the job with exponential
+    backoff or moving it to the dead-letter state.
+
+    Returns:
+        True if the job was dead-lettered
+    """
+    now = datetime.utcnow()
+    dead = job["attempts"] >= job.get("max_attempts", ANALYSIS_MAX_ATTEMPTS)
+    update = {
+        "status": JOB_DEAD if dead else JOB_QUEUED,
+        "last_error": error,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "updated_at": now
+    }
+    if not dead:
+        update["available_at"] = now + timedelta(seconds=retry_delay * (2 ** (job["attempts"] - 1)))
+    await db[QUEUE_COLLECTION].update_one(
+        {"_id": job["_id"], "lease_owner": job["lease_owner"]},
+        {"$set": update}
+    )
+    return dead
+
+
+async def defer_job(db, job: Dict, error: str, delay: float) -> None:
+    """
+    Put a job back on the queue without counting the attempt, e.g. because
+    the LLM circuit breaker was open and the provider was never called.
+    """
+    now = datetime.utcnow()
+    await db[QUEUE_COLLECTION].update_one(
+        {"_id": job["_id"], "lease_owner": job["lease_owner"]},
+        {
+            "$set": {
+                "status": JOB_QUEUED,
+                "last_error": error,
+                "available_at": now + timedelta(seconds=delay),
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": now
+            },
+            "$inc": {"attempts": -1, "deferrals": 1}
+        }
+    )
+
+
+async def requeue_dead_jobs(db) -> int:
+    """Move every dead-lettered job back to the queue with a fresh attempt count"""
+    now = datetime.utcnow()
+    result = await db[QUEUE_COLLECTION].update_many(
+        {"status": JOB_DEAD},
+        {"$set": {
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "available_at": now,
+            "updated_at": now
+        }}
+    )
+    return result.modified_count
+
+
+async def count_jobs(db) -> Dict[str, int]:
+    """Job counts per state, each answered from the status-prefixed claim index"""
+    states = [JOB_QUEUED, JOB_LEASED, JOB_DONE, JOB_DEAD]
+    counts = await asyncio.gather(
+        *(db[QUEUE_COLLECTION].count_documents({"status": state}) for state in states)
+    )
+    return dict(zip(states, counts))
+
+
+async def get_queue_stats(db) -> Dict:
+    """Return job counts per state, retry totals and the most recent dead letters"""
+    counts = await count_jobs(db)
+    retries = 0
+    deferrals = 0
+    async for row in db[QUEUE_COLLECTION].aggregate([
+        {"$group": {
+            "_id": None,
+            "retries": {"$sum": {"$max": [{"$subtract": ["$attempts", 1]}, 0]}},
+            "deferrals": {"$sum": {"$ifNull": ["$deferrals", 0]}}
+        }}
+    ]):
+        retries += row["retries"]
+        deferrals += row["deferrals"]
+
+    dead_letters = await db[QUEUE_COLLECTION].find(
+        {"status": JOB_DEAD},
+        {"complaint_id": 1, "attempts": 1, "last_error": 1, "updated_at": 1}
+    ).sort("updated_at", -1).to_list(20)
+
+    return {
+        "counts": counts,
+        "retries": retries,
+        "deferrals": deferrals,
+        "dead_letters": dead_letters
+    }
+
+
+async def collect_queue_metrics(db) -> None:
+    """Refresh the per-state queue depth gauge before a metrics scrape"""
+    for state, count in (await count_jobs(db)).items():
+        analysis_queue_jobs.set(count, status=state)
+
+
+class AnalysisWorkerPool:
+    """
+    Pool of asyncio tasks that claim analysis jobs and run them with leases.
+    Each worker claims up to claim_size jobs per poll and runs their
+    handlers concurrently, which lets the analyses be grouped into one LLM
+    batch. A heartbeat extends each lease while its handler runs, so slow
+    analyses are not claimed a second time.
+
+    Jobs rejected by the open circuit breaker, or whose retry would exceed
+    the global retry budget, are deferred instead of retried: the complaint
+    gets the error analysis state right away and the job is re-analyzed
+    automatically once the provider is reachable again.
+    """
+
+    def __init__(
+        self,
+        db,
+        handler: JobHandler,
+        on_dead_letter: Optional[DeadLetterHandler] = None,
+        on_deferred: Optional[DeferredHandler] = None,
+        concurrency: int = ANALYSIS_WORKERS,
+        claim_size: int = ANALYSIS_CLAIM_SIZE,
+        poll_interval: float = ANALYSIS_POLL_INTERVAL,
+        heartbeat_interval: float = ANALYSIS_HEARTBEAT_SECONDS,
+        breaker: CircuitBreaker = llm_breaker,
+        retry_budget: RetryBudget = llm_retry_budget
+    ):
+        self.db = db
+        self.handler = handler
+        self.on_dead_letter = on_dead_letter
+        self.on_deferred = on_deferred
+        self.breaker = breaker
+        self.retry_budget = retry_budget
+        self.concurrency = concurrency
+        self.claim_size = max(1, claim_size)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    def start(self) -> None:
+        self._stopping.clear()
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._run(f"{prefix}-{i}")))
+        logger.info(f"Started {self.concurrency} analysis workers")
+
+    def notify(self) -> None:
+        """Wake idle workers after a job has been enqueued"""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Stopped analysis workers")
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def run_once(self, worker_id: str) -> bool:
+        """Claim up to claim_size jobs and process them together. Returns False if the queue was empty."""
+        jobs = []
+        while len(jobs) < self.claim_size:
+            job = await claim_job(self.db, worker_id)
+            if not job:
+                break
+            jobs.append(job)
+        if not jobs:
+            return False
+        await asyncio.gather(*(self._process(job) for job in jobs))
+        return True
+
+    async def _process(self, job: Dict) -> None:
+        if job["attempts"] == 1:
+            self.retry_budget.record_request()
+
+        token = correlation_id.set(f"analysis-{job['complaint_id']}")
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            try:
+                await self.handler(self.db, job["complaint_id"])
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+            await complete_job(self.db, job)
+            analysis_jobs.inc(outcome="completed")
+        except CircuitOpenError as e:
+            analysis_jobs.inc(outcome="circuit_open")
+            await self._defer(job, str(e), max(e.retry_after, 1.0))
+        except Exception as e:
+            logger.error(f"Analysis attempt {job['attempts']} failed for complaint {job['complaint_id']}: {str(e)}")
+            will_retry = job["attempts"] < job.get("max_attempts", ANALYSIS_MAX_ATTEMPTS)
+            if will_retry and not self.retry_budget.try_acquire():
+                analysis_jobs.inc(outcome="retry_budget_exhausted")
+                await self._defer(job, f"Retry budget exhausted: {str(e)}", self.retry_budget.window)
+            elif await fail_job(self.db, job, str(e)):
+                analysis_jobs.inc(outcome="dead_lettered")
+                logger.error(f"Dead-lettered analysis job for complaint {job['complaint_id']}")
+                if self.on_dead_letter:
+                    await self.on_dead_letter(self.db, job["complaint_id"], str(e), job["attempts"])
+            else:
+                analysis_jobs.inc(outcome="retried")
+        finally:
+            correlation_id.reset(token)
+
+    async def _heartbeat(self, job: Dict) -> None:
+        """Keep renewing the job's lease until cancelled or the lease is lost"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                if not await renew_lease(self.db, job):
+                    logger.warning(f"Lost the lease on analysis job for complaint {job['complaint_id']}")
+                    return
+            except Exception as e:
+                logger.error(f"Failed to renew lease for complaint {job['complaint_id']}: {str(e)}")
+
+    async def _defer(self, job: Dict, error: str, delay: float) -> None:
+        logger.warning(f"Deferring analysis of complaint {job['complaint_id']} for {delay:.0f}s: {error}")
+        await defer_job(self.db, job, error, delay)
+        if self.on_deferred:
+            await self.on_deferred(self.db, job["complaint_id"], error)
+
+    async def _run(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                if not await self.run_once(worker_id):
+                    await self._idle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis worker {worker_id} error: {str(e)}")
+                await self._idle()
@@ -0,0 +1,218 @@
+import os
+import re
+import asyncio
+import argparse
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.logging_config import configure_logging
+from utils.database import create_client, get_database
+
+logger = logging.getLogger(__name__)
+
+# Assignment settings
+OFFICER_MAX_ACTIVE = int(os.getenv("OFFICER_MAX_ACTIVE", "5"))  # active complaints per officer
+ASSIGNMENT_STRATEGY = os.getenv("ASSIGNMENT_STRATEGY", "least_loaded")
+
+# Candidate filter and sort, tried in order until an officer has capacity
+Attempt = Tuple[Dict, List[Tuple[str, int]]]
+
+
+class AssignmentStrategy(ABC):
+    """Decides which officers are tried first for a complaint"""
+
+    name = ""
+
+    @abstractmethod
+    def attempts(self, complaint: Dict) -> List[Attempt]:
+        """Candidate filters and sorts, tried in order"""
+
+
+class LeastLoadedStrategy(AssignmentStrategy):
+    """Officer with the fewest active complaints, oldest assignment first on ties"""
+
+    name = "least_loaded"
+
+    def attempts(self, complaint: Dict) -> List[Attempt]:
+        return [({}, [("active_count", 1), ("last_assigned_at", 1)])]
+
+
+class RoundRobinStrategy(AssignmentStrategy):
+    """Officers take turns regardless of their current load"""
+
+    name = "round_robin"
+
+    def attempts(self, complaint: Dict) -> List[Attempt]:
+        return [({}, [("last_assigned_at", 1)])]
+
+
+class SkillMatchStrategy(AssignmentStrategy):
+    """
+    Prefer officers whose skills appear in the complaint text, least loaded
+    first, and fall back to any officer in the department.
+    """
+
+    name = "skill_match"
+
+    def attempts(self, complaint: Dict) -> List[Attempt]:
+        text = f"{complaint.get('title', '')} {complaint.get('description', '')}".lower()
+        words = sorted(set(re.findall(r"[a-z]+", text)))
+        fallback = LeastLoadedStrategy().attempts(complaint)
+        if not words:
+            return fallback
+        return [({"skills": {"$in": words}}, fallback[0][1])] + fallback
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (LeastLoadedStrategy(), RoundRobinStrategy(), SkillMatchStrategy())
+}
+
+
+def get_strategy(name: str = ASSIGNMENT_STRATEGY) -> AssignmentStrategy:
+    if name not in STRATEGIES:
+        logger.warning(f"Unknown assignment strategy '{name}', using least_loaded")
+        name = "least_loaded"
+    return STRATEGIES[name]
+
+
+async def claim_officer(db, department_id: str, complaint: Dict,
+                        strategy: Optional[AssignmentStrategy] = None,
+                        max_active: int = OFFICER_MAX_ACTIVE) -> Optional[Dict]:
+    """
+    Atomically pick an officer with spare capacity in the department and
+    count the complaint against their workload.
+
+    The capacity check and the increment happen in one find_one_and_update,
+    so concurrent assignments cannot push an officer past max_active.
+    Returns the updated officer or None if everyone is at capacity.
+    """
+    strategy = strategy or get_strategy()
+    now = datetime.utcnow()
+    for extra, sort in strategy.attempts(complaint):
+        officer = await db["users"].find_one_and_update(
+            {
+                "role": "officer",
+                "department_id": department_id,
+                # $not also matches officers created before active_count existed
+                "active_count": {"$not": {"$gte": max_active}},
+                **extra
+            },
+            {
+                "$inc": {"active_count": 1},
+                "$push": {"active_complaints": complaint["_id"]},
+                "$set": {"last_assigned_at": now, "last_updated": now}
+            },
+            sort=sort,
+            return_document=ReturnDocument.AFTER
+        )
+        if officer:
+            return officer
+    return None
+
+
+async def release_officer(db, officer_id: str, complaint_id: str) -> bool:
+    """
+    Remove a complaint from an officer's workload.
+
+    Matching on active_complaints makes the release idempotent: resolving a
+    complaint twice decrements the counter only once.
+    """
+    result = await db["users"].update_one(
+        {"_id": officer_id, "active_complaints": complaint_id},
+        {
+            "$inc": {"active_count": -1},
+            "$pull": {"active_complaints": complaint_id},
+            "$set": {"last_updated": datetime.utcnow()}
+        }
+    )
+    return result.modified_count > 0
+
+
+async def active_complaints_by_officer(db, officer_ids: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """Unresolved complaint IDs per assigned officer, from the complaints collection"""
+    query = {
+        "assigned_to": {"$ne": None} if officer_ids is None else {"$in": officer_ids},
+        "status": {"$ne": "resolved"}
+    }
+    active: Dict[str, List[str]] = {}
+    async for complaint in db["complaints"].find(query, {"assigned_to": 1}):
+        active.setdefault(complaint["assigned_to"], []).append(complaint["_id"])
+    return active
+
+
+async def backfill_workloads(db) -> int:
+    """
+    Give officers created before active_count existed their real workload,
+    so they are not treated as idle by claim_officer. Runs at startup in
+    every worker; the update only applies while the counter is still missing.
+    Returns the number of officers updated.
+    """
+    officer_ids = [
+        officer["_id"] async for officer in
+        db["users"].find({"role": "officer", "active_count": {"$exists": False}}, {"_id": 1})
+    ]
+    if not officer_ids:
+        return 0
+    active = await active_complaints_by_officer(db, officer_ids)
+    updated = 0
+    for officer_id in officer_ids:
+        complaint_ids = sorted(active.get(officer_id, []))
+        result = await db["users"].update_one(
+            {"_id": officer_id, "active_count": {"$exists": False}},
+            {"$set": {"active_count": len(complaint_ids), "active_complaints": complaint_ids}}
+        )
+        updated += result.modified_count
+    if updated:
+        logger.info(f"Backfilled active_count for {updated} officer(s)")
+    return updated
+
+
+async def reconcile_workloads(db, dry_run: bool = False) -> List[Dict]:
+    """
+    Recompute every officer's active complaints from the complaints
+    collection. Returns the officers whose stored workload was wrong.
+    """
+    active = await active_complaints_by_officer(db)
+
+    drift = []
+    async for officer in db["users"].find({"role": "officer"}, {"active_count": 1, "active_complaints": 1}):
+        complaint_ids = sorted(active.get(officer["_id"], []))
+        if officer.get("active_count") == len(complaint_ids) and \
+                sorted(officer.get("active_complaints") or []) == complaint_ids:
+            continue
+        drift.append({"officer": officer["_id"], "stored": officer.get("active_count"), "actual": len(complaint_ids)})
+        if not dry_run:
+            await db["users"].update_one(
+                {"_id": officer["_id"]},
+                {"$set": {"active_count": len(complaint_ids), "active_complaints": complaint_ids}}
+            )
+    return drift
+
+
+async def main(argv: Optional[List[str]] = None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Check or repair officer workload counters")
+    parser.add_argument("command", choices=["reconcile", "check"],
+                        help="reconcile fixes drifted counters, check only reports them")
+    args = parser.parse_args(argv)
+
+    client = create_client()
+    db = get_database(client)
+    try:
+        drift = await reconcile_workloads(db, dry_run=args.command == "check")
+        for row in drift:
+            print(f"{row['officer']}: stored={row['stored']} actual={row['actual']}")
+        print(f"{len(drift)} officer(s) {'drifted' if args.command == 'check' else 'updated'}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
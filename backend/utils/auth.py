@@ -1,26 +1,36 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from models.models import TokenData, UserRole
 import os
+import asyncio
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing settings
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))  # queued + running
+
+# Password hashing; hashes with a different cost factor are upgraded on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # JWT settings
 SECRET_KEY = "my-secret-key"  # Fixed secret key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+STREAM_TICKET_EXPIRE_SECONDS = int(os.getenv("STREAM_TICKET_EXPIRE_SECONDS", "30"))  # time to open the event stream
+
+# Purpose claim of stream tickets; they are accepted by the event stream only
+STREAM_TICKET_PURPOSE = "stream"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token", auto_error=False)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
@@ -39,6 +49,60 @@ def get_password_hash(password: str) -> str:
             detail="Error processing password"
         )
 
+def _verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if pwd_context.needs_update(hashed_password):
+        return True, pwd_context.hash(plain_password)
+    return True, None
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded thread pool so hashing never blocks the event loop.
+
+    bcrypt releases the GIL, so threads hash in parallel. Requests beyond
+    max_pending are rejected with 503 instead of queueing without limit,
+    which keeps a login burst from delaying every other endpoint.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(f"Password hashing queue full ({self.pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"}
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Returns whether the password matches and, if so, a new hash when the stored one is outdated"""
+        return await self._run(_verify_and_rehash, plain_password, hashed_password)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+password_hasher = PasswordHasher()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     try:
         to_encode = data.copy()
@@ -56,7 +120,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             detail="Could not create access token"
         )
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
+def decode_token(token: str, purpose: Optional[str] = None) -> TokenData:
+    """
+    Validate a token and return its user. Access tokens have no purpose
+    claim; tokens issued for a purpose are only valid for it.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -66,7 +134,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         role: str = payload.get("role")
-        if email is None or role is None:
+        if email is None or role is None or payload.get("purpose") != purpose:
             raise credentials_exception
         token_data = TokenData(email=email, role=UserRole(role))
         return token_data
@@ -77,6 +145,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
         logger.error(f"Token validation error: {str(e)}")
         raise credentials_exception
 
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
+    return decode_token(token)
+
+def create_stream_ticket(user: TokenData) -> str:
+    """A short-lived token for opening the event stream, which EventSource can only pass in the URL"""
+    return create_access_token(
+        {"sub": user.email, "role": user.role.value, "purpose": STREAM_TICKET_PURPOSE},
+        timedelta(seconds=STREAM_TICKET_EXPIRE_SECONDS)
+    )
+
+async def get_stream_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    ticket: Optional[str] = Query(None)
+) -> TokenData:
+    """
+    Like get_current_user, also accepting a stream ticket as ?ticket= since
+    EventSource cannot set headers. Access tokens are never taken from the
+    URL, where they would end up in access logs.
+    """
+    if token:
+        return decode_token(token)
+    return decode_token(ticket or "", STREAM_TICKET_PURPOSE)
+
 def check_permissions(*allowed_roles: UserRole):
     async def permission_checker(current_user: TokenData = Depends(get_current_user)):
         if current_user.role not in allowed_roles:
@@ -0,0 +1,150 @@
+import os
+import time
+import logging
+from collections import deque
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker settings
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30"))  # seconds
+LLM_BREAKER_HALF_OPEN_CALLS = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", "1"))
+
+# Retry budget settings
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("LLM_RETRY_BUDGET_MIN_PER_SECOND", "1"))
+LLM_RETRY_BUDGET_WINDOW = float(os.getenv("LLM_RETRY_BUDGET_WINDOW", "10"))  # seconds
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM circuit breaker is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast. Once reset_timeout has passed, up to half_open_calls probe
+    calls are let through; a success closes the circuit and a failure opens
+    it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = LLM_BREAKER_RESET_TIMEOUT,
+        half_open_calls: int = LLM_BREAKER_HALF_OPEN_CALLS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will let a probe through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not be made"""
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.retry_after())
+            self.state = HALF_OPEN
+            self._probes = 0
+            logger.info("LLM circuit breaker half-open, probing provider")
+
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.reset_timeout)
+            self._probes += 1
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("LLM circuit breaker closed")
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.error(f"LLM circuit breaker opened after {self.failures} failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": self.retry_after(),
+            "rejected": self.rejected
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent first attempts, plus a small
+    floor per second, so retries cannot multiply load during an outage.
+    """
+
+    def __init__(
+        self,
+        ratio: float = LLM_RETRY_BUDGET_RATIO,
+        min_per_second: float = LLM_RETRY_BUDGET_MIN_PER_SECOND,
+        window: float = LLM_RETRY_BUDGET_WINDOW
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+        self.exhausted = 0
+
+    def _trim(self, now: float) -> None:
+        for events in (self._requests, self._retries):
+            while events and events[0] < now - self.window:
+                events.popleft()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """Spend one retry from the budget, returning False if none is left"""
+        now = time.monotonic()
+        self._trim(now)
+        allowed = len(self._requests) * self.ratio + self.min_per_second * self.window
+        if len(self._retries) >= allowed:
+            self.exhausted += 1
+            return False
+        self._retries.append(now)
+        return True
+
+    def stats(self) -> Dict:
+        self._trim(time.monotonic())
+        return {
+            "requests": len(self._requests),
+            "retries": len(self._retries),
+            "exhausted": self.exhausted
+        }
+
+
+llm_breaker = CircuitBreaker()
+llm_retry_budget = RetryBudget()
@@ -0,0 +1,109 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from pymongo.read_preferences import SecondaryPreferred
+from utils.metrics import METRICS_ENABLED, mongo_metrics_listener
+
+logger = logging.getLogger(__name__)
+
+# Connection settings
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "complaint_system")
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))  # per worker process; run.py divides a host budget
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))  # wait for a pooled connection
+
+# Reporting reads (analytics, export) go to secondaries when the deployment has them
+ANALYTICS_READ_PREFERENCE = os.getenv("ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+ANALYTICS_MAX_STALENESS_SECONDS = int(os.getenv("ANALYTICS_MAX_STALENESS_SECONDS", "-1"))  # -1 = no limit, else >= 90
+
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))  # seconds
+
+
+def client_options() -> Dict:
+    """Pool and timeout options passed to every client"""
+    return {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGODB_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGODB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGODB_SOCKET_TIMEOUT_MS or None,
+        "waitQueueTimeoutMS": MONGODB_WAIT_QUEUE_TIMEOUT_MS or None,
+        "event_listeners": [mongo_metrics_listener] if METRICS_ENABLED else []
+    }
+
+
+def create_client(url: Optional[str] = None, **overrides) -> AsyncIOMotorClient:
+    """Create a Motor client with the configured pool, timeouts and command metrics"""
+    options = client_options()
+    options.update(overrides)
+    return AsyncIOMotorClient(url or MONGODB_URL, **options)
+
+
+def get_database(client: AsyncIOMotorClient, name: Optional[str] = None):
+    return client[name or DATABASE_NAME]
+
+
+def analytics_read_preference():
+    """Read preference for reporting queries, from ANALYTICS_READ_PREFERENCE"""
+    if ANALYTICS_READ_PREFERENCE == "secondaryPreferred":
+        return SecondaryPreferred(max_staleness=ANALYTICS_MAX_STALENESS_SECONDS)
+    modes = {
+        "primary": ReadPreference.PRIMARY,
+        "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+        "secondary": ReadPreference.SECONDARY,
+        "nearest": ReadPreference.NEAREST
+    }
+    if ANALYTICS_READ_PREFERENCE not in modes:
+        raise ValueError(f"Unknown ANALYTICS_READ_PREFERENCE: {ANALYTICS_READ_PREFERENCE}")
+    return modes[ANALYTICS_READ_PREFERENCE]
+
+
+def get_analytics_database(db):
+    """
+    The same database read with the analytics read preference. Results may
+    lag the primary by the replication delay, so only reporting reads use it.
+    On a deployment without secondaries secondaryPreferred reads the primary.
+    """
+    return db.with_options(read_preference=analytics_read_preference())
+
+
+def analytics_db(request):
+    """Database handle for reporting routes; falls back to the primary handle"""
+    db = getattr(request.app, "mongodb_analytics", None)
+    return request.app.mongodb if db is None else db
+
+
+async def check_readiness(client: AsyncIOMotorClient, timeout: float = READINESS_TIMEOUT) -> Dict:
+    """
+    Ping the deployment and describe its topology.
+
+    ready is False when no primary answers within timeout, since complaint
+    intake needs to write.
+    """
+    started = time.perf_counter()
+    try:
+        hello = await asyncio.wait_for(client.admin.command("hello"), timeout)
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        logger.error(f"MongoDB readiness check failed: {error}")
+        return {"ready": False, "error": error}
+
+    replica_set = hello.get("setName")
+    return {
+        # hello runs on the primary, so a writable answer means intake can proceed
+        "ready": bool(hello.get("isWritablePrimary", hello.get("ismaster", False))),
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "replica_set": replica_set,
+        "primary": hello.get("primary"),
+        "secondaries": max(0, len(hello.get("hosts", [])) - 1) if replica_set else 0
+    }
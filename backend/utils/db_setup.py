@@ -1,60 +1,165 @@
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
-import os
+from typing import Dict, List, Optional
 import asyncio
+import argparse
+import logging
 import sys
 
 load_dotenv()
 
-async def setup_indexes():
-    # Get MongoDB connection details from environment variables
-    mongodb_url = os.getenv("MONGODB_URL")
-    database_name = os.getenv("DATABASE_NAME")
-    
-    if not mongodb_url or not database_name:
-        print("Error: MONGODB_URL and DATABASE_NAME must be set in .env file")
-        sys.exit(1)
-    
+from pymongo.errors import OperationFailure
+from routers.indexes import INDEXES, OBSOLETE_INDEXES, HOT_QUERIES
+from utils.logging_config import configure_logging
+from utils.database import create_client, get_database
+
+logger = logging.getLogger(__name__)
+
+# Index options compared when deciding whether an existing index matches its declaration
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+INDEX_NOT_FOUND = 27  # another process dropped it first
+
+
+def _same_index(existing: Dict, keys: List, options: Dict) -> bool:
+    if [tuple(k) for k in existing.get("key", [])] != [tuple(k) for k in keys]:
+        return False
+    return all(existing.get(option) == options.get(option) for option in INDEX_OPTIONS)
+
+
+async def _drop_index(collection, name: str) -> None:
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as e:
+        if e.code != INDEX_NOT_FOUND:
+            raise
+
+
+async def ensure_indexes(db, prune: bool = False, dry_run: bool = False, rebuild: bool = True) -> Dict[str, List[str]]:
+    """
+    Reconcile the database with routers.indexes.
+
+    Obsolete indexes are dropped, missing ones are created and indexes whose
+    keys or options changed are rebuilt. Indexes that are neither declared nor
+    obsolete are reported, and dropped only when prune is set.
+
+    A rebuild drops the index before recreating it, so a unique index is not
+    enforced in between. Startup runs in every worker process and passes
+    rebuild=False: changed indexes are only reported as "outdated", to be
+    migrated once with python -m utils.db_setup.
+    Returns the "collection.index" names per action taken.
+    """
+    report = {"created": [], "rebuilt": [], "outdated": [], "dropped": [], "unchanged": [], "unknown": []}
+
+    for collection in sorted(set(INDEXES) | set(OBSOLETE_INDEXES)):
+        declared = INDEXES.get(collection, {})
+        existing = await db[collection].index_information()
+
+        for name, info in existing.items():
+            if name == "_id_" or name in declared:
+                continue
+            action = "dropped" if name in OBSOLETE_INDEXES.get(collection, []) or prune else "unknown"
+            if action == "dropped" and not dry_run:
+                await _drop_index(db[collection], name)
+            report[action].append(f"{collection}.{name}")
+
+        for name, (keys, options) in declared.items():
+            if name in existing:
+                if _same_index(existing[name], keys, options):
+                    report["unchanged"].append(f"{collection}.{name}")
+                    continue
+                if not rebuild:
+                    report["outdated"].append(f"{collection}.{name}")
+                    continue
+                if not dry_run:
+                    await _drop_index(db[collection], name)
+                action = "rebuilt"
+            else:
+                action = "created"
+            if not dry_run:
+                await db[collection].create_index(keys, name=name, **options)
+            report[action].append(f"{collection}.{name}")
+
+    for action in ("created", "rebuilt", "dropped"):
+        if report[action]:
+            logger.info(f"Indexes {action}: {', '.join(report[action])}")
+    if report["outdated"]:
+        logger.warning(f"Indexes differ from the registry, run python -m utils.db_setup: {', '.join(report['outdated'])}")
+    if report["unknown"]:
+        logger.warning(f"Indexes not in the registry: {', '.join(report['unknown'])}")
+    return report
+
+
+def plan_stages(plan: Dict) -> List[str]:
+    """Every stage name in an explain() plan tree, outermost first"""
+    stages = []
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for child in ("queryPlan", "inputStage"):
+        if isinstance(plan.get(child), dict):
+            stages.extend(plan_stages(plan[child]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+async def explain_hot_queries(db) -> List[Dict]:
+    """
+    Run explain() on every registered hot query and report the stages of
+    its winning plan, flagging queries that fall back to a COLLSCAN.
+    """
+    results = []
+    for name, (collection, query, sort) in HOT_QUERIES.items():
+        command = {"find": collection, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        try:
+            explained = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            stages = plan_stages(explained["queryPlanner"]["winningPlan"])
+        except Exception as e:
+            logger.error(f"Error explaining hot query '{name}': {str(e)}")
+            results.append({"query": name, "collection": collection, "stages": [], "collscan": None})
+            continue
+        collscan = "COLLSCAN" in stages
+        if collscan:
+            logger.warning(f"Hot query '{name}' on {collection} uses a COLLSCAN")
+        results.append({"query": name, "collection": collection, "stages": stages, "collscan": collscan})
+    return results
+
+
+async def main(argv: Optional[List[str]] = None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes with routers/indexes.py")
+    parser.add_argument("--check", action="store_true", help="only report differences, change nothing")
+    parser.add_argument("--prune", action="store_true", help="also drop indexes missing from the registry")
+    parser.add_argument("--explain", action="store_true", help="explain the hot queries and report COLLSCANs")
+    args = parser.parse_args(argv)
+
+    client = create_client()
+    db = get_database(client)
     try:
-        # Connect to MongoDB
-        print("Connecting to MongoDB Atlas...")
-        client = AsyncIOMotorClient(mongodb_url)
-        db = client[database_name]
-        
-        # Verify connection
         await client.admin.command('ping')
-        print("Successfully connected to MongoDB Atlas!")
-        
-        # Create indexes for complaints collection
-        print("Creating indexes for complaints collection...")
-        await db.complaints.create_index([
-            ("status", 1),
-            ("created_at", -1)
-        ])
-        
-        await db.complaints.create_index([
-            ("assigned_to", 1),
-            ("status", 1)
-        ])
-        
-        # Index for AI analysis fields
-        await db.complaints.create_index([
-            ("ai_analysis.priority_score", -1)
-        ])
-        
-        # Create indexes for users collection
-        print("Creating indexes for users collection...")
-        await db.users.create_index("email", unique=True)
-        await db.users.create_index("username", unique=True)
-        
-        print("✅ Database indexes created successfully!")
-        
+        report = await ensure_indexes(db, prune=args.prune, dry_run=args.check)
+        for action in ("created", "rebuilt", "dropped", "unknown"):
+            for index in report[action]:
+                print(f"{'would be ' if args.check and action != 'unknown' else ''}{action}: {index}")
+        print(f"{len(report['unchanged'])} index(es) up to date")
+
+        collscans = []
+        if args.explain:
+            for result in await explain_hot_queries(db):
+                print(f"{result['query']} ({result['collection']}): {' <- '.join(result['stages']) or 'explain failed'}")
+                if result["collscan"]:
+                    collscans.append(result["query"])
+            print(f"{len(collscans)} hot quer{'y' if len(collscans) == 1 else 'ies'} using a COLLSCAN")
+
+        if args.check and (report["created"] or report["rebuilt"] or report["dropped"]) or collscans:
+            sys.exit(1)
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
     finally:
-        # Close the connection
         client.close()
 
+
 if __name__ == "__main__":
-    asyncio.run(setup_indexes()) 
\ No newline at end of file
+    asyncio.run(main())
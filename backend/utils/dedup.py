@@ -0,0 +1,224 @@
+import os
+import zlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from bson import Binary
+from utils.analysis_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Duplicate detection settings
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))  # rows per band = NUM_PERM / BANDS
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "2"))  # words
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.5"))  # estimated Jaccard similarity
+DEDUP_WINDOW_DAYS = int(os.getenv("DEDUP_WINDOW_DAYS", "14"))  # only recent complaints form incidents
+DEDUP_STORED_CANDIDATES = int(os.getenv("DEDUP_STORED_CANDIDATES", "50"))  # stored signatures compared per lookup
+
+# Signatures shared by every worker process, expired by a TTL index after the window
+SIGNATURE_COLLECTION = "dedup_signatures"
+
+_PRIME = (1 << 31) - 1
+
+
+def shingles(complaint: Dict, size: int = DEDUP_SHINGLE_SIZE) -> Set[str]:
+    """Word n-grams of the normalized title and description"""
+    words = normalize_text(f"{complaint.get('title', '')} {complaint.get('description', '')}").split()
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes (a * crc32 + b) mod 2^31-1"""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, _PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.randint(0, _PRIME, size=num_perm, dtype=np.int64)
+
+    def signature(self, tokens: Set[str]) -> Optional[np.ndarray]:
+        if not tokens:
+            return None
+        hashes = np.array([zlib.crc32(token.encode("utf-8")) for token in tokens], dtype=np.int64)
+        # (num_perm, tokens) permuted hashes; values stay below 2^63
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(first == second))
+
+
+class DuplicateIndex:
+    """
+    In-memory LSH index of complaint MinHash signatures, one per district.
+
+    Signatures are split into bands; complaints sharing any band bucket are
+    candidates and are confirmed against DEDUP_THRESHOLD. Each entry points
+    at the incident (the first complaint of its cluster) it belongs to.
+
+    Every worker process has its own index, so signatures are also stored
+    in SIGNATURE_COLLECTION with their band keys; find_stored looks there
+    for complaints created by the other workers.
+    """
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS,
+                 threshold: float = DEDUP_THRESHOLD, window_days: int = DEDUP_WINDOW_DAYS):
+        if num_perm % bands:
+            raise ValueError("DEDUP_NUM_PERM must be a multiple of DEDUP_BANDS")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window = timedelta(days=window_days)
+        self._buckets: Dict[str, List[Dict[bytes, Set[str]]]] = {}
+        # complaint_id -> (district, signature, incident_id, created_at)
+        self._entries: Dict[str, Tuple[str, np.ndarray, str, datetime]] = {}
+        self._adds = 0
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _stored_bands(self, signature: np.ndarray) -> List[Binary]:
+        # Prefixed with the band number, since one collection holds every band
+        return [Binary(bytes([i]) + key) for i, key in enumerate(self._band_keys(signature))]
+
+    def find(self, complaint: Dict) -> Optional[Tuple[str, float]]:
+        """(incident_id, similarity) of the closest recent complaint in the district, if any"""
+        signature = self.hasher.signature(shingles(complaint))
+        district = complaint.get("district")
+        if signature is None or district not in self._buckets:
+            return None
+        cutoff = datetime.utcnow() - self.window
+        candidates = set()
+        for band, key in zip(self._buckets[district], self._band_keys(signature)):
+            candidates |= band.get(key, set())
+
+        best = None
+        for candidate in candidates:
+            _, other, incident_id, created_at = self._entries[candidate]
+            if created_at < cutoff:
+                continue
+            score = similarity(signature, other)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (incident_id, score)
+        return best
+
+    def add(self, complaint: Dict, incident_id: Optional[str] = None) -> None:
+        signature = self.hasher.signature(shingles(complaint))
+        if signature is None or complaint["_id"] in self._entries:
+            return
+        district = complaint.get("district")
+        buckets = self._buckets.setdefault(district, [{} for _ in range(self.bands)])
+        for band, key in zip(buckets, self._band_keys(signature)):
+            band.setdefault(key, set()).add(complaint["_id"])
+        self._entries[complaint["_id"]] = (
+            district, signature, incident_id or complaint["_id"], complaint.get("created_at") or datetime.utcnow()
+        )
+        self._adds += 1
+        if self._adds % 1000 == 0:
+            self.prune()
+
+    def remove(self, complaint_id: str) -> None:
+        entry = self._entries.pop(complaint_id, None)
+        if entry is None:
+            return
+        district, signature, _, _ = entry
+        for band, key in zip(self._buckets[district], self._band_keys(signature)):
+            members = band.get(key)
+            if members:
+                members.discard(complaint_id)
+                if not members:
+                    del band[key]
+
+    def prune(self) -> int:
+        """Forget complaints older than the window; returns how many were removed"""
+        cutoff = datetime.utcnow() - self.window
+        expired = [complaint_id for complaint_id, entry in self._entries.items() if entry[3] < cutoff]
+        for complaint_id in expired:
+            self.remove(complaint_id)
+        return len(expired)
+
+    def stored_document(self, complaint_id: str) -> Optional[Dict]:
+        """The SIGNATURE_COLLECTION document of an indexed complaint"""
+        entry = self._entries.get(complaint_id)
+        if entry is None:
+            return None
+        district, signature, incident_id, created_at = entry
+        return {
+            "_id": complaint_id,
+            "district": district,
+            "bands": self._stored_bands(signature),
+            "signature": Binary(signature.tobytes()),
+            "incident_id": incident_id,
+            "created_at": created_at
+        }
+
+    async def store(self, db, complaint_ids: List[str]) -> None:
+        """
+        Share the signatures of newly inserted complaints with the other
+        workers. Failures are logged, not raised: the complaints are saved
+        and queued already, and other workers only miss them as duplicates.
+        """
+        documents = [doc for doc in map(self.stored_document, complaint_ids) if doc]
+        if not documents:
+            return
+        try:
+            await db[SIGNATURE_COLLECTION].insert_many(documents, ordered=False)
+        except Exception as e:
+            logger.error(f"Error storing duplicate signatures: {str(e)}")
+
+    async def find_stored(self, db, complaint: Dict) -> Optional[Tuple[str, float]]:
+        """Like find, over the signatures every worker has stored"""
+        signature = self.hasher.signature(shingles(complaint))
+        if signature is None:
+            return None
+        cursor = db[SIGNATURE_COLLECTION].find(
+            {
+                "district": complaint.get("district"),
+                "bands": {"$in": self._stored_bands(signature)},
+                "created_at": {"$gte": datetime.utcnow() - self.window}
+            },
+            {"signature": 1, "incident_id": 1}
+        ).limit(DEDUP_STORED_CANDIDATES)
+
+        best = None
+        async for doc in cursor:
+            if doc["_id"] == complaint.get("_id"):
+                continue
+            score = similarity(signature, np.frombuffer(doc["signature"], dtype=signature.dtype))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (doc["incident_id"], score)
+        return best
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._entries.clear()
+
+    async def rebuild(self, db) -> int:
+        """Reload the index from complaints created within the window"""
+        self.clear()
+        cursor = db["complaints"].find(
+            {"created_at": {"$gte": datetime.utcnow() - self.window}},
+            {"title": 1, "description": 1, "district": 1, "created_at": 1, "incident_id": 1}
+        ).sort("created_at", 1)
+        async for complaint in cursor:
+            self.add(complaint, complaint.get("incident_id"))
+        logger.info(f"Duplicate index rebuilt with {len(self._entries)} complaints")
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        return {
+            "complaints": len(self._entries),
+            "districts": len(self._buckets),
+            "incidents": len({entry[2] for entry in self._entries.values()})
+        }
+
+
+duplicate_index = DuplicateIndex()
@@ -0,0 +1,309 @@
+import os
+import re
+import sys
+import zlib
+import random
+import asyncio
+import logging
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+from typing import Dict, List, Optional, Tuple
+
+load_dotenv()
+
+from utils.analysis_parser import (
+    AnalysisResult, ANALYSIS_ERROR_PREFIX, DEPARTMENT_MAPPING, DEPARTMENT_NAMES, DEPARTMENT_OFFICERS
+)
+from utils.assignment import get_strategy
+from utils.logging_config import configure_logging
+from utils.database import create_client, get_database
+
+logger = logging.getLogger(__name__)
+
+# Classifier settings
+LOCAL_CLASSIFIER_PATH = os.getenv(
+    "LOCAL_CLASSIFIER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "department_classifier.npz")
+)
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.85"))
+LOCAL_CLASSIFIER_VERSION = "local-classifier"
+N_FEATURES = 2 ** 14
+
+_token = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word unigrams and bigrams"""
+    words = _token.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def complaint_text(complaint: Dict) -> str:
+    return f"{complaint.get('title', '')} {complaint.get('description', '')}"
+
+
+class DepartmentClassifier:
+    """
+    Hashed TF-IDF features with a softmax department classifier and a
+    linear priority regressor, trained with mini-batch gradient descent.
+    """
+
+    def __init__(self, labels: List[str], n_features: int = N_FEATURES):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.idf = np.ones(n_features, dtype=np.float32)
+        self.weights = np.zeros((n_features, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+        self.priority_weights = np.zeros(n_features, dtype=np.float32)
+        self.priority_bias = np.float32(0.5)
+
+    def _hash(self, token: str) -> int:
+        # crc32 is stable across processes, unlike the salted built-in hash()
+        return zlib.crc32(token.encode("utf-8")) % self.n_features
+
+    def _counts(self, text: str) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for token in tokenize(text):
+            index = self._hash(token)
+            counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def vectorize(self, texts: List[str]) -> np.ndarray:
+        """Dense L2-normalized TF-IDF rows for a batch of texts"""
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, count in self._counts(text).items():
+                matrix[row, index] = np.log1p(count)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def fit(
+        self,
+        texts: List[str],
+        labels: List[str],
+        priorities: List[float],
+        epochs: int = 30,
+        learning_rate: float = 2.0,
+        l2: float = 1e-4,
+        batch_size: int = 256
+    ) -> "DepartmentClassifier":
+        # Inverse document frequency over the training set
+        document_frequency = np.zeros(self.n_features, dtype=np.float32)
+        for text in texts:
+            for index in self._counts(text):
+                document_frequency[index] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        targets = np.array([label_index[label] for label in labels])
+        priority_targets = np.array(priorities, dtype=np.float32)
+        self.priority_bias = np.float32(priority_targets.mean()) if len(priority_targets) else np.float32(0.5)
+
+        order = list(range(len(texts)))
+        rng = random.Random(0)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                features = self.vectorize([texts[i] for i in batch])
+
+                # Softmax cross-entropy gradient
+                probabilities = self._softmax(features @ self.weights + self.bias)
+                probabilities[np.arange(len(batch)), targets[batch]] -= 1.0
+                probabilities /= len(batch)
+                self.weights -= learning_rate * (features.T @ probabilities + l2 * self.weights)
+                self.bias -= learning_rate * probabilities.sum(axis=0)
+
+                # Squared-error gradient for the priority head
+                error = (features @ self.priority_weights + self.priority_bias - priority_targets[batch]) / len(batch)
+                self.priority_weights -= learning_rate * (features.T @ error + l2 * self.priority_weights)
+                self.priority_bias -= learning_rate * error.sum()
+        return self
+
+    @staticmethod
+    def _softmax(scores: np.ndarray) -> np.ndarray:
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, texts: List[str]) -> List[Tuple[str, float, float]]:
+        """Return (department_id, confidence, priority_score) for each text"""
+        features = self.vectorize(texts)
+        probabilities = self._softmax(features @ self.weights + self.bias)
+        priorities = np.clip(features @ self.priority_weights + self.priority_bias, 0.1, 1.0)
+        best = probabilities.argmax(axis=1)
+        return [
+            (self.labels[i], float(probabilities[row, i]), round(float(priorities[row]), 1))
+            for row, i in enumerate(best)
+        ]
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            idf=self.idf,
+            weights=self.weights,
+            bias=self.bias,
+            priority_weights=self.priority_weights,
+            priority_bias=np.array([self.priority_bias])
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "DepartmentClassifier":
+        with np.load(path) as data:
+            model = cls([str(label) for label in data["labels"]], n_features=data["idf"].shape[0])
+            model.idf = data["idf"]
+            model.weights = data["weights"]
+            model.bias = data["bias"]
+            model.priority_weights = data["priority_weights"]
+            model.priority_bias = data["priority_bias"][0]
+        return model
+
+
+_classifier: Optional[DepartmentClassifier] = None
+_classifier_loaded = False
+
+
+def get_department_classifier() -> Optional[DepartmentClassifier]:
+    """Load the trained model once; returns None when no model has been trained"""
+    global _classifier, _classifier_loaded
+    if not _classifier_loaded:
+        _classifier_loaded = True
+        if os.path.exists(LOCAL_CLASSIFIER_PATH):
+            try:
+                _classifier = DepartmentClassifier.load(LOCAL_CLASSIFIER_PATH)
+                logger.info(f"Loaded local department classifier from {LOCAL_CLASSIFIER_PATH}")
+            except Exception as e:
+                logger.error(f"Error loading local department classifier: {str(e)}")
+    return _classifier
+
+
+def classify_complaint(
+    complaint: Dict,
+    threshold: float = LOCAL_CLASSIFIER_THRESHOLD
+) -> Optional[AnalysisResult]:
+    """
+    Route a complaint locally when the classifier is confident enough. The
+    officer is left to the configured assignment strategy (utils.assignment),
+    which claims one when the analysis is applied.
+
+    Returns:
+        The local AnalysisResult, or None to escalate to the LLM
+    """
+    classifier = get_department_classifier()
+    if classifier is None:
+        return None
+
+    department_id, confidence, priority_score = classifier.predict([complaint_text(complaint)])[0]
+    if confidence < threshold or department_id not in DEPARTMENT_NAMES:
+        return None
+
+    department_name = DEPARTMENT_NAMES[department_id]
+    return AnalysisResult(
+        department_id=department_id,
+        department_name=department_name,
+        priority_score=priority_score,
+        analysis=f"{complaint.get('title', 'Complaint')} routed automatically (confidence {confidence:.2f}).",
+        officer_recommendation=(
+            f"An officer of the {department_name} chosen by {get_strategy().name} assignment "
+            f"should handle this case."
+        )
+    )
+
+
+async def load_training_data(db) -> List[Tuple[str, str, float]]:
+    """
+    Build (text, department_id, priority_score) examples from stored LLM
+    analyses, seeded with department and officer names so every department
+    has at least one example.
+    """
+    examples = []
+    for name, department_id in DEPARTMENT_MAPPING.items():
+        examples.append((name, department_id, 0.5))
+        for officer in DEPARTMENT_OFFICERS[name]:
+            examples.append((officer.split("–")[-1], department_id, 0.5))
+
+    cursor = db["ai_analyses"].aggregate([
+        {"$match": {
+            "department_id": {"$in": list(DEPARTMENT_MAPPING.values())},
+            "version": {"$nin": ["error", LOCAL_CLASSIFIER_VERSION]},
+            "analysis_text": {"$not": {"$regex": f"^{ANALYSIS_ERROR_PREFIX}"}}
+        }},
+        {"$lookup": {
+            "from": "complaints",
+            "localField": "complaint_id",
+            "foreignField": "_id",
+            "as": "complaint"
+        }},
+        {"$unwind": "$complaint"},
+        {"$project": {
+            "department_id": 1,
+            "priority_score": 1,
+            "title": "$complaint.title",
+            "description": "$complaint.description"
+        }}
+    ])
+    async for doc in cursor:
+        examples.append((complaint_text(doc), doc["department_id"], float(doc.get("priority_score") or 0.5)))
+    return examples
+
+
+def evaluate(classifier: DepartmentClassifier, examples: List[Tuple[str, str, float]], threshold: float) -> Dict:
+    """Accuracy overall and on the confident subset that would skip the LLM"""
+    if not examples:
+        return {"examples": 0, "accuracy": 0.0, "coverage": 0.0, "confident_accuracy": 0.0}
+    predictions = classifier.predict([text for text, _, _ in examples])
+    correct = [pred[0] == label for pred, (_, label, _) in zip(predictions, examples)]
+    confident = [ok for ok, pred in zip(correct, predictions) if pred[1] >= threshold]
+    return {
+        "examples": len(examples),
+        "accuracy": sum(correct) / len(correct),
+        "coverage": len(confident) / len(correct),
+        "confident_accuracy": sum(confident) / len(confident) if confident else 0.0
+    }
+
+
+async def main(argv: Optional[List[str]] = None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Train or evaluate the local department classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--model", default=LOCAL_CLASSIFIER_PATH)
+    parser.add_argument("--threshold", type=float, default=LOCAL_CLASSIFIER_THRESHOLD)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of examples held out for evaluation")
+    parser.add_argument("--epochs", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    client = create_client()
+    try:
+        examples = await load_training_data(get_database(client))
+    finally:
+        client.close()
+    print(f"Loaded {len(examples)} examples")
+
+    if args.command == "train":
+        random.Random(0).shuffle(examples)
+        split = int(len(examples) * (1 - args.holdout))
+        train, holdout = examples[:split], examples[split:]
+        classifier = DepartmentClassifier(sorted(DEPARTMENT_MAPPING.values())).fit(
+            [text for text, _, _ in train],
+            [label for _, label, _ in train],
+            [priority for _, _, priority in train],
+            epochs=args.epochs
+        )
+        classifier.save(args.model)
+        print(f"Saved model to {args.model}")
+    else:
+        if not os.path.exists(args.model):
+            print(f"Error: no model at {args.model}")
+            sys.exit(1)
+        classifier = DepartmentClassifier.load(args.model)
+        holdout = examples
+
+    print(f"Evaluation at threshold {args.threshold}: {evaluate(classifier, holdout, args.threshold)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
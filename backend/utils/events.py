@@ -0,0 +1,229 @@
+import os
+import asyncio
+import logging
+import itertools
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models.models import AnalysisStatus
+
+logger = logging.getLogger(__name__)
+
+# Event settings
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # worker processes; run.py and uvicorn --workers read it
+EVENTS_SOURCE = os.getenv("EVENTS_SOURCE", "change_stream" if WEB_CONCURRENCY > 1 else "local")  # "local" or "change_stream"
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))  # per subscriber; oldest events are dropped
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000"))  # open streams per worker
+EVENTS_RETRY_DELAY = float(os.getenv("EVENTS_RETRY_DELAY", "5"))  # seconds before a change stream is reopened
+
+ADMIN_TOPIC = "admin"
+
+# Complaint fields sent with every event; clients fetch the complaint for more
+EVENT_FIELDS = ("status", "analysis_status", "department_id", "assigned_to", "incident_id", "last_updated")
+
+
+def citizen_topic(citizen_id: str) -> str:
+    return f"citizen:{citizen_id}"
+
+
+def department_topic(department_id: str) -> str:
+    return f"department:{department_id}"
+
+
+def complaint_topics(complaint: Dict) -> List[str]:
+    """The complaint's citizen, its department once known, and admins"""
+    topics = [ADMIN_TOPIC]
+    if complaint.get("citizen_id"):
+        topics.append(citizen_topic(complaint["citizen_id"]))
+    if complaint.get("department_id"):
+        topics.append(department_topic(complaint["department_id"]))
+    return topics
+
+
+def check_events_source(source: str = EVENTS_SOURCE, workers: int = WEB_CONCURRENCY) -> None:
+    """
+    Refuse settings under which clients miss events: local publishing only
+    reaches streams held by the worker that made the change.
+    """
+    if source not in ("local", "change_stream"):
+        raise RuntimeError(f"EVENTS_SOURCE must be 'local' or 'change_stream', not {source!r}")
+    if source == "local" and workers > 1:
+        raise RuntimeError(
+            f"EVENTS_SOURCE=local with {workers} worker processes would lose events across workers; "
+            "use EVENTS_SOURCE=change_stream"
+        )
+
+
+class Subscription:
+    """A subscriber's bounded event queue; when full, the oldest event is dropped"""
+
+    def __init__(self, bus: "EventBus", topics: Iterable[str], maxsize: int):
+        self.bus = bus
+        self.topics = set(topics)
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def put(self, event: Dict) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """The next event, or None if none arrives within timeout"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for complaint events.
+
+    Subscribers register for topics (a citizen, a department, or admins) and
+    receive each event published to any of them once. Publishing never
+    blocks: a slow subscriber loses its oldest events instead.
+    """
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE, max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._subscriptions: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def full(self) -> bool:
+        return len(self._subscriptions) >= self.max_subscribers
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        if self.full():
+            raise RuntimeError("Too many event subscribers")
+        subscription = Subscription(self, topics, self.queue_size)
+        self._subscriptions.add(subscription)
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def publish(self, event: Dict, topics: Iterable[str]) -> int:
+        """Deliver event to the subscribers of topics; returns how many received it"""
+        recipients = set()
+        for topic in topics:
+            recipients.update(self._topics.get(topic, ()))
+        event = {"id": next(self._ids), **event}
+        for subscription in recipients:
+            subscription.put(event)
+        self.published += 1
+        return len(recipients)
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "topics": len(self._topics),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in self._subscriptions)
+        }
+
+
+event_bus = EventBus()
+
+
+def complaint_event(event_type: str, complaint: Dict) -> Dict:
+    event = {"type": event_type, "complaint_id": complaint["_id"]}
+    event.update({field: complaint.get(field) for field in EVENT_FIELDS if field in complaint})
+    return event
+
+
+def publish_complaint_event(event_type: str, complaint: Dict, bus: EventBus = event_bus) -> None:
+    """
+    Publish a complaint change made by this process. With
+    EVENTS_SOURCE=change_stream every worker receives changes from MongoDB
+    instead, so local publishing is skipped to avoid duplicates.
+    """
+    if EVENTS_SOURCE != "local":
+        return
+    bus.publish(complaint_event(event_type, complaint), complaint_topics(complaint))
+
+
+# Updates that dashboards care about
+WATCHED_FIELDS = ("status", "analysis_status", "department_id", "assigned_to")
+
+CHANGE_STREAM_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": "insert"},
+        {"operationType": "update", "$or": [
+            {f"updateDescription.updatedFields.{field}": {"$exists": True}} for field in WATCHED_FIELDS
+        ]}
+    ]}}
+]
+
+
+def event_from_change(change: Dict) -> Optional[Tuple[str, Dict]]:
+    """Map a complaints change-stream document to an event type and complaint"""
+    complaint = change.get("fullDocument")
+    if not complaint:
+        return None
+    if change["operationType"] == "insert":
+        return "complaint_created", complaint
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    if "analysis_status" in updated:
+        if updated["analysis_status"] == AnalysisStatus.COMPLETED:
+            return "analysis_completed", complaint
+        return "analysis_updated", complaint
+    if "status" in updated:
+        return "status_changed", complaint
+    return "complaint_updated", complaint
+
+
+class ComplaintChangeStream:
+    """
+    Feed the event bus from a change stream on complaints, so every worker
+    process sees changes made by the others. Needs a replica set; the stream
+    is resumed from the last token after errors.
+    """
+
+    def __init__(self, db, bus: EventBus = event_bus, retry_delay: float = EVENTS_RETRY_DELAY):
+        self.db = db
+        self.bus = bus
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info("Watching complaint changes for events")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        resume_token = None
+        while True:
+            try:
+                async with self.db["complaints"].watch(
+                    CHANGE_STREAM_PIPELINE, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        mapped = event_from_change(change)
+                        if mapped:
+                            event_type, complaint = mapped
+                            self.bus.publish(complaint_event(event_type, complaint), complaint_topics(complaint))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Complaint change stream failed, reopening in {self.retry_delay}s: {str(e)}")
+                await asyncio.sleep(self.retry_delay)
@@ -0,0 +1,192 @@
+import io
+import os
+import logging
+import asyncio
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from PIL import Image, ImageOps
+from utils.storage import key_stem
+
+logger = logging.getLogger(__name__)
+
+# Image processing settings
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))  # processes
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1600"))  # px, longest side of the stored photo
+IMAGE_THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "320"))  # px
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_DUPLICATE_DISTANCE = int(os.getenv("IMAGE_DUPLICATE_DISTANCE", "6"))  # max differing hash bits
+IMAGE_DUPLICATE_SCAN_LIMIT = int(os.getenv("IMAGE_DUPLICATE_SCAN_LIMIT", "500"))  # recent photos compared
+
+# EXIF tags
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+DATETIME_ORIGINAL = 36867
+DATETIME = 306
+
+
+def _exif_timestamp(exif) -> Optional[str]:
+    value = exif.get_ifd(EXIF_IFD).get(DATETIME_ORIGINAL) or exif.get(DATETIME)
+    try:
+        return datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S").isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _gps_coordinate(value, ref) -> float:
+    degrees, minutes, seconds = (float(part) for part in value)
+    coordinate = degrees + minutes / 60 + seconds / 3600
+    return -coordinate if ref in ("S", "W") else coordinate
+
+
+def _exif_gps(exif) -> Optional[Dict]:
+    gps = exif.get_ifd(GPS_IFD)
+    try:
+        return {
+            "lat": round(_gps_coordinate(gps[2], gps.get(1)), 6),
+            "lon": round(_gps_coordinate(gps[4], gps.get(3)), 6)
+        }
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def perceptual_hash(image: Image.Image) -> str:
+    """64-bit difference hash: compares horizontally adjacent pixels of a 9x8 grayscale thumbnail"""
+    pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for column in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + column] < pixels[row * 9 + column + 1])
+    return f"{bits:016x}"
+
+
+def hamming_distance(first: str, second: str) -> int:
+    return bin(int(first, 16) ^ int(second, 16)).count("1")
+
+
+def _encode_jpeg(image: Image.Image) -> bytes:
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def process_image(data: bytes, max_dimension: int = IMAGE_MAX_DIMENSION,
+                  thumbnail_size: int = IMAGE_THUMBNAIL_SIZE) -> Dict:
+    """
+    Extract EXIF metadata, then produce an EXIF-free downscaled JPEG, a
+    thumbnail and a perceptual hash. CPU-bound; runs in the process pool.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        exif = image.getexif()
+        taken_at = _exif_timestamp(exif)
+        gps = _exif_gps(exif)
+
+        # Apply the EXIF orientation, then drop all metadata by re-encoding
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        thumbnail = image.copy()
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+
+        return {
+            "width": image.width,
+            "height": image.height,
+            "phash": perceptual_hash(image),
+            "taken_at": taken_at,
+            "gps": gps,
+            "image": _encode_jpeg(image),
+            "thumbnail": _encode_jpeg(thumbnail)
+        }
+
+
+class ImageProcessor:
+    """
+    Runs process_image in a process pool so photos never block the event loop.
+    Workers are spawned rather than forked: the API process already runs
+    threads (the log queue listener, the bcrypt pool), and a forked child
+    can inherit one of their locks held and deadlock.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def process(self, data: bytes) -> Dict:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._executor, process_image, data)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+image_processor = ImageProcessor()
+
+
+async def find_duplicate_photos(db, complaint: Dict, phash: str,
+                                max_distance: int = IMAGE_DUPLICATE_DISTANCE) -> List[str]:
+    """Recent complaints in the same district whose photo hash is within max_distance bits"""
+    cursor = db["complaints"].find(
+        {
+            "_id": {"$ne": complaint["_id"]},
+            "district": complaint.get("district"),
+            "image_analysis.phash": {"$exists": True}
+        },
+        {"image_analysis.phash": 1}
+    ).sort("created_at", -1).limit(IMAGE_DUPLICATE_SCAN_LIMIT)
+    return [
+        other["_id"] async for other in cursor
+        if hamming_distance(phash, other["image_analysis"]["phash"]) <= max_distance
+    ]
+
+
+async def process_complaint_image(db, storage, complaint_id: str, key: str,
+                                  processor: Optional[ImageProcessor] = None) -> Optional[Dict]:
+    """
+    Background stage after an upload: process the privately stored
+    original, publish its EXIF-free version as the complaint's image_url,
+    store a thumbnail and record the image metadata and near-duplicate
+    photos on the complaint. If processing fails nothing is published.
+    """
+    processor = processor or image_processor
+    try:
+        complaint = await db["complaints"].find_one({"_id": complaint_id})
+        if not complaint:
+            return None
+
+        result = await processor.process(await storage.read(key, private=True))
+        stem = key_stem(key)
+
+        async def _one(data: bytes):
+            yield data
+
+        image_url = await storage.save(f"{stem}_display.jpg", _one(result["image"]), "image/jpeg")
+        thumbnail_url = await storage.save(f"{stem}_thumb.jpg", _one(result["thumbnail"]), "image/jpeg")
+
+        image_analysis = {
+            "phash": result["phash"],
+            "width": result["width"],
+            "height": result["height"],
+            "taken_at": result["taken_at"],
+            "gps": result["gps"],
+            "thumbnail_url": thumbnail_url,
+            "duplicate_of": await find_duplicate_photos(db, complaint, result["phash"]),
+            "processed_at": datetime.utcnow()
+        }
+        await db["complaints"].update_one(
+            {"_id": complaint_id},
+            {"$set": {"image_url": image_url, "image_analysis": image_analysis}}
+        )
+        # The original still carries EXIF, including the location
+        await storage.delete(key, private=True)
+
+        if image_analysis["duplicate_of"]:
+            logger.info(f"Photo for complaint {complaint_id} resembles {image_analysis['duplicate_of']}")
+        return image_analysis
+    except Exception as e:
+        logger.error(f"Error processing image for complaint {complaint_id}: {str(e)}")
+        return None
@@ -0,0 +1,128 @@
+import os
+import time
+import asyncio
+import logging
+import httpx
+from groq import AsyncGroq
+from typing import Dict, List, Optional
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, llm_breaker
+from utils.metrics import llm_request_duration, llm_requests, llm_tokens
+
+logger = logging.getLogger(__name__)
+
+# LLM client settings
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # Override to point at a local or fake server
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # seconds, per call
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+# Retries are made by the analysis queue under a shared retry budget
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "0"))
+
+
+class LLMClient:
+    """
+    Async chat-completion client sharing one pooled HTTP connection pool.
+
+    A semaphore caps the number of in-flight calls so a burst of complaints
+    queues locally instead of opening unbounded connections to the provider.
+    An optional circuit breaker makes calls fail fast while the provider is down.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = GROQ_BASE_URL,
+        model: str = LLM_MODEL,
+        timeout: float = LLM_TIMEOUT,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_keepalive: int = LLM_MAX_KEEPALIVE,
+        max_retries: int = LLM_MAX_RETRIES,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.breaker = breaker
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive
+            ),
+            timeout=timeout
+        )
+        self._client = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=max_retries,
+            http_client=self._http_client
+        )
+
+    async def complete(
+        self,
+        messages: List[Dict],
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """
+        Run a chat completion and return the message content.
+
+        Args:
+            messages: Chat messages in OpenAI format
+            timeout: Per-call timeout in seconds, defaults to the client timeout
+            **kwargs: Extra completion parameters (temperature, max_tokens, ...)
+        """
+        async with self._semaphore:
+            if self.breaker:
+                try:
+                    self.breaker.before_call()
+                except CircuitOpenError:
+                    llm_requests.inc(outcome="circuit_open")
+                    raise
+            started = time.perf_counter()
+            try:
+                completion = await self._client.chat.completions.create(
+                    model=kwargs.pop("model", self.model),
+                    messages=messages,
+                    timeout=timeout or self.timeout,
+                    **kwargs
+                )
+            except Exception:
+                llm_request_duration.observe(time.perf_counter() - started, outcome="error")
+                llm_requests.inc(outcome="error")
+                if self.breaker:
+                    self.breaker.record_failure()
+                raise
+            llm_request_duration.observe(time.perf_counter() - started, outcome="success")
+            llm_requests.inc(outcome="success")
+            if self.breaker:
+                self.breaker.record_success()
+        usage = getattr(completion, "usage", None)
+        if usage:
+            llm_tokens.inc(usage.prompt_tokens or 0, type="prompt")
+            llm_tokens.inc(usage.completion_tokens or 0, type="completion")
+        return completion.choices[0].message.content
+
+    async def close(self) -> None:
+        await self._http_client.aclose()
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient(api_key=os.getenv("GROQ_API_KEY"), breaker=llm_breaker)
+    return _llm_client
+
+
+async def close_llm_client() -> None:
+    """Close the shared connection pool, e.g. on application shutdown"""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
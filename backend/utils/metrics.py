@@ -0,0 +1,258 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, List, Sequence, Tuple
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Metrics settings
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond Mongo reads up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        lines = self.header()
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Process-local metric registry rendered in the Prometheus text format.
+
+    Collectors are async callbacks run on each scrape to refresh gauges
+    whose values live elsewhere, such as the analysis queue depth.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Awaitable[None]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Awaitable[None]]) -> None:
+        self._collectors.append(collector)
+
+    async def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                await collector()
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_request_duration = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+mongo_operation_duration = REGISTRY.histogram(
+    "mongo_operation_duration_seconds", "MongoDB command latency by collection", ("collection", "command", "outcome")
+)
+llm_request_duration = REGISTRY.histogram(
+    "llm_request_duration_seconds", "LLM chat completion latency", ("outcome",)
+)
+llm_requests = REGISTRY.counter(
+    "llm_requests_total", "LLM chat completion calls by outcome", ("outcome",)
+)
+llm_tokens = REGISTRY.counter(
+    "llm_tokens_total", "LLM tokens used", ("type",)
+)
+analysis_jobs = REGISTRY.counter(
+    "analysis_jobs_total", "Analysis job attempts by outcome", ("outcome",)
+)
+analysis_queue_jobs = REGISTRY.gauge(
+    "analysis_queue_jobs", "Analysis jobs per state", ("status",)
+)
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """pymongo command listener recording per-collection command latency"""
+
+    # Commands whose first value is not a collection name
+    _no_collection = {"ping", "hello", "ismaster", "isMaster", "endSessions", "buildInfo", "getMore", "killCursors"}
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[int, int], Tuple[str, str]] = {}
+
+    def started(self, event) -> None:
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        elif event.command_name in self._no_collection or not isinstance(collection, str):
+            collection = "-"
+        self._inflight[(event.request_id, event.operation_id or 0)] = (collection, event.command_name)
+
+    def _finish(self, event, outcome: str) -> None:
+        entry = self._inflight.pop((event.request_id, event.operation_id or 0), None)
+        if entry is None:
+            return
+        collection, command = entry
+        mongo_operation_duration.observe(
+            event.duration_micros / 1e6, collection=collection, command=command, outcome=outcome
+        )
+
+    def succeeded(self, event) -> None:
+        self._finish(event, "success")
+
+    def failed(self, event) -> None:
+        self._finish(event, "error")
+
+
+mongo_metrics_listener = MongoMetricsListener()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope it was given
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code
+            )
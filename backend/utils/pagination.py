@@ -0,0 +1,41 @@
+import json
+import base64
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(doc: Dict) -> str:
+    """Opaque cursor pointing just past a document in (created_at, _id) order"""
+    payload = json.dumps({"t": doc["created_at"].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), payload["id"]
+    except Exception:
+        raise InvalidCursorError("Invalid pagination cursor")
+
+
+def keyset_query(query: Dict, cursor: Optional[str]) -> Dict:
+    """
+    Restrict a query to documents after the cursor when sorting by
+    created_at descending, then _id descending.
+    """
+    if not cursor:
+        return query
+    created_at, doc_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": doc_id}}
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
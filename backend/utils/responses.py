@@ -0,0 +1,45 @@
+import os
+from typing import Any
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+# Return list and stats payloads without response_model validation
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"  # opt-in
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(value: Any) -> Any:
+    """Types orjson does not encode natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    orjson-encoded response for documents read straight from Mongo.
+
+    datetime, Enum and numpy values are encoded natively and ObjectId as a
+    string, so no jsonable_encoder pass is needed.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+def fast_response(content: Any):
+    """
+    Wrap trusted database output in a MongoJSONResponse, which FastAPI sends
+    as-is instead of validating it against the route's response_model.
+    With FAST_JSON_RESPONSES off, the content goes through the usual
+    validation and encoding.
+    """
+    if FAST_JSON_RESPONSES:
+        return MongoJSONResponse(content)
+    return content
@@ -0,0 +1,184 @@
+import sys
+import asyncio
+import argparse
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.logging_config import configure_logging
+from utils.database import create_client, get_database
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "complaint_rollups"
+UNASSIGNED = "UNASSIGNED"
+UNKNOWN_DISTRICT = "Unknown"
+
+RollupKey = Tuple[str, str, str]
+
+
+def rollup_key(complaint: Dict) -> RollupKey:
+    """(department_id, district, status) bucket a complaint is counted in"""
+    status = complaint.get("status")
+    return (
+        complaint.get("department_id") or UNASSIGNED,
+        complaint.get("district") or UNKNOWN_DISTRICT,
+        getattr(status, "value", status) or "pending"
+    )
+
+
+def _rollup_id(key: RollupKey) -> str:
+    return "|".join(key)
+
+
+async def _increment(db, key: RollupKey, amount: int) -> None:
+    department_id, district, status = key
+    await db[ROLLUP_COLLECTION].update_one(
+        {"_id": _rollup_id(key)},
+        {
+            "$inc": {"count": amount},
+            "$set": {
+                "department_id": department_id,
+                "district": district,
+                "status": status,
+                "updated_at": datetime.utcnow()
+            }
+        },
+        upsert=True
+    )
+
+
+async def apply_rollup_change(db, before: Optional[Dict], after: Optional[Dict]) -> None:
+    """
+    Move a complaint between rollup buckets.
+
+    Pass before=None for a new complaint and after=None for a deleted one.
+    Failures are logged rather than raised; reconcile_rollups repairs drift.
+    """
+    old = rollup_key(before) if before else None
+    new = rollup_key(after) if after else None
+    if old == new:
+        return
+    try:
+        if old:
+            await _increment(db, old, -1)
+        if new:
+            await _increment(db, new, 1)
+    except Exception as e:
+        logger.error(f"Error updating complaint rollups: {str(e)}")
+
+
+async def add_to_rollups(db, complaints: List[Dict]) -> None:
+    """Count a batch of new complaints with one update per bucket"""
+    counts = Counter(rollup_key(complaint) for complaint in complaints)
+    try:
+        for key, amount in counts.items():
+            await _increment(db, key, amount)
+    except Exception as e:
+        logger.error(f"Error updating complaint rollups: {str(e)}")
+
+
+async def get_rollups(db, department_id: Optional[str] = None, district: Optional[str] = None,
+                      status: Optional[str] = None) -> Dict:
+    """
+    Read counters and totals per department, district and status.
+
+    The rollup collection holds at most one document per bucket, so this
+    does not depend on the size of the complaints collection.
+    """
+    query = {"count": {"$gt": 0}}
+    if department_id:
+        query["department_id"] = department_id
+    if district:
+        query["district"] = district
+    if status:
+        query["status"] = status
+
+    rows = await db[ROLLUP_COLLECTION].find(query, {"_id": 0, "updated_at": 0}).to_list(None)
+    summary = {"total": 0, "by_department": {}, "by_district": {}, "by_status": {}, "rows": rows}
+    for row in rows:
+        summary["total"] += row["count"]
+        for field, totals in (("department_id", "by_department"), ("district", "by_district"), ("status", "by_status")):
+            summary[totals][row[field]] = summary[totals].get(row[field], 0) + row["count"]
+    return summary
+
+
+async def reconcile_rollups(db, dry_run: bool = False) -> List[Dict]:
+    """
+    Recount every bucket from the complaints collection and fix counters
+    that drifted. Returns the buckets whose stored count was wrong.
+    """
+    actual: Dict[str, Tuple[RollupKey, int]] = {}
+    cursor = db["complaints"].aggregate([
+        {"$group": {
+            "_id": {
+                "department_id": {"$ifNull": ["$department_id", UNASSIGNED]},
+                "district": {"$cond": [{"$ifNull": ["$district", False]}, "$district", UNKNOWN_DISTRICT]},
+                "status": {"$ifNull": ["$status", "pending"]}
+            },
+            "count": {"$sum": 1}
+        }}
+    ])
+    async for row in cursor:
+        key = rollup_key(row["_id"])
+        previous = actual.get(_rollup_id(key), (key, 0))[1]
+        actual[_rollup_id(key)] = (key, previous + row["count"])
+
+    # Buckets keep their key as fields; the id is not parsed, since values may contain "|"
+    stored = {
+        doc["_id"]: doc
+        async for doc in db[ROLLUP_COLLECTION].find({}, {"count": 1, "department_id": 1, "district": 1, "status": 1})
+    }
+
+    drift = []
+    for rollup_id in set(actual) | set(stored):
+        key, count = actual.get(rollup_id) or (rollup_key(stored[rollup_id]), 0)
+        stored_count = stored.get(rollup_id, {}).get("count", 0)
+        if stored_count == count:
+            continue
+        drift.append({"bucket": rollup_id, "stored": stored_count, "actual": count})
+        if dry_run:
+            continue
+        department_id, district, status = key
+        await db[ROLLUP_COLLECTION].update_one(
+            {"_id": rollup_id},
+            {"$set": {
+                "department_id": department_id,
+                "district": district,
+                "status": status,
+                "count": count,
+                "updated_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+    return drift
+
+
+async def main(argv: Optional[List[str]] = None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Rebuild or check complaint rollup counters")
+    parser.add_argument("command", choices=["rebuild", "reconcile", "check"],
+                        help="rebuild drops and recounts, reconcile fixes drift, check only reports it")
+    args = parser.parse_args(argv)
+
+    client = create_client()
+    db = get_database(client)
+    try:
+        if args.command == "rebuild":
+            await db[ROLLUP_COLLECTION].delete_many({})
+        drift = await reconcile_rollups(db, dry_run=args.command == "check")
+        for row in drift:
+            print(f"{row['bucket']}: stored={row['stored']} actual={row['actual']}")
+        print(f"{len(drift)} bucket(s) {'drifted' if args.command == 'check' else 'updated'}")
+        if args.command == "check" and drift:
+            sys.exit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,250 @@
+import os
+import re
+import uuid
+import asyncio
+import logging
+import tempfile
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, BinaryIO, Optional
+import httpx
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+
+logger = logging.getLogger(__name__)
+
+# Upload settings
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")  # cloudinary or local
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # multipart boundaries and headers around the file
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))  # kept in memory before spilling to disk
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads"))
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "/uploads")
+LOCAL_PRIVATE_DIR = os.getenv("LOCAL_PRIVATE_DIR")  # never served; defaults to LOCAL_STORAGE_DIR + "_private"
+
+# Accepted uploads; extensions are also removed from keys to get a storage-independent stem.
+# SVG is left out on purpose: it can carry scripts
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".heic", ".heif"}
+IMAGE_CONTENT_TYPES = {
+    "image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff", "image/heic", "image/heif"
+}
+
+# Requests whose bodies UploadLimitMiddleware caps
+UPLOAD_PATHS = re.compile(r"^/api/complaints/[^/]+/image$")
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES"""
+
+
+async def read_chunks(file: BinaryIO, max_bytes: int = UPLOAD_MAX_BYTES,
+                      chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Yield an upload in chunks, raising UploadTooLargeError as soon as more
+    than max_bytes have been read. Reads from the spooled request file run in
+    a worker thread because they may hit the disk.
+    """
+    total = 0
+    while True:
+        chunk = await asyncio.to_thread(file.read, chunk_size)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+        yield chunk
+
+
+def is_image_upload(filename: Optional[str], content_type: Optional[str]) -> bool:
+    """Whether an upload has an accepted image extension and content type"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension in IMAGE_EXTENSIONS and (content_type or "").lower() in IMAGE_CONTENT_TYPES
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware capping upload request bodies while they are received.
+    Multipart bodies are parsed and spooled before the endpoint runs, so
+    checking the file size there is too late: a large or chunked body would
+    already be on disk. Bodies over the limit are rejected with 413.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD, paths=UPLOAD_PATHS):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self.paths.match(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        detail = f"Upload exceeds the {self.max_bytes} byte limit"
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                response = JSONResponse({"detail": detail}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+                return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI passes HTTPExceptions raised while parsing the body through
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def key_stem(key: str) -> str:
+    """
+    The key without a known image extension. Anything else after the last
+    dot is kept, so keys without an extension are never truncated.
+    """
+    stem, extension = os.path.splitext(key)
+    return stem if extension.lower() in IMAGE_EXTENSIONS else key
+
+
+class StorageBackend(ABC):
+    """
+    Stores uploaded complaint files and returns the URL they are served from.
+    Private files, such as originals that still carry EXIF, get no URL and
+    are only read back by the API.
+    """
+
+    @abstractmethod
+    async def save(self, key: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None,
+                   private: bool = False) -> Optional[str]:
+        """Write the chunks under key and return the URL, or None for a private file"""
+
+    @abstractmethod
+    async def read(self, key: str, private: bool = False) -> bytes:
+        """The stored file's content"""
+
+    @abstractmethod
+    async def delete(self, key: str, private: bool = False) -> None:
+        """Remove the file; missing files are ignored"""
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files under a local directory, served by the API under LOCAL_STORAGE_URL.
+    Private files go to a separate directory that is not mounted.
+    """
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_URL,
+                 private_root: Optional[str] = LOCAL_PRIVATE_DIR):
+        self.root = root
+        self.private_root = private_root or f"{os.path.normpath(root)}_private"
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str, private: bool = False) -> str:
+        root = os.path.normpath(self.private_root if private else self.root)
+        path = os.path.normpath(os.path.join(root, key))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None,
+                   private: bool = False) -> Optional[str]:
+        path = self.path(key, private)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+        # Write to a temporary name so a failed upload never leaves a partial file behind
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        handle = await asyncio.to_thread(open, partial, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(handle.write, chunk)
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(os.replace, partial, path)
+        except BaseException:
+            handle.close()
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return None if private else f"{self.base_url}/{key}"
+
+    async def read(self, key: str, private: bool = False) -> bytes:
+        def _read():
+            with open(self.path(key, private), "rb") as handle:
+                return handle.read()
+        return await asyncio.to_thread(_read)
+
+    async def delete(self, key: str, private: bool = False) -> None:
+        path = self.path(key, private)
+        if os.path.exists(path):
+            await asyncio.to_thread(os.remove, path)
+
+
+class CloudinaryStorage(StorageBackend):
+    """
+    Cloudinary uploads. The SDK is synchronous, so chunks are spooled to a
+    temporary file (in memory up to UPLOAD_SPOOL_BYTES) and the upload runs
+    in a worker thread.
+    """
+
+    def __init__(self, folder: str = "complaints"):
+        self.folder = folder
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET")
+        )
+
+    def _public_id(self, key: str) -> str:
+        # Cloudinary adds the format itself
+        return key_stem(key)
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None,
+                   private: bool = False) -> Optional[str]:
+        with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES) as spool:
+            async for chunk in chunks:
+                await asyncio.to_thread(spool.write, chunk)
+            spool.seek(0)
+            result = await asyncio.to_thread(
+                cloudinary.uploader.upload,
+                spool,
+                folder=self.folder,
+                public_id=self._public_id(key),
+                resource_type="auto",
+                type="private" if private else "upload"
+            )
+        return None if private else result["secure_url"]
+
+    async def read(self, key: str, private: bool = False) -> bytes:
+        # Private assets are only delivered through signed URLs
+        url = cloudinary.utils.cloudinary_url(
+            f"{self.folder}/{self._public_id(key)}", secure=True,
+            type="private" if private else "upload", sign_url=private
+        )[0]
+        async with httpx.AsyncClient(timeout=30) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.content
+
+    async def delete(self, key: str, private: bool = False) -> None:
+        await asyncio.to_thread(
+            cloudinary.uploader.destroy, f"{self.folder}/{self._public_id(key)}",
+            type="private" if private else "upload"
+        )
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Return the configured storage backend, creating it on first use"""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "local":
+            _storage = LocalStorage()
+        else:
+            _storage = CloudinaryStorage()
+        logger.info(f"Using {STORAGE_BACKEND} storage for uploads")
+    return _storage
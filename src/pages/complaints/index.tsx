@@ -50,6 +50,10 @@ interface Complaint {
   }
 }
 
+// Columns the table renders; the detail modal loads the whole complaint
+const LIST_FIELDS = 'title,district,location,status,created_at,ai_analysis.priority_score,ai_analysis.analysis_text'
+const PAGE_SIZE = 50
+
 // Helper function to extract department from AI analysis
 const extractDepartment = (analysisText: string): string => {
   return analysisText?.split('\n')
@@ -61,6 +65,7 @@ const extractDepartment = (analysisText: string): string => {
 export default function Complaints() {
   const [complaints, setComplaints] = useState<Complaint[]>([])
   const [isLoading, setIsLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [statusFilter, setStatusFilter] = useState('')
   const [prioritySort, setPrioritySort] = useState('')
   const { user } = useAuth()
@@ -74,26 +79,32 @@ export default function Complaints() {
     fetchComplaints()
   }, [statusFilter, prioritySort])
 
-  const fetchComplaints = async () => {
+  const sortByPriority = (list: Complaint[]) => {
+    if (!prioritySort) return list
+    return [...list].sort((a, b) => {
+      const scoreA = a.ai_analysis?.priority_score || 0
+      const scoreB = b.ai_analysis?.priority_score || 0
+      return prioritySort === 'desc' ? scoreB - scoreA : scoreA - scoreB
+    })
+  }
+
+  // Without a cursor the list is reloaded; with one the next page is appended
+  const fetchComplaints = async (cursor?: string) => {
+    setIsLoading(true)
     try {
       let url = '/api/complaints'
       const params = new URLSearchParams()
+      params.append('fields', LIST_FIELDS)
+      params.append('limit', String(PAGE_SIZE))
       if (statusFilter) params.append('status', statusFilter)
       if (prioritySort) params.append('priority_sort', prioritySort)
+      if (cursor) params.append('cursor', cursor)
       if (params.toString()) url += `?${params.toString()}`
 
       const response = await axios.get(url)
-      let sortedComplaints = [...response.data]
-      
-      if (prioritySort && sortedComplaints.length > 0) {
-        sortedComplaints.sort((a, b) => {
-          const scoreA = a.ai_analysis?.priority_score || 0
-          const scoreB = b.ai_analysis?.priority_score || 0
-          return prioritySort === 'desc' ? scoreB - scoreA : scoreA - scoreB
-        })
-      }
-      
-      setComplaints(sortedComplaints)
+      const items: Complaint[] = response.data.items
+      setComplaints((previous) => sortByPriority(cursor ? [...previous, ...items] : items))
+      setNextCursor(response.data.next)
     } catch (error) {
       console.error('Error fetching complaints:', error)
     } finally {
@@ -116,9 +127,15 @@ export default function Complaints() {
     }
   }
 
-  const handleComplaintClick = (complaint: Complaint) => {
+  const handleComplaintClick = async (complaint: Complaint) => {
     setSelectedComplaint(complaint)
     onOpen()
+    try {
+      const response = await axios.get(`/api/complaints/${complaint._id}`)
+      setSelectedComplaint(response.data)
+    } catch (error) {
+      console.error('Error fetching complaint:', error)
+    }
   }
 
   return (
@@ -231,6 +248,17 @@ export default function Complaints() {
               </Tbody>
             </Table>
           </Box>
+
+          {nextCursor && (
+            <Button
+              alignSelf="center"
+              variant="outline"
+              isLoading={isLoading}
+              onClick={() => fetchComplaints(nextCursor)}
+            >
+              Load more
+            </Button>
+          )}
         </Stack>
 
         <Modal isOpen={isOpen} onClose={onClose} size="xl">
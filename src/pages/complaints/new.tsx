@@ -90,6 +90,59 @@ export default function NewComplaint() {
     throw new Error('Analysis timed out after maximum attempts')
   }
 
+  // Wait for the analysis event on the server push stream; polls if the stream is unavailable or quiet
+  const waitForAnalysis = async (complaintId: string) => {
+    if (!localStorage.getItem('token') || typeof EventSource === 'undefined') {
+      return pollForAnalysis(complaintId)
+    }
+    // EventSource cannot send headers, so the stream is opened with a short-lived ticket
+    let ticket: string
+    try {
+      ticket = (await axios.post('/api/events/ticket')).data.ticket
+    } catch (error) {
+      return pollForAnalysis(complaintId)
+    }
+
+    return new Promise<any>((resolve, reject) => {
+      const source = new EventSource(
+        `${axios.defaults.baseURL}/api/events/stream?ticket=${encodeURIComponent(ticket)}`
+      )
+      const timeout = setTimeout(() => finish(() => pollForAnalysis(complaintId).then(resolve, reject)), 60000)
+
+      const finish = (done: () => void) => {
+        clearTimeout(timeout)
+        source.close()
+        done()
+      }
+      const fetchAnalysis = async () => {
+        const response = await axios.get(`/api/complaints/${complaintId}`)
+        return response.data.ai_analysis
+      }
+      const onAnalysis = async (event: MessageEvent) => {
+        if (JSON.parse(event.data).complaint_id !== complaintId) return
+        try {
+          const analysis = await fetchAnalysis()
+          finish(() => resolve(analysis))
+        } catch (error) {
+          finish(() => reject(error))
+        }
+      }
+
+      source.addEventListener('analysis_completed', onAnalysis)
+      source.addEventListener('analysis_updated', onAnalysis)
+      // The analysis may have finished before the stream opened
+      source.onopen = async () => {
+        const analysis = await fetchAnalysis().catch(() => null)
+        if (analysis) finish(() => resolve(analysis))
+      }
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+          finish(() => pollForAnalysis(complaintId).then(resolve, reject))
+        }
+      }
+    })
+  }
+
   const onSubmit = async (data: ComplaintForm) => {
     try {
       setIsLoading(true)
@@ -119,7 +172,7 @@ export default function NewComplaint() {
       setIsAnalyzing(true)
       
       try {
-        const analysis = await pollForAnalysis(complaintId)
+        const analysis = await waitForAnalysis(complaintId)
         setComplaintAnalysis(analysis)
         setShowTypingAnimation(true)
       } catch (error) {
@@ -72,6 +72,10 @@ interface DashboardStats {
   averageResolutionTime: number
 }
 
+// Columns the table renders; the status modal loads the whole complaint
+const LIST_FIELDS = 'title,location,status,created_at,ai_analysis.priority_score'
+const PAGE_SIZE = 50
+
 export default function OfficerDashboard() {
   const [complaints, setComplaints] = useState<Complaint[]>([])
   const [stats, setStats] = useState<DashboardStats>({
@@ -80,6 +84,8 @@ export default function OfficerDashboard() {
     resolvedComplaints: 0,
     averageResolutionTime: 0,
   })
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [selectedComplaint, setSelectedComplaint] = useState<Complaint | null>(null)
   const [newStatus, setNewStatus] = useState('')
   const [actionDescription, setActionDescription] = useState('')
@@ -109,9 +115,10 @@ export default function OfficerDashboard() {
     try {
       // Fetch complaints assigned to the officer
       const complaintsResponse = await axios.get('/api/complaints', {
-        params: { assigned_to: user?._id },
+        params: { assigned_to: user?._id, fields: LIST_FIELDS, limit: PAGE_SIZE },
       })
-      setComplaints(complaintsResponse.data)
+      setComplaints(complaintsResponse.data.items)
+      setNextCursor(complaintsResponse.data.next)
 
       // Fetch officer's dashboard stats
       const statsResponse = await axios.get('/api/analytics/officer-stats')
@@ -121,6 +128,22 @@ export default function OfficerDashboard() {
     }
   }
 
+  const fetchMoreComplaints = async () => {
+    if (!nextCursor) return
+    setIsLoadingMore(true)
+    try {
+      const response = await axios.get('/api/complaints', {
+        params: { assigned_to: user?._id, fields: LIST_FIELDS, limit: PAGE_SIZE, cursor: nextCursor },
+      })
+      setComplaints((previous) => [...previous, ...response.data.items])
+      setNextCursor(response.data.next)
+    } catch (error) {
+      console.error('Error fetching complaints:', error)
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
+
   const handleUpdateStatus = async () => {
     if (!selectedComplaint || !newStatus || !actionDescription) return
 
@@ -153,10 +176,16 @@ export default function OfficerDashboard() {
     }
   }
 
-  const handleComplaintClick = (complaint: Complaint) => {
+  const handleComplaintClick = async (complaint: Complaint) => {
     setSelectedComplaint(complaint)
     setNewStatus(complaint.status)
     onOpen()
+    try {
+      const response = await axios.get(`/api/complaints/${complaint._id}`)
+      setSelectedComplaint(response.data)
+    } catch (error) {
+      console.error('Error fetching complaint:', error)
+    }
   }
 
   const getStatusColor = (status: string) => {
@@ -290,6 +319,14 @@ export default function OfficerDashboard() {
           </Table>
         </Box>
 
+        {nextCursor && (
+          <Box textAlign="center" mt={4}>
+            <Button variant="outline" isLoading={isLoadingMore} onClick={fetchMoreComplaints}>
+              Load more
+            </Button>
+          </Box>
+        )}
+
         <Modal isOpen={isOpen} onClose={onClose} size="xl">
           <ModalOverlay />
           <ModalContent>